@@ -0,0 +1,62 @@
+"""
+Benchmark for the feed_format serialization profiles.
+
+For live_events.json and streamed_events.json, reports the size of each
+profile and how long it takes to write and parse. Each profile is also
+checked to round-trip through load_feed to the original records.
+
+Usage:
+    python benchmarks/bench_feed_format.py
+    python benchmarks/bench_feed_format.py --repeat 50
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from feed_format import FEED_PROFILES, dump_feed, load_feed, read_feed  # noqa: E402
+
+FEED_FILES = [os.path.join(REPO_ROOT, "live_events.json"), os.path.join(REPO_ROOT, "streamed_events.json")]
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_feed(path: str, repeat: int):
+    records = read_feed(path)
+    print(f"{os.path.basename(path)}: {len(records)} records")
+    baseline = None
+    for profile in FEED_PROFILES:
+        payload = dump_feed(records, profile)
+        if load_feed(payload) != records:
+            raise SystemExit(f"Profile '{profile}' does not round-trip {path}")
+        baseline = baseline or len(payload)
+        dump_seconds = best_of(lambda: dump_feed(records, profile), repeat)
+        load_seconds = best_of(lambda: load_feed(payload), repeat)
+        print(f"  {profile:<10} {len(payload):>9} B ({len(payload) / baseline:6.1%})  "
+              f"gzip: {len(gzip.compress(payload)):>7} B  "
+              f"write: {dump_seconds * 1000:7.2f} ms  parse: {load_seconds * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the published feed serialization profiles")
+    parser.add_argument('--repeat', type=int, default=20, help="Runs per measurement; the best is reported")
+    args = parser.parse_args()
+
+    for path in FEED_FILES:
+        if os.path.exists(path):
+            bench_feed(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark for LiveDataEncryptor.stream_encrypt.
+
+Compares the original per-byte implementation against the bulk keystream
+engine, checks that both produce byte-identical ciphertext, and (when a
+config is available) decrypts the committed encrypted blob as a
+compatibility check.
+
+Usage:
+    python benchmarks/bench_keystream.py
+    python benchmarks/bench_keystream.py --sizes 65536 1048576
+    python benchmarks/bench_keystream.py --config config.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import secrets
+import struct
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import comradicaloculiwersetyouts as encryptor_service  # noqa: E402
+from feed_format import read_feed  # noqa: E402
+
+BLOB_FILE = os.path.join(REPO_ROOT, "67d18f5b263505d3be8283897bb383f149a39dd35bf9563d43.json")
+LIVE_EVENTS_FILE = os.path.join(REPO_ROOT, "live_events.json")
+
+
+def legacy_stream_encrypt(data: bytes, key: bytes, iv: bytes) -> bytes:
+    """The original implementation, kept verbatim as the reference."""
+    result = bytearray()
+    key_hash = hashlib.sha256(key + iv).digest()
+    for i, byte in enumerate(data):
+        pos_key = hashlib.sha256(key_hash + struct.pack('<I', i)).digest()[0]
+        result.append(byte ^ pos_key)
+    return bytes(result)
+
+
+def measure(fn, size: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return size / (1024 * 1024) / elapsed
+
+
+def bench_size(encryptor, size: int, skip_legacy: bool):
+    data = os.urandom(size)
+    key1, key2, iv = secrets.token_bytes(32), secrets.token_bytes(32), secrets.token_bytes(16)
+
+    new_out = None
+
+    def run_new():
+        nonlocal new_out
+        new_out = encryptor.stream_encrypt_layers(data, [key1, key2], iv)
+
+    new_rate = measure(run_new, size)
+
+    if skip_legacy:
+        print(f"{size:>10} B  legacy:      skipped  bulk: {new_rate:8.3f} MB/s")
+        return
+
+    legacy_out = None
+
+    def run_legacy():
+        nonlocal legacy_out
+        legacy_out = legacy_stream_encrypt(legacy_stream_encrypt(data, key1, iv), key2, iv)
+
+    legacy_rate = measure(run_legacy, size)
+    identical = legacy_out == new_out == encryptor.stream_encrypt(encryptor.stream_encrypt(data, key1, iv), key2, iv)
+    print(f"{size:>10} B  legacy: {legacy_rate:8.3f} MB/s  bulk: {new_rate:8.3f} MB/s  "
+          f"speedup: {new_rate / legacy_rate:5.2f}x  identical: {identical}")
+    if not identical:
+        raise SystemExit("Keystream output differs from the legacy implementation")
+
+
+def check_round_trip(encryptor):
+    """Encrypts live_events.json under a throwaway config and decrypts it again."""
+    encryptor.config = {"app_salt": "bench-salt", "app_identifier": "bench", "version": "1", "key_iterations": 1000}
+    data = read_feed(LIVE_EVENTS_FILE)
+    result = encryptor.encrypt_payload(data)
+    round_trip = encryptor.decrypt_payload(result["encrypted_data"])
+    print(f"Round trip of live_events.json: {'ok' if round_trip == data else 'MISMATCH'}")
+    if round_trip != data:
+        raise SystemExit("Round trip through encrypt_payload/decrypt_payload failed")
+
+
+def check_blob(encryptor, config_path: str):
+    with open(config_path, 'r', encoding='utf-8') as f:
+        encryptor.config = json.load(f)
+    with open(BLOB_FILE, 'r', encoding='utf-8') as f:
+        blob = json.load(f)
+    data = encryptor.decrypt_payload(blob["encrypted_data"])
+    print(f"Decrypted {os.path.basename(BLOB_FILE)}: {type(data).__name__} of {len(data)} entries, "
+          f"data_size={blob.get('data_size')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the stream_encrypt keystream engine")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16 * 1024, 64 * 1024, 256 * 1024])
+    parser.add_argument('--skip-legacy-above', type=int, default=1024 * 1024,
+                        help="Skip the slow legacy run for payloads larger than this")
+    parser.add_argument('--config', help="Local copy of the remote config.json, used to decrypt the committed blob")
+    args = parser.parse_args()
+
+    encryptor = encryptor_service.LiveDataEncryptor("BENCH")
+
+    print(f"Keystream workers: {encryptor_service.KEYSTREAM_WORKERS}")
+    for size in args.sizes:
+        bench_size(encryptor, size, size > args.skip_legacy_above)
+
+    if os.path.exists(LIVE_EVENTS_FILE):
+        size = os.path.getsize(LIVE_EVENTS_FILE)
+        print("live_events.json-sized payload:")
+        bench_size(encryptor, size, size > args.skip_legacy_above)
+        check_round_trip(encryptor)
+
+    if args.config:
+        check_blob(encryptor, args.config)
+
+
+if __name__ == "__main__":
+    main()
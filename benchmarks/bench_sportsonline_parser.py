@@ -0,0 +1,123 @@
+"""
+Benchmark for the sportsonline schedule parser.
+
+Runs each saved schedule page in benchmarks/fixtures/sportsonline_*.txt
+through two parsers:
+
+- the original line-by-line parser, which handles one day per call
+- sportsonline_parser, per day and for the whole week in one pass
+
+It checks that both give identical (time, title, url) lines for every day
+and UTC offset in use, then reports timings.
+
+Usage:
+    python benchmarks/bench_sportsonline_parser.py
+    python benchmarks/bench_sportsonline_parser.py --repeat 200
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from sportsonline_parser import WEEKDAYS, iter_day, parse_week  # noqa: E402
+
+FIXTURES = os.path.join(REPO_ROOT, "benchmarks", "fixtures", "sportsonline_*.txt")
+HOUR_OFFSETS = (0, 1)  # football_scraper, conradiculosback
+
+
+def legacy_subtract_hour_from_time(time_str: str, hours: int) -> str:
+    try:
+        hour, minute = map(int, time_str.split(':'))
+        dt = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+        dt_adjusted = dt - timedelta(hours=hours)
+        return dt_adjusted.strftime("%H:%M")
+    except (ValueError, AttributeError):
+        return time_str
+
+
+def legacy_parse(raw_data: str, current_day: str, hours: int):
+    """The original parse_sportsonline_data, with the day and offset passed in."""
+    matches = []
+    lines = raw_data.strip().split('\n')
+    in_current_day_section = False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.upper() in ['MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY']:
+            in_current_day_section = (line.upper() == current_day)
+            continue
+        if not in_current_day_section:
+            continue
+        if '|' in line:
+            parts = line.split('|', 1)
+            if len(parts) == 2:
+                left_part, stream_url = parts[0].strip(), parts[1].strip()
+                if not stream_url.startswith(('http://', 'https://')):
+                    continue
+                time_match = re.match(r'^(\d{1,2}:\d{2})\s+(.+)$', left_part)
+                if time_match:
+                    time_str, title = time_match.group(1), time_match.group(2).strip()
+                    if ':' in title or not (' vs ' in title or ' x ' in title):
+                        continue
+                    teams = title.split(' vs ') if ' vs ' in title else title.split(' x ')
+                    if len(teams) != 2 or not teams[0].strip() or not teams[1].strip():
+                        continue
+                    adjusted_time = legacy_subtract_hour_from_time(time_str, hours)
+                    title = title.replace(' x ', ' vs ')
+                    matches.append((adjusted_time, title, stream_url))
+    return matches
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_page(path: str, repeat: int):
+    with open(path, 'r', encoding='utf-8') as f:
+        raw = f.read()
+
+    for hours in HOUR_OFFSETS:
+        week = parse_week(raw, hours)
+        for day in WEEKDAYS:
+            expected = legacy_parse(raw, day, hours)
+            if list(iter_day(raw, day, hours)) != expected or week.get(day, []) != expected:
+                raise SystemExit(f"{os.path.basename(path)}: {day} (offset {hours}h) differs from the legacy parser")
+
+    lines = sum(len(day_lines) for day_lines in parse_week(raw).values())
+    one_day_legacy = best_of(lambda: legacy_parse(raw, WEEKDAYS[0], 1), repeat)
+    one_day_new = best_of(lambda: list(iter_day(raw, WEEKDAYS[0], 1)), repeat)
+    week_legacy = best_of(lambda: [legacy_parse(raw, day, 1) for day in WEEKDAYS], repeat)
+    week_new = best_of(lambda: parse_week(raw, 1), repeat)
+    print(f"{os.path.basename(path)}: {len(raw)} B, {lines} match lines, output identical")
+    print(f"  one day : legacy {one_day_legacy * 1000:7.3f} ms  compiled {one_day_new * 1000:7.3f} ms "
+          f"({one_day_legacy / one_day_new:4.1f}x)")
+    print(f"  all days: legacy {week_legacy * 1000:7.3f} ms  one pass {week_new * 1000:7.3f} ms "
+          f"({week_legacy / week_new:4.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sportsonline schedule parser")
+    parser.add_argument('--repeat', type=int, default=50, help="Runs per measurement; the best is reported")
+    args = parser.parse_args()
+
+    pages = sorted(glob.glob(FIXTURES))
+    if not pages:
+        raise SystemExit(f"No fixtures matching {FIXTURES}")
+    for path in pages:
+        bench_page(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
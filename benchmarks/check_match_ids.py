@@ -0,0 +1,153 @@
+"""
+Equivalence check and benchmark for the shared match_ids module.
+
+Compares letter_match_id (football_scraper) and digit_match_id (LUCILAND)
+against verbatim copies of the original per-character implementations. The
+comparison covers every record in the committed data files plus randomly
+generated matches, including unicode names, odd spacing, missing fields and
+non-dict teams. It exits non-zero on the first mismatch, then reports timings.
+
+Usage:
+    python benchmarks/check_match_ids.py
+    python benchmarks/check_match_ids.py --random 50000 --seed 7
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from feed_format import read_feed  # noqa: E402
+import match_ids  # noqa: E402
+
+DATA_FILES = ["live_events.json", "streamed_events.json"]
+LETTER_SOURCE = "D.S stable"
+DIGIT_SOURCE = "LUCILAND"
+
+
+def legacy_letter_id(match_data: dict) -> str:
+    """football_scraper.generate_match_id before match_ids, kept verbatim as the reference."""
+    team1 = match_data.get('team1', {}).get('name', '') if isinstance(match_data.get('team1'), dict) else str(match_data.get('team1', ''))
+    team2 = match_data.get('team2', {}).get('name', '') if isinstance(match_data.get('team2'), dict) else str(match_data.get('team2', ''))
+    date = match_data.get('date', '')
+    time = match_data.get('time', '')
+    source = match_data.get('source_name', LETTER_SOURCE)
+    teams_sorted = sorted([team1.lower().strip(), team2.lower().strip()])
+    hash_input = f"{source}-{teams_sorted[0]}-{teams_sorted[1]}-{date}-{time}"
+    hex_dig = hashlib.sha256(hash_input.encode()).hexdigest()
+    letters_only = ''
+    for char in hex_dig:
+        if char.isdigit():
+            letters_only += chr(ord('A') + int(char))
+        else:
+            letters_only += char.upper()
+    iteration = 0
+    while len(letters_only) < 12:
+        iteration += 1
+        hash_input_extended = f"{hash_input}-{iteration}"
+        hex_dig = hashlib.sha256(hash_input_extended.encode()).hexdigest()
+        for char in hex_dig:
+            if len(letters_only) >= 12:
+                break
+            if char.isdigit():
+                letters_only += chr(ord('A') + int(char))
+            else:
+                letters_only += char.upper()
+    return letters_only[:12]
+
+
+def legacy_digit_id(match_data: dict) -> str:
+    """LUCILAND.generate_match_id before match_ids, kept verbatim as the reference."""
+    team1 = match_data.get('team1', {}).get('name', '') if isinstance(match_data.get('team1'), dict) else str(match_data.get('team1', ''))
+    team2 = match_data.get('team2', {}).get('name', '') if isinstance(match_data.get('team2'), dict) else str(match_data.get('team2', ''))
+    date = match_data.get('date', '')
+    time = match_data.get('time', '')
+    source = match_data.get('source_name', DIGIT_SOURCE)
+    teams_sorted = sorted([team1.lower().strip(), team2.lower().strip()])
+    hash_input = f"{source}-{teams_sorted[0]}-{teams_sorted[1]}-{date}-{time}"
+    hex_dig = hashlib.sha256(hash_input.encode()).hexdigest()
+    digits_only = ''.join(filter(str.isdigit, hex_dig))
+    while len(digits_only) < 12:
+        hash_input += str(len(digits_only))
+        hex_dig = hashlib.sha256(hash_input.encode()).hexdigest()
+        digits_only += ''.join(filter(str.isdigit, hex_dig))
+    return digits_only[:12]
+
+
+def random_name(rng: random.Random) -> str:
+    alphabet = "abcXYZ çÉßøŁ東京 -.'\t"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+
+
+def random_match(rng: random.Random) -> dict:
+    match = {}
+    for team in ("team1", "team2"):
+        roll = rng.random()
+        if roll < 0.8:
+            match[team] = {"name": random_name(rng)}
+        elif roll < 0.9:
+            match[team] = random_name(rng)
+    if rng.random() < 0.9:
+        match["source_name"] = rng.choice(["D.S stable", "LUCILAND", "The Citadel", random_name(rng)])
+    if rng.random() < 0.9:
+        match["date"] = f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-20{rng.randint(20, 30)}"
+    if rng.random() < 0.9:
+        match["time"] = f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+    return match
+
+
+def check(matches, label: str):
+    for match in matches:
+        expected = (legacy_letter_id(match), legacy_digit_id(match))
+        actual = (match_ids.letter_match_id(match, LETTER_SOURCE), match_ids.digit_match_id(match, DIGIT_SOURCE))
+        if actual != expected:
+            raise SystemExit(f"{label}: match_id mismatch for {match!r}: {actual} != {expected}")
+    if match_ids.letter_match_ids(matches, LETTER_SOURCE) != [legacy_letter_id(m) for m in matches]:
+        raise SystemExit(f"{label}: batched letter ids differ")
+    if match_ids.digit_match_ids(matches, DIGIT_SOURCE) != [legacy_digit_id(m) for m in matches]:
+        raise SystemExit(f"{label}: batched digit ids differ")
+    print(f"{label}: {len(matches)} matches, ids identical")
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and benchmark the shared match_id generators")
+    parser.add_argument('--random', type=int, default=20000, help="Random matches to compare")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    data = []
+    for name in DATA_FILES:
+        path = os.path.join(REPO_ROOT, name)
+        if os.path.exists(path):
+            records = read_feed(path)
+            check(records, name)
+            data.extend(records)
+
+    rng = random.Random(args.seed)
+    random_matches = [random_match(rng) for _ in range(args.random)]
+    check(random_matches, "random")
+
+    for label, matches in (("data files", data), ("random", random_matches)):
+        match_ids._letter_id.cache_clear()
+        match_ids._digit_id.cache_clear()
+        legacy = timed(lambda: [(legacy_letter_id(m), legacy_digit_id(m)) for m in matches])
+        cold = timed(lambda: (match_ids.letter_match_ids(matches, LETTER_SOURCE),
+                              match_ids.digit_match_ids(matches, DIGIT_SOURCE)))
+        warm = timed(lambda: (match_ids.letter_match_ids(matches, LETTER_SOURCE),
+                              match_ids.digit_match_ids(matches, DIGIT_SOURCE)))
+        print(f"{label:>10}: legacy {legacy * 1000:8.2f} ms  shared {cold * 1000:8.2f} ms "
+              f"({legacy / cold:4.1f}x)  memoized {warm * 1000:8.2f} ms ({legacy / warm:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
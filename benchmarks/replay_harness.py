@@ -0,0 +1,440 @@
+"""
+End-to-end benchmark and replay harness for the scrapers and the encryptor.
+
+Record mode runs every script against the live upstreams (sportsonline.gl,
+streamed.su / streamed.pk, matchstream.do, the config gist and the feed it
+points to) and saves each response under benchmarks/fixtures/replay/.
+Run mode serves those fixtures from a local stand-in HTTP server, with
+optional latency and failure injection, and runs each script end to end:
+
+- football_scraper.main
+- conradiculosback.main
+- LUCILAND run_football_scraper
+- winterfell_scribe.main
+- LiveDataEncryptor.run_encryption_cycle
+
+Every script runs in its own subprocess, in a scratch copy of the published
+feeds, with the transport of the shared HttpClient and of the link prober
+redirected to the stand-in server. Reported per script: wall time, requests
+sent by the client, requests answered by the server (retries included), link
+probes, fixture misses and peak RSS.
+
+Usage:
+    python benchmarks/replay_harness.py record
+    python benchmarks/replay_harness.py run
+    python benchmarks/replay_harness.py run --latency 80 --jitter 40 --failure-rate 0.05
+    python benchmarks/replay_harness.py run --scripts football_scraper winterfell_scribe --repeat 3
+"""
+import argparse
+import hashlib
+import importlib.machinery
+import importlib.util
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from requests.adapters import HTTPAdapter  # noqa: E402
+
+FIXTURES_DIR = os.path.join(REPO_ROOT, "benchmarks", "fixtures", "replay")
+INDEX_FILE = "index.json"
+# Response headers kept in fixtures; the rest are connection details of the recording
+RECORDED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+# Published files each scratch directory starts from, as in a fresh workflow checkout
+SEED_FILES = ["live_events.json", "streamed_events.json", "team_logos.json",
+              "67d18f5b263505d3be8283897bb383f149a39dd35bf9563d43.json"]
+SCRIPTS = ["football_scraper", "conradiculosback", "LUCILAND", "winterfell_scribe", "encryptor"]
+
+
+def fixture_name(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".body"
+
+
+def load_index(fixtures_dir: str) -> dict:
+    path = os.path.join(fixtures_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# --- Script entry points (run inside the child process) ---
+
+def run_football_scraper_main(args):
+    import football_scraper
+    football_scraper.main(all_days=args.all_days)
+
+
+def run_conradiculosback_main(args):
+    import conradiculosback
+    conradiculosback.main(all_days=args.all_days)
+
+
+def run_luciland(args):
+    path = os.path.join(REPO_ROOT, "LUCILAND.PY")
+    spec = importlib.util.spec_from_file_location("LUCILAND", path,
+                                                  loader=importlib.machinery.SourceFileLoader("LUCILAND", path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.run_football_scraper()
+
+
+def run_winterfell_scribe(args):
+    import winterfell_scribe
+    winterfell_scribe.main()
+
+
+def run_encryptor(args):
+    import comradicaloculiwersetyouts as encryptor
+    encryptor.LiveDataEncryptor(encryptor.generate_run_code()).run_encryption_cycle()
+
+
+ENTRY_POINTS = {
+    "football_scraper": run_football_scraper_main,
+    "conradiculosback": run_conradiculosback_main,
+    "LUCILAND": run_luciland,
+    "winterfell_scribe": run_winterfell_scribe,
+    "encryptor": run_encryptor,
+}
+
+
+# --- Transport adapters mounted on the shared HttpClient session ---
+
+class ReplayAdapter(HTTPAdapter):
+    """Sends https://host/path?query to <server>/https/host/path?query instead."""
+
+    def __init__(self, server_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.server_url = server_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.server_url}/{parts.scheme}/{quote(parts.netloc)}{parts.path or '/'}"
+        if parts.query:
+            request.url += f"?{parts.query}"
+        return super().send(request, **kwargs)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Passes requests through to the live upstream and stores each final
+    response as a fixture. GETs are keyed by url, other methods (the link
+    prober's HEADs) by "METHOD url".
+    """
+
+    def __init__(self, fixtures_dir: str, recorded: dict, **kwargs):
+        super().__init__(**kwargs)
+        self.fixtures_dir = fixtures_dir
+        self.recorded = recorded
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 304:
+            return response  # Only full bodies are worth replaying
+        key = request.url if request.method == "GET" else f"{request.method} {request.url}"
+        body = response.content if request.method == "GET" else b""
+        name = fixture_name(key)
+        with open(os.path.join(self.fixtures_dir, name), "wb") as f:
+            f.write(body)
+        headers = {name: response.headers[name] for name in RECORDED_HEADERS if name in response.headers}
+        self.recorded[key] = {"status": response.status_code, "headers": headers, "file": name}
+        return response
+
+
+def install_adapters(adapter_factory):
+    """
+    Mount adapters made by adapter_factory on the shared client's session,
+    keeping its retry policy and pool size, and on every LinkProber session
+    (without retries, as the prober has them).
+    """
+    import link_prober
+    from http_client import POOL_MAXSIZE, get_client
+    client = get_client()
+    retries = client.session.get_adapter("https://").max_retries
+    adapter = adapter_factory(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE, max_retries=retries)
+    client.session.mount("http://", adapter)
+    client.session.mount("https://", adapter)
+
+    prober_init = link_prober.LinkProber.__init__
+
+    def init(prober, *args, **kwargs):
+        prober_init(prober, *args, **kwargs)
+        probe_adapter = adapter_factory(pool_connections=prober.concurrency, pool_maxsize=prober.per_host, max_retries=0)
+        prober.session.mount("http://", probe_adapter)
+        prober.session.mount("https://", probe_adapter)
+
+    link_prober.LinkProber.__init__ = init
+    return client
+
+
+def child_main(args):
+    """Runs one script in the current directory and writes its measurements to args.report."""
+    recorded = {}
+    if args.mode == "record":
+        os.makedirs(args.fixtures, exist_ok=True)
+        client = install_adapters(lambda **kw: RecordingAdapter(args.fixtures, recorded, **kw))
+    else:
+        client = install_adapters(lambda **kw: ReplayAdapter(args.server, **kw))
+
+    error = None
+    started = time.perf_counter()
+    try:
+        ENTRY_POINTS[args.script](args)
+    except Exception as e:  # Reported, so one broken script does not hide the others' numbers
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - started
+
+    if args.mode == "record":
+        index = load_index(args.fixtures)
+        index.update(recorded)
+        with open(os.path.join(args.fixtures, INDEX_FILE), "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+
+    # ru_maxrss is in KiB on Linux; the encryptor's worker processes count as children
+    peak_kib = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    report = {"wall": wall, "client_requests": client.request_count, "recorded": len(recorded),
+              "not_modified": client.not_modified_count, "cache_hits": client.cache_hit_count,
+              "peak_rss_mib": peak_kib / 1024, "error": error}
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+
+
+# --- Stand-in upstream server ---
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fixtures_dir: str, latency: float = 0.0, jitter: float = 0.0,
+                 failure_rate: float = 0.0, failure_status: int = 503, seed: int = 0):
+        super().__init__(("127.0.0.1", 0), ReplayHandler)
+        self.fixtures_dir = fixtures_dir
+        self.index = load_index(fixtures_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset_counts()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def reset_counts(self):
+        with self.lock:
+            self.counts = {"served": 0, "not_modified": 0, "probes": 0, "failed": 0, "missing": 0}
+            self.missing_urls = set()
+
+    def count(self, key: str, url: str = None):
+        with self.lock:
+            self.counts[key] += 1
+            if key == "missing":
+                self.missing_urls.add(url)
+
+    def draw(self):
+        """(delay seconds, inject a failure?) for one request."""
+        with self.lock:
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+            return delay, self.random.random() < self.failure_rate
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _upstream_url(self) -> str:
+        scheme, _, rest = self.path.lstrip("/").partition("/")
+        host, slash, path = rest.partition("/")
+        return f"{scheme}://{unquote(host)}{slash}{path}"
+
+    def _delay_or_fail(self) -> bool:
+        """Apply the injected latency; True if this request was answered with an injected failure."""
+        server = self.server
+        delay, fail = server.draw()
+        if delay:
+            time.sleep(delay)
+        if not fail:
+            return False
+        server.count("failed")
+        if server.failure_status == 0:
+            self.close_connection = True  # Drop the connection without answering
+        else:
+            self._respond(server.failure_status, {}, b"injected failure")
+        return True
+
+    def do_HEAD(self):
+        """Link probes: the recorded HEAD answer, else that of a recorded GET, else 404 (a dead link)."""
+        server = self.server
+        url = self._upstream_url()
+        if self._delay_or_fail():
+            return
+        server.count("probes")
+        fixture = server.index.get(f"HEAD {url}") or server.index.get(url)
+        if fixture is None:
+            self._respond(404, {}, b"", head=True)
+        else:
+            self._respond(fixture.get("status", 200), fixture.get("headers", {}), b"", head=True)
+
+    def do_GET(self):
+        server = self.server
+        url = self._upstream_url()
+        if self._delay_or_fail():
+            return
+
+        fixture = server.index.get(url)
+        if fixture is None:
+            server.count("missing", url)
+            self._respond(404, {}, b"no fixture recorded for this url")
+            return
+
+        headers = fixture.get("headers", {})
+        etag = headers.get("ETag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            server.count("not_modified")
+            self._respond(304, {"ETag": etag}, b"")
+            return
+        with open(os.path.join(server.fixtures_dir, fixture["file"]), "rb") as f:
+            body = f.read()
+        server.count("served")
+        self._respond(fixture.get("status", 200), headers, body)
+
+    def _respond(self, status: int, headers: dict, body: bytes, head: bool = False):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if not head:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and not head:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Request lines would drown the report
+
+
+# --- Parent: scratch directories, subprocesses, report ---
+
+def prepare_workdir(seed_dir: str) -> str:
+    workdir = tempfile.mkdtemp(prefix="replay-")
+    for name in SEED_FILES:
+        path = os.path.join(seed_dir, name)
+        if os.path.exists(path):
+            shutil.copy2(path, workdir)
+    return workdir
+
+
+def run_child(script: str, workdir: str, args, server_url: str = None) -> dict:
+    report_path = os.path.join(workdir, ".replay_report.json")
+    command = [sys.executable, os.path.abspath(__file__), "_child", script,
+               "--mode", args.command, "--fixtures", args.fixtures, "--report", report_path]
+    if server_url:
+        command += ["--server", server_url]
+    if args.all_days:
+        command.append("--all-days")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    if args.no_http_cache:
+        env["HTTP_CACHE_DISABLED"] = "1"
+    completed = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if completed.returncode != 0 or not os.path.exists(report_path):
+        return {"error": (completed.stderr.strip().splitlines() or [f"exit {completed.returncode}"])[-1]}
+    with open(report_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def record(args):
+    os.makedirs(args.fixtures, exist_ok=True)
+    for script in args.scripts:
+        workdir = prepare_workdir(args.seed_dir)
+        try:
+            result = run_child(script, workdir, args)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        status = result.get("error") or "ok"
+        print(f"{script:<20} recorded {result.get('recorded', 0)} responses ({status})")
+    print(f"{len(load_index(args.fixtures))} fixtures in {args.fixtures}")
+
+
+def replay(args):
+    server = ReplayServer(args.fixtures, latency=args.latency / 1000, jitter=args.jitter / 1000,
+                          failure_rate=args.failure_rate, failure_status=args.failure_status, seed=args.seed)
+    if not server.index:
+        sys.exit(f"No fixtures in {args.fixtures}; run '{os.path.basename(__file__)} record' first.")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"{len(server.index)} fixtures, latency {args.latency:g}+{args.jitter:g} ms, "
+          f"failure rate {args.failure_rate:g} (status {args.failure_status or 'drop'})")
+    header = (f"{'script':<20} {'run':>3} {'wall s':>8} {'client':>7} {'served':>7} {'304':>5} {'probes':>7} "
+              f"{'failed':>7} {'miss':>5} {'peak MiB':>9}  error")
+    print(header)
+    print("-" * len(header))
+    try:
+        for script in args.scripts:
+            # Repeats share one scratch directory, so runs after the first see warm on-disk caches
+            workdir = prepare_workdir(args.seed_dir)
+            try:
+                for run in range(1, args.repeat + 1):
+                    server.reset_counts()
+                    result = run_child(script, workdir, args, server.url)
+                    counts = server.counts
+                    print(f"{script:<20} {run:>3} {result.get('wall', 0):>8.2f} {result.get('client_requests', 0):>7} "
+                          f"{counts['served']:>7} {counts['not_modified']:>5} {counts['probes']:>7} {counts['failed']:>7} "
+                          f"{counts['missing']:>5} {result.get('peak_rss_mib', 0):>9.1f}  {result.get('error') or ''}")
+                    for url in sorted(server.missing_urls)[:args.show_missing]:
+                        print(f"{'':<24} missing fixture: {url}")
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "_child":
+        parser = argparse.ArgumentParser()
+        parser.add_argument("_child")
+        parser.add_argument("script", choices=SCRIPTS)
+        parser.add_argument("--mode", choices=["record", "run"], required=True)
+        parser.add_argument("--fixtures", required=True)
+        parser.add_argument("--report", required=True)
+        parser.add_argument("--server")
+        parser.add_argument("--all-days", action="store_true")
+        child_main(parser.parse_args())
+        return
+
+    parser = argparse.ArgumentParser(description="Record upstream fixtures or replay them against every script")
+    parser.add_argument("command", choices=["record", "run"])
+    parser.add_argument("--scripts", nargs="+", choices=SCRIPTS, default=SCRIPTS)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Fixture directory")
+    parser.add_argument("--seed-dir", default=REPO_ROOT, help="Directory holding the published feeds each run starts from")
+    parser.add_argument("--all-days", action="store_true", help="Run the sportsonline scrapers with --all-days")
+    parser.add_argument("--no-http-cache", action="store_true", help="Disable the on-disk response cache")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency per request, up to this many ms")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--failure-status", type=int, default=503, help="Status of injected failures; 0 drops the connection")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for jitter and failures")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per script in the same scratch directory")
+    parser.add_argument("--show-missing", type=int, default=5, help="Missing fixture urls listed per run")
+    args = parser.parse_args()
+    args.fixtures = os.path.abspath(args.fixtures)
+
+    if args.command == "record":
+        record(args)
+    else:
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-import requests
 import json
+import argparse
+import atexit
 import base64
 import hashlib
 import secrets
@@ -8,11 +9,17 @@ import struct
 import time
 import logging
 import os
-import re
 import uuid
 import glob
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+from feed_artifacts import publish_artifacts
+from feed_format import decode_feed
+from http_client import get_client
+from log_retention import truncate_log_before
 
 # --- CONFIGURATION ---
 # URL to your remote config.json file (e.g., a raw GitHub Gist URL).
@@ -23,6 +30,28 @@ CONFIG_URL = "https://gist.githubusercontent.com/drnewske/6070fc714b3e86e493e3d9
 LOG_FILE = "encryptor_service.log"
 LOG_CLEANUP_HOURS = 72  # Clean up log entries older than 3 days
 
+# Derived-key cache configuration
+KEY_CACHE_FILE = ".encryptor_key_cache.json"  # Holds derived keys: never commit it or put it in a shared (e.g. Actions) cache
+KEY_CACHE_PURPOSES = ("layer1", "layer2", "hmac")
+
+# Delta publishing configuration
+DELTA_DIR = "delta"                         # Snapshot, patch and manifest files for delta-aware clients
+DELTA_MANIFEST_FILE = "manifest.json"
+DELTA_FORMAT_VERSION = 2                    # 2: patches carry the key order of the full data
+# Per-record hashes of the last publish. Not needed by clients, so it lives
+# outside DELTA_DIR and is never committed (the workflow keeps it in its cache)
+DELTA_STATE_FILE = ".encryptor_delta_state.json"
+DELTA_MAX_PATCHES = 12                      # Publish a fresh full snapshot after this many patches...
+DELTA_SNAPSHOT_HOURS = 24                   # ...or once the current snapshot is this old...
+DELTA_MAX_PATCH_RATIO = 0.5                 # ...or when a patch would exceed this fraction of a snapshot
+
+# Streaming encryption configuration
+STREAM_CHUNK_SIZE = 1024 * 1024  # Plaintext bytes encrypted and written per chunk
+
+# Keystream configuration
+KEYSTREAM_PARALLEL_THRESHOLD = 256 * 1024  # Payloads above this are split across processes
+KEYSTREAM_WORKERS = os.cpu_count() or 1
+
 # --- LOGGING SETUP ---
 logging.basicConfig(
     level=logging.INFO,
@@ -41,33 +70,18 @@ def generate_run_code() -> str:
     return f"ENCRYPT-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{str(uuid.uuid4())[:8].upper()}"
 
 def cleanup_old_logs(run_code: str):
-    """Clean up old log entries from the log file."""
+    """Drop log entries older than LOG_CLEANUP_HOURS from the head of the log file."""
     logger.info(f"[{run_code}] Starting cleanup of old log entries...")
     if not os.path.exists(LOG_FILE):
         logger.info(f"[{run_code}] No log file found at '{LOG_FILE}', skipping cleanup.")
         return
 
     cutoff_time = datetime.now() - timedelta(hours=LOG_CLEANUP_HOURS)
-    valid_lines = []
-    removed_count = 0
 
     try:
-        with open(LOG_FILE, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        for line in lines:
-            timestamp_match = re.match(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', line)
-            if timestamp_match:
-                log_datetime = datetime.strptime(timestamp_match.group(1), '%Y-%m-%d %H:%M:%S')
-                if log_datetime < cutoff_time:
-                    removed_count += 1
-                    continue
-            valid_lines.append(line)
-
-        if removed_count > 0:
-            with open(LOG_FILE, 'w', encoding='utf-8') as f:
-                f.writelines(valid_lines)
-            logger.info(f"[{run_code}] Log cleanup complete. Removed {removed_count} old log entries.")
+        removed_bytes = truncate_log_before(LOG_FILE, cutoff_time)
+        if removed_bytes > 0:
+            logger.info(f"[{run_code}] Log cleanup complete. Removed {removed_bytes} bytes of old log entries.")
         else:
             logger.info(f"[{run_code}] No old log entries to remove.")
 
@@ -98,12 +112,172 @@ def cleanup_old_log_files(run_code: str):
     else:
         logger.info(f"[{run_code}] No old rotated log files to remove.")
 
+# --- KEYSTREAM ENGINE ---
+
+def _combined_keystream_range(args: Tuple[List[bytes], int, int]) -> bytes:
+    """
+    XOR of the keystreams of several keys over positions [start, stop).
+    Byte i of one key's keystream is SHA-256(key_hash || uint32_le(i))[0];
+    each key_hash prefix is absorbed once and its state copied per position.
+    """
+    key_hashes, start, stop = args
+    prefixes = [hashlib.sha256(key_hash).copy for key_hash in key_hashes]
+    out = bytearray(stop - start)
+    for i in range(start, stop):
+        counter = i.to_bytes(4, 'little')
+        byte = 0
+        for copy in prefixes:
+            h = copy()
+            h.update(counter)
+            byte ^= h.digest()[0]
+        out[i - start] = byte
+    return bytes(out)
+
+_keystream_pool: Optional[ProcessPoolExecutor] = None
+_keystream_pool_lock = threading.Lock()
+
+def _get_keystream_pool() -> ProcessPoolExecutor:
+    """The process-wide keystream worker pool, started on first use and shut down at exit."""
+    global _keystream_pool
+    with _keystream_pool_lock:
+        if _keystream_pool is None:
+            _keystream_pool = ProcessPoolExecutor(max_workers=KEYSTREAM_WORKERS)
+            atexit.register(shutdown_keystream_pool)
+        return _keystream_pool
+
+def shutdown_keystream_pool():
+    global _keystream_pool
+    with _keystream_pool_lock:
+        pool, _keystream_pool = _keystream_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+class Keystream:
+    """
+    Combined keystream of one or more stream_encrypt layers under a fixed IV.
+    The key hashes are computed once, so a payload encrypted chunk by chunk
+    reuses them (and the shared worker pool) for every range.
+    """
+
+    def __init__(self, keys: List[bytes], iv: bytes):
+        self.key_hashes = [hashlib.sha256(key + iv).digest() for key in keys]
+
+    def bytes_at(self, start: int, length: int) -> bytes:
+        """Keystream bytes for positions [start, start + length). Large ranges are split across worker processes."""
+        stop = start + length
+        workers = min(KEYSTREAM_WORKERS, max(1, length // KEYSTREAM_PARALLEL_THRESHOLD))
+        if workers < 2:
+            return _combined_keystream_range((self.key_hashes, start, stop))
+
+        step = -(-length // workers)
+        ranges = [(self.key_hashes, pos, min(pos + step, stop)) for pos in range(start, stop, step)]
+        return b''.join(_get_keystream_pool().map(_combined_keystream_range, ranges))
+
+def generate_keystream(keys: List[bytes], iv: bytes, length: int, start: int = 0) -> bytes:
+    """
+    Generates the combined keystream of one or more stream_encrypt layers for
+    positions [start, start + length). Large ranges are split across the
+    worker processes of one long-lived pool, so repeated calls do not pay
+    process startup again.
+    """
+    return Keystream(keys, iv).bytes_at(start, length)
+
+def xor_bytes(data: bytes, keystream: bytes) -> bytes:
+    """XORs two equal-length buffers as whole integers rather than byte by byte."""
+    if not data:
+        return b''
+    mixed = int.from_bytes(data, 'little') ^ int.from_bytes(keystream, 'little')
+    return mixed.to_bytes(len(data), 'little')
+
+# --- DERIVED-KEY CACHE ---
+
+# Warm keys for repeated cycles in one process, keyed by config fingerprint.
+_WARM_KEY_CACHE: Dict[str, Dict[str, bytes]] = {}
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """Fingerprint of every config value that feeds generate_deterministic_key."""
+    material = json.dumps(
+        [config['app_salt'], config['app_identifier'], config['version'], config['key_iterations']],
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+def load_key_cache(fingerprint: str, cache_file: str = KEY_CACHE_FILE) -> Dict[str, bytes]:
+    """Loads cached keys for this fingerprint; a different fingerprint means a stale cache."""
+    if not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") != fingerprint:
+            logger.info("Derived-key cache belongs to a different config; ignoring it.")
+            return {}
+        return {purpose: bytes.fromhex(key) for purpose, key in cached.get("keys", {}).items()}
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Could not read derived-key cache '{cache_file}': {e}")
+        return {}
+
+def save_key_cache(fingerprint: str, keys: Dict[str, bytes], cache_file: str = KEY_CACHE_FILE):
+    """Atomically writes the key cache, readable and writable by the owner only."""
+    tmp_file = f"{cache_file}.tmp"
+    try:
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({"fingerprint": fingerprint, "keys": {p: k.hex() for p, k in keys.items()}}, f)
+        os.chmod(tmp_file, 0o600)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not write derived-key cache '{cache_file}': {e}")
+
+# --- DELTA PUBLISHING ---
+
+def delta_record_key(record: Dict[str, Any]) -> str:
+    """
+    Key a record is tracked by in delta patches: its match_id, or for sources
+    without one, "source_name|team1|team2|date". Clients must use the same rule.
+    """
+    if record.get("match_id"):
+        return str(record["match_id"])
+    team1 = (record.get("team1") or {}).get("name", "")
+    team2 = (record.get("team2") or {}).get("name", "")
+    return f"{record.get('source_name', '')}|{team1}|{team2}|{record.get('date', '')}"
+
+def content_hash(data: Any) -> str:
+    """Cheap hash of the compact JSON form of data; list order matters, dict key order does not."""
+    return hashlib.sha256(json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8')).hexdigest()
+
+def load_delta_json(path: str) -> Dict[str, Any]:
+    """Loads the delta manifest or state file at path, or an empty dict if unusable."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read delta file '{path}': {e}")
+        return {}
+
+def save_delta_json(path: str, data: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
 # --- CORE ENCRYPTOR CLASS ---
 
 class LiveDataEncryptor:
-    def __init__(self, run_code: str):
-        """Initializes the encryptor."""
+    def __init__(self, run_code: str, key_cache_file: Optional[str] = KEY_CACHE_FILE,
+                 streaming: bool = False, chunk_size: int = STREAM_CHUNK_SIZE, delta: bool = False):
+        """
+        Initializes the encryptor. Pass key_cache_file=None to disable the on-disk
+        key cache, streaming=True to encrypt straight to the output file in chunks,
+        and delta=True to also publish snapshot/patch files (see publish_delta).
+        """
         self.run_code = run_code
+        self.key_cache_file = key_cache_file
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.delta = delta
         self.config: Optional[Dict[str, Any]] = None
         # Generate the long, nonsensical output filename
         self.output_file = "67d18f5b263505d3be8283897bb383f149a39dd35bf9563d43.json"
@@ -113,9 +287,7 @@ class LiveDataEncryptor:
         """Fetches and validates the remote configuration file."""
         logger.info(f"[{self.run_code}] Fetching remote configuration from {CONFIG_URL}...")
         try:
-            response = requests.get(CONFIG_URL, timeout=15)
-            response.raise_for_status()
-            config_data = response.json()
+            config_data = get_client().get_json(CONFIG_URL, timeout=15)
 
             required_keys = ["app_salt", "app_identifier", "version", "live_data_url", "key_iterations"]
             for key in required_keys:
@@ -138,10 +310,9 @@ class LiveDataEncryptor:
         live_data_url = self.config['live_data_url']
         logger.info(f"[{self.run_code}] Fetching live data from {live_data_url}...")
         try:
-            response = requests.get(live_data_url, timeout=20)
-            response.raise_for_status()
+            live_data = decode_feed(get_client().get_json(live_data_url, timeout=20))
             logger.info(f"[{self.run_code}] ✅ Live data fetched successfully.")
-            return response.json()
+            return live_data
         except Exception as e:
             logger.error(f"[{self.run_code}] ❌ FAILED to fetch live data: {e}", exc_info=True)
             return None
@@ -152,14 +323,44 @@ class LiveDataEncryptor:
         dk = hashlib.pbkdf2_hmac('sha256', combined, salt, self.config['key_iterations'])
         return dk[:32]
 
+    def derive_keys(self) -> Dict[str, bytes]:
+        """
+        Returns the layer1, layer2 and hmac keys for the loaded config.
+        Keys come from the warm in-process cache, then the on-disk cache, and
+        are only derived with PBKDF2 when the config fingerprint is new.
+        """
+        fingerprint = config_fingerprint(self.config)
+        keys = _WARM_KEY_CACHE.get(fingerprint)
+        if keys is not None:
+            return keys
+
+        if self.key_cache_file:
+            keys = load_key_cache(fingerprint, self.key_cache_file)
+            if all(purpose in keys for purpose in KEY_CACHE_PURPOSES):
+                logger.info(f"[{self.run_code}] Loaded derived keys from cache.")
+                _WARM_KEY_CACHE[fingerprint] = keys
+                return keys
+
+        logger.info(f"[{self.run_code}] Deriving keys ({self.config['key_iterations']} PBKDF2 iterations)...")
+        app_salt = self.config['app_salt'].encode('utf-8')
+        master_seed = f"{self.config['app_identifier']}:{self.config['version']}"
+        keys = {purpose: self.generate_deterministic_key(master_seed, app_salt, purpose) for purpose in KEY_CACHE_PURPOSES}
+
+        _WARM_KEY_CACHE[fingerprint] = keys
+        if self.key_cache_file:
+            save_key_cache(fingerprint, keys, self.key_cache_file)
+        return keys
+
     def stream_encrypt(self, data: bytes, key: bytes, iv: bytes) -> bytes:
         """Encrypts data using a stream cipher approach."""
-        result = bytearray()
-        key_hash = hashlib.sha256(key + iv).digest()
-        for i, byte in enumerate(data):
-            pos_key = hashlib.sha256(key_hash + struct.pack('<I', i)).digest()[0]
-            result.append(byte ^ pos_key)
-        return bytes(result)
+        return xor_bytes(data, generate_keystream([key], iv, len(data)))
+
+    def stream_encrypt_layers(self, data: bytes, keys: List[bytes], iv: bytes) -> bytes:
+        """
+        Applies several stream_encrypt layers in a single pass. Equivalent to
+        chaining stream_encrypt once per key, since each layer is a plain XOR.
+        """
+        return xor_bytes(data, generate_keystream(keys, iv, len(data)))
 
     def create_hmac(self, data: bytes, key: bytes) -> bytes:
         """Creates an HMAC-SHA256 tag for authentication."""
@@ -175,19 +376,14 @@ class LiveDataEncryptor:
             if len(json_bytes) > self.max_data_size:
                 raise ValueError(f"Data size ({len(json_bytes)}) exceeds max size ({self.max_data_size})")
 
-            app_salt = self.config['app_salt'].encode('utf-8')
-            master_seed = f"{self.config['app_identifier']}:{self.config['version']}"
-
-            key1 = self.generate_deterministic_key(master_seed, app_salt, "layer1")
-            key2 = self.generate_deterministic_key(master_seed, app_salt, "layer2")
-            hmac_key = self.generate_deterministic_key(master_seed, app_salt, "hmac")
+            keys = self.derive_keys()
+            key1, key2, hmac_key = keys["layer1"], keys["layer2"], keys["hmac"]
 
             iv = secrets.token_bytes(16)
             timestamp = struct.pack('<Q', int(time.time()))
             data_with_timestamp = timestamp + json_bytes
 
-            encrypted_layer1 = self.stream_encrypt(data_with_timestamp, key1, iv)
-            encrypted_layer2 = self.stream_encrypt(encrypted_layer1, key2, iv)
+            encrypted_layer2 = self.stream_encrypt_layers(data_with_timestamp, [key1, key2], iv)
 
             message_to_auth = iv + encrypted_layer2
             auth_tag = self.create_hmac(message_to_auth, hmac_key)
@@ -206,11 +402,96 @@ class LiveDataEncryptor:
             logger.error(f"[{self.run_code}] ❌ FAILED during encryption: {e}", exc_info=True)
             return None
 
-    def save_encrypted_data(self, encrypted_result: Dict[str, Any]) -> bool:
-        """Saves the final encrypted blob to its unique file."""
-        logger.info(f"[{self.run_code}] Saving encrypted data to '{self.output_file}'...")
+    def _iter_plaintext_chunks(self, data: Dict[Any, Any], timestamp: bytes):
+        """Yields the timestamp-prefixed compact JSON as UTF-8 chunks of about chunk_size bytes."""
+        pending = [timestamp]
+        pending_size = len(timestamp)
+        encoder = json.JSONEncoder(separators=(',', ':'))
+        for fragment in encoder.iterencode(data):
+            encoded = fragment.encode('utf-8')
+            pending.append(encoded)
+            pending_size += len(encoded)
+            if pending_size >= self.chunk_size:
+                yield b''.join(pending)
+                pending, pending_size = [], 0
+        if pending_size:
+            yield b''.join(pending)
+
+    def encrypt_payload_to_file(self, data: Dict[Any, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Streaming counterpart of encrypt_payload + save_encrypted_data.
+        Serializes, encrypts, authenticates and base64-encodes one chunk at a time
+        straight into the output file, so peak memory is O(chunk_size) rather than
+        O(payload). The envelope written is identical in format to save_encrypted_data.
+        """
+        logger.info(f"[{self.run_code}] Starting streaming encryption to '{self.output_file}'...")
+        tmp_file = f"{self.output_file}.tmp"
+        try:
+            keys = self.derive_keys()
+            cipher_keys = [keys["layer1"], keys["layer2"]]
+
+            iv = secrets.token_bytes(16)
+            keystream = Keystream(cipher_keys, iv)  # One generator for every chunk
+            timestamp = struct.pack('<Q', int(time.time()))
+            mac = hmac.new(keys["hmac"], iv, hashlib.sha256)
+
+            position = 0
+            data_size = 0
+            carry = iv  # Bytes waiting for a multiple of 3 before base64 encoding
+
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write('{\n  "encrypted_data": "')
+                for chunk in self._iter_plaintext_chunks(data, timestamp):
+                    data_size += len(chunk) - (len(timestamp) if position == 0 else 0)
+                    if data_size > self.max_data_size:
+                        raise ValueError(f"Data size exceeds max size ({self.max_data_size})")
+
+                    encrypted = xor_bytes(chunk, keystream.bytes_at(position, len(chunk)))
+                    position += len(chunk)
+                    mac.update(encrypted)
+
+                    carry += encrypted
+                    whole = len(carry) - len(carry) % 3
+                    f.write(base64.b64encode(carry[:whole]).decode('ascii'))
+                    carry = carry[whole:]
+
+                f.write(base64.b64encode(carry + mac.digest()).decode('ascii'))
+                result = {
+                    "timestamp": int(time.time()),
+                    "status": "success",
+                    "data_size": data_size,
+                }
+                f.write('",\n' + json.dumps(result, indent=2)[2:])
+
+            os.replace(tmp_file, self.output_file)
+            logger.info(f"[{self.run_code}] ✅ Streaming encryption successful.")
+            return result
+        except Exception as e:
+            logger.error(f"[{self.run_code}] ❌ FAILED during streaming encryption: {e}", exc_info=True)
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return None
+
+    def decrypt_payload(self, encrypted_string: str) -> Dict[Any, Any]:
+        """Reverses encrypt_payload; raises ValueError if the HMAC does not match."""
+        final_payload = base64.b64decode(encrypted_string)
+        iv, encrypted_layer2, auth_tag = final_payload[:16], final_payload[16:-32], final_payload[-32:]
+
+        keys = self.derive_keys()
+        key1, key2, hmac_key = keys["layer1"], keys["layer2"], keys["hmac"]
+
+        if not hmac.compare_digest(self.create_hmac(iv + encrypted_layer2, hmac_key), auth_tag):
+            raise ValueError("HMAC verification failed")
+
+        data_with_timestamp = self.stream_encrypt_layers(encrypted_layer2, [key2, key1], iv)
+        return json.loads(data_with_timestamp[8:].decode('utf-8'))
+
+    def save_encrypted_data(self, encrypted_result: Dict[str, Any], output_file: Optional[str] = None) -> bool:
+        """Saves the final encrypted blob to its unique file (or to output_file)."""
+        output_file = output_file or self.output_file
+        logger.info(f"[{self.run_code}] Saving encrypted data to '{output_file}'...")
         try:
-            with open(self.output_file, 'w', encoding='utf-8') as f:
+            with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(encrypted_result, f, indent=2)
             logger.info(f"[{self.run_code}] ✅ Data saved successfully.")
             return True
@@ -218,23 +499,138 @@ class LiveDataEncryptor:
             logger.error(f"[{self.run_code}] ❌ FAILED to save encrypted data: {e}", exc_info=True)
             return False
 
-    def run_encryption_cycle(self):
-        """Runs the complete cycle: fetch config, fetch data, encrypt, save."""
+    def publish_compressed_blob(self):
+        """
+        Publishes compressed variants of the blob and its manifest next to it.
+        The blob is base64 text, so it still compresses; its hash changes every
+        run (a fresh IV), so the variants are rewritten every run as well.
+        """
+        try:
+            publish_artifacts(self.output_file)
+        except OSError as e:
+            logger.warning(f"[{self.run_code}] Could not publish compressed variants of '{self.output_file}': {e}")
+
+    def publish_delta(self, live_data: Any) -> bool:
+        """
+        Publishes live_data for delta-aware clients under DELTA_DIR:
+        - base-<seq>.json: encrypted full snapshot, same plaintext as the main blob
+        - patch-<seq>-<n>.json: encrypted {"upsert": [records], "remove": [keys],
+          "order": [keys]} against the previous publish, keyed by
+          delta_record_key; "order" lists every key in the order of the full
+          data, so clients rebuild the list exactly as the snapshot has it
+        - manifest.json: the base and ordered patches a client should apply
+        Data that patches cannot describe (not a list of records, or two
+        records sharing a key) is always published as a full snapshot.
+        Returns False (and publishes nothing) when the content hash is unchanged,
+        so the caller can skip the full blob as well.
+        """
+        os.makedirs(DELTA_DIR, exist_ok=True)
+        manifest_path = os.path.join(DELTA_DIR, DELTA_MANIFEST_FILE)
+        manifest = load_delta_json(manifest_path)
+        state = load_delta_json(DELTA_STATE_FILE)
+
+        new_hash = content_hash(live_data)
+        if manifest.get("content_hash") == new_hash and state.get("content_hash") == new_hash:
+            logger.info(f"[{self.run_code}] Live data unchanged since last publish; skipping.")
+            return False
+
+        records = live_data if isinstance(live_data, list) else []
+        order = [delta_record_key(r) for r in records if isinstance(r, dict)]
+        record_hashes = {delta_record_key(r): content_hash(r)[:16] for r in records if isinstance(r, dict)}
+        previous_hashes = state.get("records", {})
+        # Keys must identify every record once, or a patch would lose records
+        keyed = len(order) == len(records) and len(record_hashes) == len(order)
+
+        upserts = [r for r in records if isinstance(r, dict)
+                   and previous_hashes.get(delta_record_key(r)) != record_hashes[delta_record_key(r)]]
+        removes = [key for key in previous_hashes if key not in record_hashes]
+        patch = {"upsert": upserts, "remove": removes, "order": order}
+
+        now = int(time.time())
+        base = manifest.get("base")
+        patches = manifest.get("patches", [])
+        full_size = len(json.dumps(live_data, separators=(',', ':')))
+        patch_size = len(json.dumps(patch, separators=(',', ':')))
+
+        needs_snapshot = (
+            # A missing state, or one restored from an older run than the manifest, cannot diff
+            not base or state.get("content_hash") != manifest.get("content_hash")
+            or manifest.get("version") != DELTA_FORMAT_VERSION
+            or not isinstance(live_data, list) or not keyed
+            or len(patches) >= DELTA_MAX_PATCHES
+            or now - base.get("timestamp", 0) >= DELTA_SNAPSHOT_HOURS * 3600
+            or patch_size > full_size * DELTA_MAX_PATCH_RATIO
+        )
+
+        if needs_snapshot:
+            seq = (base or {}).get("seq", 0) + 1
+            file_name = f"base-{seq:04d}.json"
+            encrypted = self.encrypt_payload(live_data)
+            if encrypted is None or not self.save_encrypted_data(encrypted, os.path.join(DELTA_DIR, file_name)):
+                return True
+            stale_files = [base["file"]] if base else []
+            stale_files += [patch["file"] for patch in patches]
+            base = {"file": file_name, "seq": seq, "timestamp": now, "records": len(records),
+                    "content_hash": new_hash}
+            patches = []
+            logger.info(f"[{self.run_code}] Published full delta snapshot {file_name}.")
+        else:
+            file_name = f"patch-{base['seq']:04d}-{len(patches) + 1:03d}.json"
+            encrypted = self.encrypt_payload(patch)
+            if encrypted is None or not self.save_encrypted_data(encrypted, os.path.join(DELTA_DIR, file_name)):
+                return True
+            stale_files = []
+            patches.append({"file": file_name, "timestamp": now, "upserts": len(upserts),
+                            "removes": len(removes), "content_hash": new_hash})
+            logger.info(f"[{self.run_code}] Published delta patch {file_name}: "
+                        f"{len(upserts)} upserted, {len(removes)} removed.")
+
+        save_delta_json(manifest_path, {
+            "version": DELTA_FORMAT_VERSION,
+            "key_rule": "match_id, else source_name|team1.name|team2.name|date",
+            "content_hash": new_hash,
+            "updated": now,
+            "base": base,
+            "patches": patches,
+        })
+        save_delta_json(DELTA_STATE_FILE, {"content_hash": new_hash, "records": record_hashes})
+
+        for stale in stale_files:
+            try:
+                os.remove(os.path.join(DELTA_DIR, stale))
+            except OSError:
+                pass
+        return True
+
+    def run_encryption_cycle(self) -> bool:
+        """
+        Runs the complete cycle: fetch config, fetch data, encrypt, save.
+        Returns False if a step failed; unchanged data skipped in delta mode is a success.
+        """
         if not self.fetch_remote_config():
-            return
+            return False
 
         live_data = self.fetch_live_data()
         if live_data is None:
-            return
-
-        encrypted_result = self.encrypt_payload(live_data)
-        if encrypted_result is None:
-            return
+            return False
 
-        self.save_encrypted_data(encrypted_result)
+        if self.delta and not self.publish_delta(live_data):
+            return True
 
-def main():
-    """Main function to run the encryption service."""
+        if self.streaming:
+            saved = self.encrypt_payload_to_file(live_data) is not None
+        else:
+            encrypted_result = self.encrypt_payload(live_data)
+            saved = encrypted_result is not None and self.save_encrypted_data(encrypted_result)
+        if saved:
+            self.publish_compressed_blob()
+        return saved
+
+def run_service(streaming: bool = False, chunk_size: int = STREAM_CHUNK_SIZE, delta: bool = False) -> bool:
+    """
+    One service run: log cleanup, then a full encryption cycle. Errors are
+    logged, not raised; returns False if the cycle failed.
+    """
     run_code = generate_run_code()
     logger.info(f"[{run_code}] 🚀 Starting Encryptor Service Run")
     logger.info("="*60)
@@ -243,14 +639,24 @@ def main():
         cleanup_old_logs(run_code)
         cleanup_old_log_files(run_code)
 
-        encryptor = LiveDataEncryptor(run_code)
-        encryptor.run_encryption_cycle()
+        encryptor = LiveDataEncryptor(run_code, streaming=streaming, chunk_size=chunk_size, delta=delta)
+        return encryptor.run_encryption_cycle()
 
     except Exception as e:
         logger.critical(f"[{run_code}] 💥 A critical error occurred in the main execution: {e}", exc_info=True)
+        return False
     finally:
         logger.info(f"[{run_code}] 🏁 Encryptor Service Run Finished")
         logger.info("="*60 + "\n")
 
+def main():
+    """Main function to run the encryption service."""
+    parser = argparse.ArgumentParser(description='Live data encryptor service')
+    parser.add_argument('--streaming', action='store_true', help='Encrypt straight to the output file in fixed-size chunks')
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE, help='Plaintext bytes per chunk in streaming mode')
+    parser.add_argument('--delta', action='store_true', help='Also publish delta snapshot/patch files and skip unchanged data')
+    args = parser.parse_args()
+    run_service(streaming=args.streaming, chunk_size=args.chunk_size, delta=args.delta)
+
 if __name__ == "__main__":
     main()
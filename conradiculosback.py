@@ -1,24 +1,46 @@
 import requests
-import json
-import re
+import argparse
+import asyncio
 import time
-import random
 import logging
 import os
 import uuid
 import glob
+import threading
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, Iterable, Iterator, List, Dict, Tuple, Optional
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from http_client import get_client
+from kickoff_index import KickoffIndex
+from link_prober import probe_match_links, rank_match_links
+from live_events_store import LiveEventsStore
+from log_retention import truncate_log_before
+from match_merge import merge_matches
+from poll_schedule import within_lookahead
+from sportsonline_parser import current_day, iter_day, load_parsed_week, schedule_dates, time_to_minutes
+from team_logos import get_logo_index
 
 # Configuration
 STREAMED_API_BASE_URL = "https://streamed.su"
 STREAMED_MATCHES_ENDPOINT = "/api/matches/all-today"
 SPORTSONLINE_URL = "https://sportsonline.gl/"
+SPORTSONLINE_HOUR_OFFSET = 1  # Schedule times are UTC+1; moved back to UTC
 DEFAULT_LOGO_URL = "https://cdn.jsdelivr.net/gh/drnewske/tyhdsjax-nfhbqsm/logos/myicon.png"
 REQUEST_TIMEOUT = 10
 LOG_FILE = "scraper.log"
 OUTPUT_FILE = "live_events.json"
+SOURCE_NAMES = ["Schrödingers Roommate", "Toes In The Blender"]  # Rows this scraper owns in the live events store
+
+# Stream lookup pacing (async mode)
+STREAM_CONCURRENCY = 8        # Stream lookups in flight at once
+STREAM_RATE_PER_SECOND = 4.0  # Token bucket refill rate for streamed.su
+STREAM_RATE_BURST = 4         # Token bucket capacity
+
+# Each source gets this long to finish before the run continues without it
+SOURCE_TIMEOUT_SECONDS = 300
 
 # Cleanup configuration
 MATCH_CLEANUP_HOURS = 25  # Remove matches older than 25 hours
@@ -39,81 +61,35 @@ def generate_fetch_code() -> str:
     """Generate a unique fetch code for this run"""
     return f"FETCH-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{str(uuid.uuid4())[:8].upper()}"
 
-def cleanup_old_matches(matches: List[dict], fetch_code: str) -> List[dict]:
+def cleanup_old_matches(index: KickoffIndex, fetch_code: str) -> List[dict]:
     """Remove matches older than MATCH_CLEANUP_HOURS"""
     logger.info(f"[{fetch_code}] Cleaning up old matches...")
     
-    cutoff_time = datetime.now() - timedelta(hours=MATCH_CLEANUP_HOURS)
-    valid_matches = []
-    removed_count = 0
+    cutoff_epoch = int(time.time()) - MATCH_CLEANUP_HOURS * 3600
+    expired = index.expire_before(cutoff_epoch)
     
-    for match in matches:
-        try:
-            match_date = match.get("date", "")
-            match_time = match.get("time", "")
-            
-            if not match_date or not match_time or match_date == "Not Found" or match_time == "Not Found":
-                valid_matches.append(match)
-                continue
-            
-            day, month, year = map(int, match_date.split('-'))
-            hour, minute = map(int, match_time.split(':'))
-            match_datetime = datetime(year, month, day, hour, minute)
-            
-            if match_datetime < cutoff_time:
-                removed_count += 1
-                team1_name = match.get("team1", {}).get("name", "Unknown")
-                team2_name = match.get("team2", {}).get("name", "Unknown")
-                logger.info(f"[{fetch_code}] Removed old match: {team1_name} vs {team2_name} ({match_date} {match_time})")
-            else:
-                valid_matches.append(match)
-                
-        except (ValueError, KeyError, AttributeError) as e:
-            logger.warning(f"[{fetch_code}] Could not parse match date/time, keeping match: {e}")
-            valid_matches.append(match)
+    for _, match in expired:
+        team1_name = match.get("team1", {}).get("name", "Unknown")
+        team2_name = match.get("team2", {}).get("name", "Unknown")
+        logger.info(f"[{fetch_code}] Removed old match: {team1_name} vs {team2_name} ({match.get('date')} {match.get('time')})")
     
-    if removed_count > 0:
-        logger.info(f"[{fetch_code}] Cleanup complete: Removed {removed_count} old matches, {len(valid_matches)} matches remaining")
+    valid_matches = index.records()
+    if expired:
+        logger.info(f"[{fetch_code}] Cleanup complete: Removed {len(expired)} old matches, {len(valid_matches)} matches remaining")
     else:
         logger.info(f"[{fetch_code}] No old matches to remove")
     
     return valid_matches
 
 def cleanup_old_logs(fetch_code: str):
-    """Clean up old log entries from the log file"""
+    """Drop log entries older than LOG_CLEANUP_HOURS from the head of the log file"""
     logger.info(f"[{fetch_code}] Cleaning up old log entries...")
     
-    if not os.path.exists(LOG_FILE):
-        return
-    
     try:
         cutoff_time = datetime.now() - timedelta(hours=LOG_CLEANUP_HOURS)
-        valid_lines = []
-        removed_count = 0
-        
-        with open(LOG_FILE, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        for line in lines:
-            try:
-                timestamp_match = re.match(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+', line)
-                if timestamp_match:
-                    timestamp_str = timestamp_match.group(1)
-                    log_datetime = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                    
-                    if log_datetime >= cutoff_time:
-                        valid_lines.append(line)
-                    else:
-                        removed_count += 1
-                else:
-                    valid_lines.append(line)
-            except (ValueError, AttributeError):
-                valid_lines.append(line)
-        
-        if removed_count > 0:
-            with open(LOG_FILE, 'w', encoding='utf-8') as f:
-                f.writelines(valid_lines)
-            logger.info(f"[{fetch_code}] Log cleanup complete: Removed {removed_count} old log entries")
+        removed_bytes = truncate_log_before(LOG_FILE, cutoff_time)
+        if removed_bytes > 0:
+            logger.info(f"[{fetch_code}] Log cleanup complete: Removed {removed_bytes} bytes of old log entries")
             
     except Exception as e:
         logger.error(f"[{fetch_code}] Error during log cleanup: {e}")
@@ -144,9 +120,12 @@ def cleanup_old_log_files(fetch_code: str):
 def fetch_data(url: str, headers: dict = None) -> Optional[dict]:
     """Fetches data from a given URL."""
     try:
-        response = requests.get(url, timeout=REQUEST_TIMEOUT, headers=headers)
+        client = get_client()
+        response = client.get(url, timeout=REQUEST_TIMEOUT, headers=headers)
         response.raise_for_status()
-        return response.json() if 'json' in response.headers.get('content-type', '') else response.text
+        if 'json' in response.headers.get('content-type', ''):
+            return client.parse_json(url, response)
+        return response.text
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching data from {url}: {e}")
         return None
@@ -170,8 +149,134 @@ def get_match_date_from_timestamp(timestamp_ms: int) -> Tuple[str, str]:
         logger.error(f"Error processing timestamp {timestamp_ms}: {e}")
         return "Not Found", "Not Found"
 
-def fetch_streamed_matches(fetch_code: str) -> List[dict]:
-    """Fetch matches from streamed.su API with improved speed and precision."""
+def prefilter_streamed_match(match: dict, today_date_str: str, fetch_code: str) -> Optional[dict]:
+    """
+    Runs the cheap sport/date/team filters on one streamed.su match.
+    Returns the fields needed to build the output record, or None if filtered out.
+    """
+    # ===== Filter 1: By Sport (Fast) =====
+    if match.get("category") != "football":
+        return None
+
+    title = match.get("title", "Title Not Found")
+
+    # ===== Filter 2: By Date (Fast) =====
+    match_timestamp_ms = match.get("date")
+    if not (match_timestamp_ms and isinstance(match_timestamp_ms, (int, float)) and match_timestamp_ms > 0):
+        return None
+    
+    formatted_time, formatted_date = get_match_date_from_timestamp(match_timestamp_ms)
+    
+    if formatted_date != today_date_str:
+        logger.info(f"[{fetch_code}] Skipping match not for today ({formatted_date}): {title}")
+        return None
+    
+    # ===== Filter 3: By Team Data (Fast) =====
+    team1 = {"name": "Not Found", "logo_url": DEFAULT_LOGO_URL}
+    team2 = {"name": "Not Found", "logo_url": DEFAULT_LOGO_URL}
+    teams_data = match.get("teams")
+    logos = get_logo_index()
+    if teams_data:
+        if teams_data.get("home"):
+            home_name = teams_data['home'].get('name', '').strip()
+            if home_name:
+                team1['name'] = home_name
+                badge = teams_data['home'].get('badge')
+                if badge:
+                    team1['logo_url'] = f"{STREAMED_API_BASE_URL}/api/images/badge/{badge}.webp"
+                    logos.learn(home_name, team1['logo_url'])
+                else:
+                    team1['logo_url'] = logos.logo_for(home_name, DEFAULT_LOGO_URL)
+        if teams_data.get("away"):
+            away_name = teams_data['away'].get('name', '').strip()
+            if away_name:
+                team2['name'] = away_name
+                badge = teams_data['away'].get('badge')
+                if badge:
+                    team2['logo_url'] = f"{STREAMED_API_BASE_URL}/api/images/badge/{badge}.webp"
+                    logos.learn(away_name, team2['logo_url'])
+                else:
+                    team2['logo_url'] = logos.logo_for(away_name, DEFAULT_LOGO_URL)
+    
+    if not is_valid_team_data(team1['name'], team2['name']):
+        logger.warning(f"[{fetch_code}] Skipping match with invalid team data: {title}")
+        return None
+
+    sources = match.get("sources", [])
+    if not sources:
+        logger.warning(f"[{fetch_code}] Skipping match with no listed sources: {title}")
+        return None
+
+    stream_urls = []
+    for source in sources:
+        source_name = source.get("source")
+        source_id = source.get("id")
+        if source_name and source_id:
+            stream_urls.append(f"{STREAMED_API_BASE_URL}/api/stream/{source_name}/{source_id}")
+
+    return {
+        "title": title,
+        "team1": team1,
+        "team2": team2,
+        "time": formatted_time,
+        "date": formatted_date,
+        "stream_urls": stream_urls,
+    }
+
+def extract_stream_links(streams_data) -> List[str]:
+    """Valid embed links from one /api/stream/{source}/{id} response."""
+    links = []
+    if streams_data and isinstance(streams_data, list):
+        for stream in streams_data:
+            embed_url = stream.get("embedUrl")
+            if embed_url and "admin" not in embed_url and embed_url.startswith(('http://', 'https://')):
+                links.append(embed_url)
+    return links
+
+def fetch_stream_links_sync(candidates: List[dict]) -> List[List[str]]:
+    """Legacy mode: one stream request at a time with a fixed pause after each."""
+    links_per_match = []
+    for candidate in candidates:
+        all_stream_links = []
+        for stream_url in candidate["stream_urls"]:
+            all_stream_links.extend(extract_stream_links(fetch_data(stream_url)))
+            time.sleep(0.5)
+        links_per_match.append(all_stream_links)
+    return links_per_match
+
+async def fetch_stream_links_async(candidates: List[dict], concurrency: int = STREAM_CONCURRENCY) -> List[List[str]]:
+    """
+    Runs every per-source stream lookup concurrently. Pacing comes from a token
+    bucket on the streamed.su host in the shared HTTP client instead of a fixed
+    sleep; responses served from the response cache do not spend tokens.
+    """
+    client = get_client()
+    client.set_rate_limit(urlparse(STREAMED_API_BASE_URL).hostname, STREAM_RATE_PER_SECOND, STREAM_RATE_BURST)
+
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        lookups = [
+            [loop.run_in_executor(executor, fetch_data, stream_url) for stream_url in candidate["stream_urls"]]
+            for candidate in candidates
+        ]
+        links_per_match = []
+        for match_lookups in lookups:
+            all_stream_links = []
+            for streams_data in await asyncio.gather(*match_lookups):
+                all_stream_links.extend(extract_stream_links(streams_data))
+            links_per_match.append(all_stream_links)
+    return links_per_match
+
+def fetch_streamed_matches(fetch_code: str, sync_mode: bool = False,
+                           stream_lookahead: Optional[float] = None) -> List[dict]:
+    """
+    Fetch matches from streamed.su API with improved speed and precision.
+    All cheap filters run before any stream lookup; the lookups then run
+    concurrently, or serially with a fixed pause when sync_mode is set.
+    With stream_lookahead, only matches kicking off within that many seconds
+    are kept and later ones wait for a later run (the daemon sets it); None
+    keeps every match of the day.
+    """
     logger.info(f"[{fetch_code}] Fetching matches from streamed.su...")
     matches_url = f"{STREAMED_API_BASE_URL}{STREAMED_MATCHES_ENDPOINT}"
     api_matches = fetch_data(matches_url)
@@ -184,85 +289,45 @@ def fetch_streamed_matches(fetch_code: str) -> List[dict]:
     today_date_str = datetime.now().strftime("%d-%m-%Y")
     logger.info(f"[{fetch_code}] Filtering for today's date: {today_date_str}")
 
+    candidates = []
+    deferred = 0
+    now = time.time()
     for match in api_matches:
-        # ===== Filter 1: By Sport (Fast) =====
-        if match.get("category") != "football":
-            continue
-
-        title = match.get("title", "Title Not Found")
-
-        # ===== Filter 2: By Date (Fast) =====
-        match_timestamp_ms = match.get("date")
-        if not (match_timestamp_ms and isinstance(match_timestamp_ms, (int, float)) and match_timestamp_ms > 0):
-            continue
-        
-        formatted_time, formatted_date = get_match_date_from_timestamp(match_timestamp_ms)
-        
-        if formatted_date != today_date_str:
-            logger.info(f"[{fetch_code}] Skipping match not for today ({formatted_date}): {title}")
-            continue
-        
-        # ===== Filter 3: By Team Data (Fast) =====
-        team1 = {"name": "Not Found", "logo_url": DEFAULT_LOGO_URL}
-        team2 = {"name": "Not Found", "logo_url": DEFAULT_LOGO_URL}
-        teams_data = match.get("teams")
-        if teams_data:
-            if teams_data.get("home"):
-                home_name = teams_data['home'].get('name', '').strip()
-                if home_name:
-                    team1['name'] = home_name
-                    badge = teams_data['home'].get('badge')
-                    if badge:
-                        team1['logo_url'] = f"{STREAMED_API_BASE_URL}/api/images/badge/{badge}.webp"
-            if teams_data.get("away"):
-                away_name = teams_data['away'].get('name', '').strip()
-                if away_name:
-                    team2['name'] = away_name
-                    badge = teams_data['away'].get('badge')
-                    if badge:
-                        team2['logo_url'] = f"{STREAMED_API_BASE_URL}/api/images/badge/{badge}.webp"
-        
-        if not is_valid_team_data(team1['name'], team2['name']):
-            logger.warning(f"[{fetch_code}] Skipping match with invalid team data: {title}")
+        candidate = prefilter_streamed_match(match, today_date_str, fetch_code)
+        if not candidate:
             continue
-
-        # ===== Fetch Streams (Slow - ONLY runs if all previous checks pass) =====
-        all_stream_links = []
-        sources = match.get("sources", [])
-        if not sources:
-            logger.warning(f"[{fetch_code}] Skipping match with no listed sources: {title}")
+        if not within_lookahead(int(match["date"] // 1000), now, stream_lookahead):
+            deferred += 1
             continue
+        candidates.append(candidate)
+    if deferred:
+        logger.info(f"[{fetch_code}] Deferred {deferred} matches kicking off more than "
+                    f"{stream_lookahead / 3600:g}h from now to a later run")
+
+    # ===== Fetch Streams (Slow - ONLY runs for matches that passed every filter) =====
+    lookup_count = sum(len(candidate["stream_urls"]) for candidate in candidates)
+    logger.info(f"[{fetch_code}] Looking up {lookup_count} streams for {len(candidates)} matches "
+                f"({'sync' if sync_mode else 'async'} mode)")
+    if sync_mode:
+        links_per_match = fetch_stream_links_sync(candidates)
+    else:
+        links_per_match = asyncio.run(fetch_stream_links_async(candidates))
 
-        for source in sources:
-            source_name = source.get("source")
-            source_id = source.get("id")
-            if not source_name or not source_id:
-                continue
-
-            stream_url = f"{STREAMED_API_BASE_URL}/api/stream/{source_name}/{source_id}"
-            streams_data = fetch_data(stream_url)
-            
-            if streams_data and isinstance(streams_data, list):
-                for stream in streams_data:
-                    embed_url = stream.get("embedUrl")
-                    if embed_url and "admin" not in embed_url and embed_url.startswith(('http://', 'https://')):
-                        all_stream_links.append(embed_url)
-            time.sleep(0.5)
-
+    for candidate, all_stream_links in zip(candidates, links_per_match):
         # ===== Final Check =====
         if not all_stream_links:
-            logger.warning(f"[{fetch_code}] No valid stream links found after checking all sources for: {title}")
+            logger.warning(f"[{fetch_code}] No valid stream links found after checking all sources for: {candidate['title']}")
             continue
 
         # If we reach here, the match is valid, for today, and has links.
         formatted_match = {
             "source_name": "Schrödingers Roommate",
             "source_icon_url": "https://raw.githubusercontent.com/drnewske/tyhdsjax-nfhbqsm/refs/heads/main/logos/Homer-Simpson.webp",
-            "match_title_from_api": title,
-            "team1": team1,
-            "team2": team2,
-            "time": formatted_time,
-            "date": formatted_date,
+            "match_title_from_api": candidate["title"],
+            "team1": candidate["team1"],
+            "team2": candidate["team2"],
+            "time": candidate["time"],
+            "date": candidate["date"],
             "links": all_stream_links
         }
         output_data.append(formatted_match)
@@ -274,81 +339,21 @@ def fetch_sportsonline_data() -> str:
     """Fetch the raw text data from sportsonline.gl"""
     try:
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
         }
-        response = requests.get(SPORTSONLINE_URL, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        return response.text
+        return get_client().get_text(SPORTSONLINE_URL, encoding='utf-8', headers=headers, timeout=30)
     except Exception as e:
         logger.error(f"Error fetching data from sportsonline.gl: {str(e)}")
         return ""
 
-def get_current_day() -> str:
-    """Get current day of the week in uppercase"""
-    days = ['MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY']
-    return days[datetime.now().weekday()]
+def parse_sportsonline_data(raw_data: str, fetch_code: str) -> Iterator[Tuple[str, str, str]]:
+    """Lazily parse the raw text data into (time, title, url) for the current day only."""
+    return iter_day(raw_data, current_day(), hour_offset=SPORTSONLINE_HOUR_OFFSET)
 
-def subtract_hour_from_time(time_str: str) -> str:
-    """Subtract 1 hour from time string (UTC+1 to UTC conversion)"""
-    try:
-        hour, minute = map(int, time_str.split(':'))
-        dt = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-        dt_adjusted = dt - timedelta(hours=1)
-        return dt_adjusted.strftime("%H:%M")
-    except (ValueError, AttributeError) as e:
-        logger.error(f"Error processing time {time_str}: {e}")
-        return time_str
-
-def time_to_minutes(time_str: str) -> int:
-    """Convert time string to minutes since midnight for sorting"""
-    try:
-        hour, minute = map(int, time_str.split(':'))
-        return hour * 60 + minute
-    except (ValueError, AttributeError):
-        return 0
-
-def parse_sportsonline_data(raw_data: str, fetch_code: str) -> List[Tuple[str, str, str]]:
-    """Parse the raw text data into structured format for current day only."""
-    matches = []
-    current_day = get_current_day()
-    try:
-        lines = raw_data.strip().split('\n')
-        in_current_day_section = False
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            if line.upper() in ['MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY']:
-                in_current_day_section = (line.upper() == current_day)
-                continue
-            if not in_current_day_section:
-                continue
-            if '|' in line:
-                parts = line.split('|', 1)
-                if len(parts) == 2:
-                    left_part, stream_url = parts[0].strip(), parts[1].strip()
-                    if not stream_url.startswith(('http://', 'https://')):
-                        continue
-                    time_match = re.match(r'^(\d{1,2}:\d{2})\s+(.+)$', left_part)
-                    if time_match:
-                        time, title = time_match.group(1), time_match.group(2).strip()
-                        if ':' in title or not (' vs ' in title or ' x ' in title):
-                            continue
-                        teams = title.split(' vs ') if ' vs ' in title else title.split(' x ')
-                        if len(teams) != 2 or not teams[0].strip() or not teams[1].strip():
-                            continue
-                        adjusted_time = subtract_hour_from_time(time)
-                        title = title.replace(' x ', ' vs ')
-                        matches.append((adjusted_time, title, stream_url))
-        return matches
-    except Exception as e:
-        logger.error(f"[{fetch_code}] Error parsing sportsonline data: {str(e)}")
-        return []
-
-def group_sportsonline_matches(parsed_matches: List[Tuple[str, str, str]], fetch_code: str) -> List[dict]:
-    """Group matches by event and combine duplicate streams."""
+def group_sportsonline_matches(parsed_matches: Iterable[Tuple[str, str, str]], fetch_code: str,
+                               match_date: Optional[str] = None) -> List[dict]:
+    """Group matches by event and combine duplicate streams. match_date ("dd-mm-yyyy") defaults to today."""
+    match_date = match_date or datetime.now().strftime("%d-%m-%Y")
     grouped = defaultdict(list)
     for time, title, stream_url in parsed_matches:
         grouped[(time, title)].append(stream_url)
@@ -358,6 +363,7 @@ def group_sportsonline_matches(parsed_matches: List[Tuple[str, str, str]], fetch
         match_groups.append((*key, urls))
     
     sorted_groups = sorted(match_groups, key=lambda x: time_to_minutes(x[0]))
+    logos = get_logo_index()
     
     for time, title, stream_urls in sorted_groups:
         teams = title.split(' vs ', 1)
@@ -372,98 +378,101 @@ def group_sportsonline_matches(parsed_matches: List[Tuple[str, str, str]], fetch
             "source_name": "Toes In The Blender",
             "source_icon_url": "https://raw.githubusercontent.com/drnewske/tyhdsjax-nfhbqsm/main/logos/Melbourne%20Zoo.jpg",
             "match_title_from_api": title,
-            "team1": {"name": team1_name, "logo_url": DEFAULT_LOGO_URL},
-            "team2": {"name": team2_name, "logo_url": DEFAULT_LOGO_URL},
+            "team1": {"name": team1_name, "logo_url": logos.logo_for(team1_name, DEFAULT_LOGO_URL)},
+            "team2": {"name": team2_name, "logo_url": logos.logo_for(team2_name, DEFAULT_LOGO_URL)},
             "time": time,
-            "date": datetime.now().strftime("%d-%m-%Y"),
+            "date": match_date,
             "links": unique_streams
         }
         matches.append(match_entry)
     return matches
 
-def fetch_sportsonline_matches(fetch_code: str) -> List[dict]:
-    """Fetch matches from sportsonline.gl"""
+def fetch_sportsonline_matches(fetch_code: str, all_days: bool = False) -> List[dict]:
+    """
+    Fetch matches from sportsonline.gl. By default only today's section is kept;
+    with all_days every upcoming weekday section of the page becomes dated
+    matches, and an unchanged page reuses the previous run's parse.
+    """
     logger.info(f"[{fetch_code}] Fetching matches from sportsonline.gl...")
     raw_data = fetch_sportsonline_data()
     if not raw_data:
         return []
-    parsed_matches = parse_sportsonline_data(raw_data, fetch_code)
-    matches = group_sportsonline_matches(parsed_matches, fetch_code)
-    logger.info(f"[{fetch_code}] Fetched {len(matches)} valid matches from sportsonline.gl")
-    return matches
+    if not all_days:
+        parsed_matches = parse_sportsonline_data(raw_data, fetch_code)
+        matches = group_sportsonline_matches(parsed_matches, fetch_code)
+        logger.info(f"[{fetch_code}] Fetched {len(matches)} valid matches from sportsonline.gl")
+        return matches
 
-def load_existing_data() -> List[dict]:
-    """Load existing data from the output file"""
-    if os.path.exists(OUTPUT_FILE):
-        try:
-            with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            logger.warning(f"Could not load existing data: {e}")
-    return []
+    week = load_parsed_week(raw_data, hour_offset=SPORTSONLINE_HOUR_OFFSET)
+    matches = []
+    dates = schedule_dates(week)
+    for day, match_date in dates.items():
+        day_matches = group_sportsonline_matches(week[day], fetch_code, match_date.strftime("%d-%m-%Y"))
+        logger.info(f"[{fetch_code}] {day.title()} {match_date.strftime('%d-%m-%Y')}: {len(day_matches)} matches")
+        matches.extend(day_matches)
+    logger.info(f"[{fetch_code}] Fetched {len(matches)} valid matches for {len(dates)} days from sportsonline.gl")
+    return matches
 
-def merge_with_existing_data(new_matches: List[dict], existing_matches: List[dict], fetch_code: str) -> List[dict]:
+def merge_with_existing_data(new_matches: List[dict], existing_index: KickoffIndex, fetch_code: str) -> List[dict]:
     """Merge new matches with existing data, updating where necessary (backwards-compatible)"""
     logger.info(f"[{fetch_code}] Merging with existing data...")
-    existing_matches = cleanup_old_matches(existing_matches, fetch_code)
-    
-    existing_lookup = {}
-    for match in existing_matches:
-        if "source_name" not in match:
-            team1 = match.get("team1", {}).get("name", "Unknown")
-            team2 = match.get("team2", {}).get("name", "Unknown")
-            logger.warning(f"[{fetch_code}] Skipping existing match in old format (missing 'source_name'): {team1} vs {team2}")
-            continue
-        key = (match["source_name"], match["team1"]["name"], match["team2"]["name"], match["date"])
-        existing_lookup[key] = match
-    
-    merged_matches = []
-    updated_count = 0
-    new_count = 0
-    for new_match in new_matches:
-        key = (new_match["source_name"], new_match["team1"]["name"], new_match["team2"]["name"], new_match["date"])
-        if key in existing_lookup:
-            existing_match = existing_lookup[key]
-            needs_update = False
-            if (existing_match["team1"]["logo_url"] == DEFAULT_LOGO_URL and new_match["team1"]["logo_url"] != DEFAULT_LOGO_URL):
-                existing_match["team1"]["logo_url"] = new_match["team1"]["logo_url"]
-                needs_update = True
-            if (existing_match["team2"]["logo_url"] == DEFAULT_LOGO_URL and new_match["team2"]["logo_url"] != DEFAULT_LOGO_URL):
-                existing_match["team2"]["logo_url"] = new_match["team2"]["logo_url"]
-                needs_update = True
-            
-            existing_links = set(existing_match["links"])
-            new_links = set(new_match["links"])
-            if not new_links.issubset(existing_links):
-                combined_links = list(existing_links.union(new_links))
-                random.shuffle(combined_links)
-                existing_match["links"] = combined_links
-                needs_update = True
-            
-            if needs_update:
-                updated_count += 1
-                logger.info(f"[{fetch_code}] Updated: {new_match['team1']['name']} vs {new_match['team2']['name']}")
-            merged_matches.append(existing_match)
-            del existing_lookup[key]
-        else:
-            new_count += 1
-            merged_matches.append(new_match)
-            logger.info(f"[{fetch_code}] New match: {new_match['team1']['name']} vs {new_match['team2']['name']}")
-    
-    merged_matches.extend(existing_lookup.values())
-    logger.info(f"[{fetch_code}] Merge complete: {new_count} new, {updated_count} updated, {len(merged_matches)} total")
-    return merged_matches
-
-def save_data(data: List[dict], fetch_code: str):
-    """Save data to output file"""
+    existing_matches = cleanup_old_matches(existing_index, fetch_code)
+    result = merge_matches(new_matches, existing_matches, DEFAULT_LOGO_URL, log_prefix=f"[{fetch_code}] ")
+    logger.info(f"[{fetch_code}] Merge complete: {result.new_count} new, {result.updated_count} updated, "
+                f"{result.unchanged_count} unchanged, {len(result.matches)} total")
+    if not result.any_changed:
+        logger.info(f"[{fetch_code}] No new or updated matches in this run")
+    return result.matches
+
+def save_data(data: List[dict], fetch_code: str, store: LiveEventsStore):
+    """Save this scraper's rows to the store and re-export the output file if anything changed"""
     try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        logger.info(f"[{fetch_code}] Data saved to {OUTPUT_FILE}")
+        store.save_source_rows(SOURCE_NAMES, data)
+        if store.export():
+            logger.info(f"[{fetch_code}] Data saved to {OUTPUT_FILE}")
+        else:
+            logger.info(f"[{fetch_code}] No changes, {OUTPUT_FILE} left untouched")
     except Exception as e:
         logger.error(f"[{fetch_code}] Error saving data: {e}")
 
-def main():
+def run_sources(sources: List[Tuple[str, Callable[[], List[dict]]]], fetch_code: str,
+                timeout: float = SOURCE_TIMEOUT_SECONDS) -> Dict[str, dict]:
+    """
+    Runs every source function in parallel, each on its own daemon thread.
+    A source that fails or is still running after `timeout` seconds contributes
+    no matches, and never delays the others or the end of the run.
+    Returns {label: {"matches": [...], "seconds": float, "status": "ok" | "error" | "timeout"}}.
+    """
+    results = {}
+    done = {label: threading.Event() for label, _ in sources}
+    started = time.monotonic()
+
+    def run(label: str, fn: Callable[[], List[dict]]):
+        try:
+            matches = fn()
+            status = "ok"
+        except Exception as e:
+            logger.error(f"[{fetch_code}] Source {label} failed: {e}")
+            matches, status = [], "error"
+        results[label] = {"matches": matches or [], "seconds": time.monotonic() - started, "status": status}
+        done[label].set()
+
+    for label, fn in sources:
+        threading.Thread(target=run, args=(label, fn), name=f"source-{label}", daemon=True).start()
+
+    deadline = started + timeout
+    finished = {}
+    for label, _ in sources:
+        if done[label].wait(max(0.0, deadline - time.monotonic())):
+            finished[label] = results[label]
+        else:
+            logger.warning(f"[{fetch_code}] Source {label} timed out after {timeout}s; continuing without it.")
+            finished[label] = {"matches": [], "seconds": timeout, "status": "timeout"}
+    return finished
+
+def main(sync_streams: bool = False, source_timeout: float = SOURCE_TIMEOUT_SECONDS, all_days: bool = False,
+         probe_links: bool = True, top_links: Optional[int] = None,
+         stream_lookahead: Optional[float] = None):
     """Main function to fetch from both sources and merge results"""
     fetch_code = generate_fetch_code()
     logger.info(f"[{fetch_code}] Starting combined football match scraper...")
@@ -474,19 +483,36 @@ def main():
         cleanup_old_logs(fetch_code)
         cleanup_old_log_files(fetch_code)
         
-        streamed_matches = fetch_streamed_matches(fetch_code)
-        sportsonline_matches = fetch_sportsonline_matches(fetch_code)
-        
-        all_new_matches = streamed_matches + sportsonline_matches
+        source_results = run_sources([
+            ("Streamed.su ('Schrödingers Roommate')", lambda: fetch_streamed_matches(fetch_code, sync_streams, stream_lookahead)),
+            ("Sportsonline ('Toes In The Blender')", lambda: fetch_sportsonline_matches(fetch_code, all_days=all_days)),
+        ], fetch_code, timeout=source_timeout)
         
-        existing_data = load_existing_data()
-        final_matches = merge_with_existing_data(all_new_matches, existing_data, fetch_code)
+        all_new_matches = []
+        for result in source_results.values():
+            all_new_matches.extend(result["matches"])
         
-        save_data(final_matches, fetch_code)
+        # Probe the new and stored links before taking the store lock for the merge,
+        # so other scrapers are not kept waiting on the probes
+        link_results = None
+        if probe_links:
+            with LiveEventsStore(OUTPUT_FILE) as store:
+                stored_matches = store.load(SOURCE_NAMES)
+            link_results = probe_match_links(all_new_matches + stored_matches, SOURCE_NAMES, log_prefix=f"[{fetch_code}] ")
+
+        with LiveEventsStore(OUTPUT_FILE) as store:
+            existing_data = store.load_index()
+            final_matches = merge_with_existing_data(all_new_matches, existing_data, fetch_code)
+            if link_results is not None:
+                final_matches = rank_match_links(final_matches, SOURCE_NAMES, top_k=top_links,
+                                                 log_prefix=f"[{fetch_code}] ", results=link_results)
+            save_data(final_matches, fetch_code, store)
+        get_logo_index().save()
         
         logger.info(f"[{fetch_code}] Summary:")
-        logger.info(f"[{fetch_code}] - Streamed.su ('Schrödingers Roommate') matches: {len(streamed_matches)}")
-        logger.info(f"[{fetch_code}] - Sportsonline ('Toes In The Blender') matches: {len(sportsonline_matches)}")
+        for label, result in source_results.items():
+            logger.info(f"[{fetch_code}] - {label} matches: {len(result['matches'])} "
+                        f"({result['status']}, {result['seconds']:.1f}s)")
         logger.info(f"[{fetch_code}] - Final total matches in file: {len(final_matches)}")
         
         logger.info(f"[{fetch_code}] Scraper run completed successfully")
@@ -496,4 +522,15 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Combined streamed.su + sportsonline scraper')
+    parser.add_argument('--sync', action='store_true', help='Legacy mode: look up streams one at a time with a fixed pause')
+    parser.add_argument('--source-timeout', type=float, default=SOURCE_TIMEOUT_SECONDS, help='Seconds each source may run')
+    parser.add_argument('--all-days', action='store_true', help='Ingest every upcoming day of the sportsonline schedule, not just today')
+    parser.add_argument('--no-probe', action='store_true', help='Do not probe and rank match links')
+    parser.add_argument('--top-links', type=int, help='Keep only the best N links per match')
+    parser.add_argument('--stream-lookahead', type=float, metavar='HOURS',
+                        help='Only look up streams for matches kicking off within this many hours (default: all)')
+    args = parser.parse_args()
+    main(sync_streams=args.sync, source_timeout=args.source_timeout, all_days=args.all_days,
+         probe_links=not args.no_probe, top_links=args.top_links,
+         stream_lookahead=args.stream_lookahead * 3600 if args.stream_lookahead is not None else None)
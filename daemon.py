@@ -0,0 +1,209 @@
+import argparse
+import importlib.machinery
+import importlib.util
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from poll_schedule import STREAM_LOOKAHEAD_SECONDS, PollPacer, load_kickoffs
+
+# --- Configuration ---
+DAEMON_LOG = "daemon.log"
+# Seconds between runs of each job, matching the cron schedules of the workflows
+DAEMON_INTERVALS: Dict[str, int] = {
+    "winterfell_scribe": 60 * 60,     # winterfell_scribe.yml: hourly
+    "football_scraper": 2 * 3600,     # scraper.yml: every 2 hours
+    "conradiculosback": 2 * 3600,
+    "LUCILAND": 3 * 3600,             # LUCILAND.yml: every 3 hours
+    "encryptor": 3 * 3600,            # starngerstjssm.yml is manual-only; --delta keeps frequent runs cheap
+}
+# Feeds whose stored kickoffs pace each job when polling adaptively
+DAEMON_KICKOFF_FEEDS: Dict[str, Sequence[str]] = {
+    "winterfell_scribe": ("streamed_events.json",),
+    "football_scraper": ("live_events.json",),
+    "conradiculosback": ("live_events.json",),
+    "LUCILAND": ("live_events.json",),
+    "encryptor": ("live_events.json",),
+}
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The daemon configures logging before any script is imported, so the
+# scripts' own logging.basicConfig calls are no-ops; each job's output is
+# routed to the script's usual log file while it runs.
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler()]
+)
+logger = logging.getLogger("daemon")
+_daemon_handler = logging.FileHandler(DAEMON_LOG)
+_daemon_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+logger.addHandler(_daemon_handler)
+
+class Job:
+    """
+    One script entry point run on an interval, logging to the script's own
+    file. With kickoff_feeds, the interval adapts to the kickoffs stored in
+    those feeds, within the number of runs the fixed interval allows
+    (see poll_schedule.PollPacer).
+    """
+
+    def __init__(self, name: str, run: Callable[[], object], interval: float, log_file: str,
+                 kickoff_feeds: Sequence[str] = ()):
+        self.name = name
+        self.run = run
+        self.interval = interval
+        self.log_file = log_file
+        self.kickoff_feeds = tuple(kickoff_feeds)
+        self.pacer = PollPacer(interval)
+        self.next_run = time.monotonic()
+        self.runs = 0
+        self.failures = 0
+        self.last_seconds = 0.0
+
+    def next_delay(self) -> float:
+        """Seconds from the end of a run to the start of the next."""
+        if not self.kickoff_feeds:
+            return self.interval
+        return self.pacer.next_delay(load_kickoffs(self.kickoff_feeds))
+
+def load_script(name: str, path: str):
+    """Import a script whose file name is not importable as is (LUCILAND.PY's upper-case suffix)."""
+    spec = importlib.util.spec_from_file_location(name, path, loader=importlib.machinery.SourceFileLoader(name, path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def load_jobs(intervals: Dict[str, float], adaptive: bool = True) -> List[Job]:
+    """Import every script once and wrap its entry point; the modules then stay loaded between runs."""
+    import comradicaloculiwersetyouts as encryptor
+    import conradiculosback
+    import football_scraper
+    import winterfell_scribe
+    luciland = load_script("LUCILAND", os.path.join(SCRIPT_DIR, "LUCILAND.PY"))
+
+    entries = {
+        # Polled often enough to pick up distant fixtures later, so stream lookups wait until they are near
+        "winterfell_scribe": (lambda: winterfell_scribe.main(lookahead=STREAM_LOOKAHEAD_SECONDS),
+                              winterfell_scribe.SCRIBE_LOG),
+        "football_scraper": (lambda: football_scraper.main(all_days=True), football_scraper.LOG_FILE),
+        "conradiculosback": (lambda: conradiculosback.main(stream_lookahead=STREAM_LOOKAHEAD_SECONDS),
+                             conradiculosback.LOG_FILE),
+        "LUCILAND": (luciland.run_football_scraper, luciland.FOOTBALL_SCRAPER_LOG_FILE),
+        "encryptor": (lambda: encryptor.run_service(delta=True), encryptor.LOG_FILE),
+    }
+    jobs = []
+    for name, interval in intervals.items():
+        run, log_file = entries[name]
+        jobs.append(Job(name, run, interval, log_file, DAEMON_KICKOFF_FEEDS[name] if adaptive else ()))
+    return jobs
+
+def run_job(job: Job):
+    """
+    Run one job with its log file attached to the root logger; failures are
+    logged, never raised. A job fails if it raises or returns False (the
+    encryptor reports its failures that way instead of raising).
+    """
+    handler = logging.FileHandler(job.log_file)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    started = time.monotonic()
+    try:
+        logger.info(f"Running {job.name} (run {job.runs + 1})")
+        if job.run() is False:
+            job.failures += 1
+            logger.error(f"{job.name} reported a failed run")
+    except Exception as e:
+        job.failures += 1
+        logger.error(f"{job.name} failed: {e}", exc_info=True)
+    finally:
+        job.runs += 1
+        job.last_seconds = time.monotonic() - started
+        root.removeHandler(handler)
+        handler.close()
+    logger.info(f"{job.name} finished in {job.last_seconds:.1f}s")
+
+def flush_state():
+    """Write what is only held in memory and close the shared caches."""
+    from http_client import close_client
+    from team_logos import get_logo_index
+    try:
+        get_logo_index().save()
+    except OSError as e:
+        logger.warning(f"Could not save the team logo index: {e}")
+    close_client()
+    logger.info("State flushed")
+
+def serve(jobs: List[Job], stop: threading.Event, once: bool = False):
+    """
+    Run jobs one at a time, each when it is due, until stop is set (or,
+    with once, until every job has run once). A job in progress always
+    finishes before the loop stops.
+    """
+    pending = list(jobs)
+    while pending and not stop.is_set():
+        job = min(pending, key=lambda candidate: candidate.next_run)
+        wait = job.next_run - time.monotonic()
+        if wait > 0:
+            logger.info(f"Next: {job.name} in {wait / 60:.1f} min")
+            stop.wait(wait)
+            continue
+        run_job(job)
+        job.next_run = time.monotonic() + job.next_delay()
+        if once:
+            pending.remove(job)
+
+def main(job_names: Optional[List[str]] = None, intervals: Optional[Dict[str, float]] = None,
+         once: bool = False, initial_run: bool = True, adaptive: bool = True):
+    intervals = dict(DAEMON_INTERVALS, **(intervals or {}))
+    selected = {name: intervals[name] for name in (job_names or DAEMON_INTERVALS)}
+    jobs = load_jobs(selected, adaptive=adaptive)
+    if not initial_run:
+        for job in jobs:
+            job.next_run = time.monotonic() + job.next_delay()
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info(f"Received signal {signum}; stopping after the current job (send it again to exit now)")
+        stop.set()
+        signal.signal(signum, signal.SIG_DFL)
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    logger.info(f"Daemon started with {', '.join(f'{job.name} every {job.interval / 60:g} min' for job in jobs)}"
+                + (" (adapted to kickoffs)" if adaptive else ""))
+    try:
+        serve(jobs, stop, once=once)
+    finally:
+        flush_state()
+        for job in jobs:
+            logger.info(f"{job.name}: {job.runs} runs, {job.failures} failed")
+        logger.info("Daemon stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run every scraper and the encryptor in one long-lived process')
+    parser.add_argument('--jobs', nargs='+', choices=list(DAEMON_INTERVALS), help='Jobs to run (default: all)')
+    parser.add_argument('--interval', action='append', default=[], metavar='JOB=SECONDS',
+                        help='Override the interval of a job; may be repeated')
+    parser.add_argument('--once', action='store_true', help='Run each job once, then flush and exit')
+    parser.add_argument('--fixed-intervals', action='store_true',
+                        help='Always wait the full interval instead of polling faster around kickoffs and slower otherwise')
+    parser.add_argument('--no-initial-run', action='store_true', help='Wait one interval before the first run of each job')
+    args = parser.parse_args()
+
+    overrides = {}
+    for item in args.interval:
+        name, _, seconds = item.partition('=')
+        if name not in DAEMON_INTERVALS or not seconds:
+            parser.error(f"--interval expects JOB=SECONDS with JOB one of {', '.join(DAEMON_INTERVALS)}")
+        overrides[name] = float(seconds)
+    main(job_names=args.jobs, intervals=overrides, once=args.once, initial_run=not args.no_initial_run,
+         adaptive=not args.fixed_intervals)
@@ -0,0 +1,271 @@
+import bisect
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from itertools import zip_longest
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from kickoff_index import kickoff_epoch
+
+# Publish one canonical record per fixture instead of one per source (FEED_DEDUP=0 turns it off)
+FEED_DEDUP = os.environ.get("FEED_DEDUP", "1") != "0"
+
+# Records of different sources whose teams match are the same fixture if their
+# kickoffs are at most this far apart (sources disagree by an hour or so)
+DEDUP_WINDOW_SECONDS = 90 * 60
+
+# The source whose fields a canonical record takes, best first; unlisted sources come last
+SOURCE_PRIORITY = ("D.S stable", "Toes In The Blender", "Schrödingers Roommate", "D.S ALT 1", "The Citadel")
+
+# Words that do not tell two clubs apart ("Real Madrid CF" is "Real Madrid")
+TEAM_STOPWORDS = frozenset(("fc", "cf", "afc", "sc", "ac", "cd", "ca", "sk", "fk", "club", "de", "the"))
+# Words that do tell them apart ("Real Betis U19" is not "Real Betis"); they must match exactly
+TEAM_QUALIFIERS = frozenset(("u17", "u18", "u19", "u20", "u21", "u23", "women", "w", "ii", "b", "reserves"))
+# Normalized spellings of the same club, after stopwords are removed
+TEAM_ALIASES = {
+    "man utd": "manchester united",
+    "man united": "manchester united",
+    "man city": "manchester city",
+    "spurs": "tottenham hotspur",
+    "tottenham": "tottenham hotspur",
+    "wolves": "wolverhampton wanderers",
+    "psg": "paris saint germain",
+    "paris sg": "paris saint germain",
+    "inter": "internazionale",
+    "inter milan": "internazionale",
+    "bayern": "bayern munich",
+    "bayern munchen": "bayern munich",
+    "atletico": "atletico madrid",
+    "atl madrid": "atletico madrid",
+    "betis": "real betis",
+    "sporting cp": "sporting lisbon",
+    "sporting": "sporting lisbon",
+    "leverkusen": "bayer leverkusen",
+    "gladbach": "borussia monchengladbach",
+    "dortmund": "borussia dortmund",
+    "bvb": "borussia dortmund",
+}
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+_MISSING = object()
+
+TeamKey = Tuple[FrozenSet[str], FrozenSet[str]]  # (name tokens, qualifier tokens)
+# One source's record inside a canonical record: source_name, its match_id,
+# its links as positions in the canonical links, and the fields that differ
+Member = Dict[str, object]
+
+@lru_cache(maxsize=8192)
+def normalize_team(name: str) -> TeamKey:
+    """
+    Accent-folded, lowercased, punctuation-free team name with stopwords
+    removed and aliases applied, as (name tokens, qualifier tokens). Token
+    sets make the comparison independent of word order.
+    """
+    folded = unicodedata.normalize("NFKD", name or "")
+    folded = "".join(char for char in folded if not unicodedata.combining(char)).casefold()
+    tokens = [token for token in _NON_WORD.sub(" ", folded).split() if token not in TEAM_STOPWORDS]
+    qualifiers = frozenset(token for token in tokens if token in TEAM_QUALIFIERS)
+    words = " ".join(token for token in tokens if token not in TEAM_QUALIFIERS)
+    words = TEAM_ALIASES.get(words, words)
+    return frozenset(words.split()), qualifiers
+
+def same_team(a: TeamKey, b: TeamKey) -> bool:
+    """Equal names, or one name a shortening of the other ("Tigre" / "CA Tigre"), with equal qualifiers."""
+    if a[1] != b[1] or not a[0] or not b[0]:
+        return False
+    return a[0] <= b[0] or b[0] <= a[0]
+
+def _team_name(record: dict, team: str) -> str:
+    value = record.get(team)
+    return value.get("name", "") if isinstance(value, dict) else str(value or "")
+
+def team_keys(record: dict) -> Tuple[TeamKey, TeamKey]:
+    return normalize_team(_team_name(record, "team1")), normalize_team(_team_name(record, "team2"))
+
+def same_fixture(a: Tuple[TeamKey, TeamKey], b: Tuple[TeamKey, TeamKey]) -> bool:
+    """Both teams match, in either home/away order."""
+    return ((same_team(a[0], b[0]) and same_team(a[1], b[1]))
+            or (same_team(a[0], b[1]) and same_team(a[1], b[0])))
+
+def source_rank(source_name: str) -> Tuple[int, str]:
+    try:
+        return SOURCE_PRIORITY.index(source_name), ""
+    except ValueError:
+        return len(SOURCE_PRIORITY), source_name or ""
+
+def member_id(record: dict) -> Optional[Tuple[str, str]]:
+    """(source_name, match_id) identifying a record across runs, if it has a match_id."""
+    match_id = record.get("match_id")
+    return (record.get("source_name", ""), str(match_id)) if match_id else None
+
+class _Entity:
+    __slots__ = ("entity_id", "position", "members", "kickoff", "teams", "sources")
+
+    def __init__(self, entity_id: Optional[str], position: int, record: dict, kickoff: int):
+        self.entity_id = entity_id
+        self.position = position
+        self.members = [record]
+        self.kickoff = kickoff
+        self.teams = team_keys(record)
+        self.sources = {record.get("source_name")}
+
+    def add(self, record: dict, position: int):
+        self.position = min(self.position, position)
+        self.members.append(record)
+        self.sources.add(record.get("source_name"))
+
+def resolve(records: List[dict], known: Optional[Dict[Tuple[str, str], str]] = None,
+            window: int = DEDUP_WINDOW_SECONDS) -> List[Tuple[str, List[dict]]]:
+    """
+    Groups records that describe the same fixture. known maps member_id to
+    the entity id it was given on an earlier run; those records are grouped
+    by it without matching again. Every other record joins the first group
+    with a kickoff at most `window` seconds away, matching teams and no
+    record of its own source yet (the nearest kickoff wins), or starts a
+    new group. Records without a kickoff are never grouped.
+
+    Returns (entity id, records best source first) per group, in input
+    order of each group's first record. A new group takes the match_id of
+    its first record as its entity id.
+    """
+    known = known or {}
+    entities: List[_Entity] = []
+    by_id: Dict[str, _Entity] = {}
+    dated: List[Tuple[int, int]] = []   # (kickoff, index in entities), kept sorted
+    pending = []
+
+    def register(entity: _Entity):
+        if entity.entity_id is not None:
+            by_id[entity.entity_id] = entity
+        if entity.kickoff > 0:
+            bisect.insort(dated, (entity.kickoff, len(entities)))
+        entities.append(entity)
+
+    for position, record in enumerate(records):
+        if not isinstance(record, dict):
+            continue
+        identity = member_id(record)
+        entity_id = known.get(identity) if identity else None
+        if entity_id is None:
+            pending.append((position, record))
+        elif entity_id in by_id and record.get("source_name") not in by_id[entity_id].sources:
+            by_id[entity_id].add(record, position)
+        else:
+            register(_Entity(entity_id if entity_id not in by_id else None, position, record, kickoff_epoch(record)))
+
+    for position, record in pending:
+        kickoff = kickoff_epoch(record)
+        match = None
+        if kickoff > 0:
+            teams = team_keys(record)
+            start = bisect.bisect_left(dated, (kickoff - window, -1))
+            end = bisect.bisect_right(dated, (kickoff + window, len(entities)))
+            for candidate_kickoff, index in dated[start:end]:
+                candidate = entities[index]
+                if (record.get("source_name") not in candidate.sources and same_fixture(teams, candidate.teams)
+                        and (match is None or abs(candidate_kickoff - kickoff) < abs(match.kickoff - kickoff))):
+                    match = candidate
+        if match is not None:
+            match.add(record, position)
+        else:
+            register(_Entity(None, position, record, kickoff))
+
+    groups = []
+    used = set(by_id)
+    for entity in sorted(entities, key=lambda entity: entity.position):
+        entity.members.sort(key=lambda record: source_rank(record.get("source_name")))
+        if entity.entity_id is None:
+            entity_id = str(entity.members[0].get("match_id") or "")
+            while not entity_id or entity_id in used:
+                entity_id = f"{entity_id}-{len(used)}"  # Two sources happened to share an id
+            entity.entity_id = entity_id
+            used.add(entity_id)
+        groups.append((entity.entity_id, entity.members))
+    return groups
+
+def canonical_record(entity_id: str, members: List[dict]) -> dict:
+    """
+    One record for a fixture reported by several sources. It is the best
+    source's record with the links of all sources, entity_id as match_id,
+    and a `sources` list attributing each source's match_id and links. Each
+    source entry also carries the fields in which its record differs from
+    the canonical one, so expand_records can restore every source's record.
+
+    The links are interleaved by their position within each source (every
+    source's first link, best source first, then every second link, ...),
+    so the order link_prober ranked each source's links in survives and no
+    source's tail of dead links is placed ahead of another source's best.
+    """
+    primary = members[0]
+    per_source = zip_longest(*(member.get("links") or [] for member in members), fillvalue=_MISSING)
+    links = list(dict.fromkeys(link for same_rank in per_source for link in same_rank if link is not _MISSING))
+    positions = {link: position for position, link in enumerate(links)}
+    canonical = {key: value for key, value in primary.items()}
+    canonical["links"] = links
+    canonical["match_id"] = entity_id
+
+    sources = []
+    for member in members:
+        entry: Member = {"source_name": member.get("source_name"), "match_id": member.get("match_id"),
+                         "links": [positions[link] for link in (member.get("links") or [])]}
+        for key, value in member.items():
+            if key not in entry and canonical.get(key, _MISSING) != value:
+                entry[key] = value
+        missing = [key for key in canonical if key not in member and key not in ("links", "match_id")]
+        if missing:
+            entry["omit"] = missing
+        sources.append(entry)
+    canonical["sources"] = sources
+    return canonical
+
+def dedupe_records(records: List[dict], known: Optional[Dict[Tuple[str, str], str]] = None,
+                   window: int = DEDUP_WINDOW_SECONDS) -> Tuple[List[dict], Dict[Tuple[str, str], str]]:
+    """
+    The feed with every fixture reported by several sources collapsed into
+    one canonical_record (single-source records are left as they are), in
+    the order of each fixture's first record. Also returns member_id ->
+    entity id for every grouped record, to pass as `known` next time.
+    """
+    output = []
+    assignments = {}
+    for entity_id, members in resolve(records, known, window):
+        if len(members) == 1:
+            output.append(members[0])
+            continue
+        output.append(canonical_record(entity_id, members))
+        for member in members:
+            identity = member_id(member)
+            if identity:
+                assignments[identity] = entity_id
+    return output, assignments
+
+def is_canonical(record: dict) -> bool:
+    sources = record.get("sources")
+    return isinstance(sources, list) and all(isinstance(entry, dict) and "source_name" in entry for entry in sources)
+
+def expand_records(records: List[dict]) -> Tuple[List[dict], Dict[Tuple[str, str], str]]:
+    """
+    Inverse of dedupe_records: every source's own record, plus the member_id
+    -> entity id assignments read from the canonical records.
+    """
+    output = []
+    assignments = {}
+    for record in records:
+        if not isinstance(record, dict) or not is_canonical(record):
+            output.append(record)
+            continue
+        links = record.get("links") or []
+        for entry in record["sources"]:
+            member = {key: value for key, value in record.items()
+                      if key != "sources" and key not in entry.get("omit", ())}
+            for key, value in entry.items():
+                if key == "links":
+                    member["links"] = [links[position] for position in value]
+                elif key != "omit":
+                    member[key] = value
+            output.append(member)
+            identity = member_id(member)
+            if identity:
+                assignments[identity] = record.get("match_id")
+    return output, assignments
@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional (requirements.txt): without it no .br variant is published
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional (requirements.txt): without it no .zst variant is published
+    zstandard = None
+
+# Compressed variants published next to each feed: encoding -> (file suffix, compressor).
+# gzip is always available; brotli and zstd are added when their packages are installed.
+# Every compressor is deterministic (gzip with mtime=0), so unchanged content
+# gives byte-identical variants and the committed files do not churn.
+COMPRESSORS: Dict[str, tuple] = {"gzip": (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))}
+if brotli is not None:
+    COMPRESSORS["br"] = (".br", lambda data: brotli.compress(data, quality=11))
+if zstandard is not None:
+    COMPRESSORS["zstd"] = (".zst", lambda data: zstandard.ZstdCompressor(level=19).compress(data))
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+def manifest_path(feed_path: str) -> str:
+    return f"{feed_path}{MANIFEST_SUFFIX}"
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def load_manifest(feed_path: str) -> dict:
+    try:
+        with open(manifest_path(feed_path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def publish_artifacts(feed_path: str, payload: Optional[bytes] = None,
+                      compressors: Optional[Dict[str, tuple]] = None) -> bool:
+    """
+    Writes compressed variants of feed_path (feed_path.gz, and .br/.zst when
+    available) and feed_path.manifest.json, which lists the sha256 and byte
+    size of the raw feed and of every variant so clients can pick the
+    smallest encoding and skip downloads whose hash they already have. The
+    variants are published (committed) next to the feed, under the names
+    the manifest gives.
+
+    payload is the feed's raw bytes if the caller has them; otherwise the file
+    is read. Nothing is compressed when the raw hash matches the manifest and
+    all its variants still exist. Missing variants are rewritten without
+    touching the manifest's "updated" time, so an unchanged feed leaves the
+    committed manifest byte-identical. Returns True if artifacts were written.
+    """
+    compressors = COMPRESSORS if compressors is None else compressors
+    if payload is None:
+        with open(feed_path, 'rb') as f:
+            payload = f.read()
+    raw_hash = hashlib.sha256(payload).hexdigest()
+
+    manifest = load_manifest(feed_path)
+    variants = manifest.get("variants", {})
+    if (manifest.get("sha256") == raw_hash and set(variants) == set(compressors)
+            and all(os.path.exists(os.path.join(os.path.dirname(feed_path), v["file"])) for v in variants.values())):
+        logger.debug(f"{feed_path} unchanged ({raw_hash[:12]}), compressed variants left as they are")
+        return False
+
+    base_name = os.path.basename(feed_path)
+    previous_files = {v.get("file") for v in variants.values() if isinstance(v, dict)}
+    variants = {}
+    for encoding, (suffix, compress) in compressors.items():
+        compressed = compress(payload)
+        _write_atomic(f"{feed_path}{suffix}", compressed)
+        variants[encoding] = {"file": f"{base_name}{suffix}", "size": len(compressed),
+                              "sha256": hashlib.sha256(compressed).hexdigest()}
+
+    updated = manifest.get("updated") if manifest.get("sha256") == raw_hash else None
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "file": base_name,
+        "sha256": raw_hash,
+        "size": len(payload),
+        "updated": updated or int(time.time()),
+        "variants": variants,
+    }
+    _write_atomic(manifest_path(feed_path), json.dumps(manifest, indent=2).encode('utf-8'))
+    # A variant whose compressor is no longer installed must not linger next to the feed, out of date
+    for stale in previous_files - {v["file"] for v in variants.values()}:
+        if stale and os.path.basename(stale) == stale and stale.startswith(base_name):
+            try:
+                os.remove(os.path.join(os.path.dirname(feed_path), stale))
+            except OSError:
+                pass
+    sizes = ", ".join(f"{encoding} {v['size']} B" for encoding, v in variants.items())
+    logger.info(f"Published compressed variants of {base_name} ({len(payload)} B): {sizes}")
+    return True
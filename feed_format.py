@@ -0,0 +1,101 @@
+import json
+import os
+from typing import Any, Dict, List, Union
+
+# Serialization profiles for the published feeds (live_events.json, streamed_events.json):
+#   indented   - indent=2, for reading and diffing by hand
+#   minified   - the same JSON list without whitespace; any JSON reader still works
+#   dictionary - minified, with repeated URLs and source metadata moved into a
+#                shared string table; read it back with load_feed/decode_feed
+# A workflow opts into a smaller profile with `env: FEED_PROFILE: minified`.
+FEED_PROFILES = ("indented", "minified", "dictionary")
+FEED_PROFILE = os.environ.get("FEED_PROFILE", "indented")
+
+DICTIONARY_FORMAT_VERSION = 1
+# Fields whose string values go into the dictionary profile's shared table
+DICTIONARY_FIELDS = ("source_name", "source_icon_url", "team1.logo_url", "team2.logo_url")
+
+def _split(field: str):
+    parent, _, name = field.rpartition(".")
+    return parent, name
+
+def encode_dictionary(records: List[dict]) -> Dict[str, Any]:
+    """The dictionary profile document for records."""
+    strings: List[str] = []
+    positions: Dict[str, int] = {}
+    encoded = []
+    for record in records:
+        record = dict(record)
+        for field in DICTIONARY_FIELDS:
+            parent, name = _split(field)
+            container = record
+            if parent:
+                if not isinstance(record.get(parent), dict):
+                    continue
+                container = record[parent] = dict(record[parent])
+            value = container.get(name)
+            if not isinstance(value, str):
+                continue
+            if value not in positions:
+                positions[value] = len(strings)
+                strings.append(value)
+            container[name] = positions[value]
+        encoded.append(record)
+    return {"profile": "dictionary", "version": DICTIONARY_FORMAT_VERSION,
+            "fields": list(DICTIONARY_FIELDS), "strings": strings, "records": encoded}
+
+def decode_feed(document: Any) -> List[dict]:
+    """
+    Records of a parsed feed in any profile. A plain list is returned as is;
+    dictionary records are decoded into copies, leaving document unchanged.
+    """
+    if not isinstance(document, dict) or document.get("profile") != "dictionary":
+        return document
+    if document.get("version") != DICTIONARY_FORMAT_VERSION:
+        raise ValueError(f"Unsupported dictionary feed version: {document.get('version')}")
+    strings = document["strings"]
+    fields = [_split(field) for field in document["fields"]]
+    records = []
+    for record in document["records"]:
+        record = dict(record)
+        for parent, name in fields:
+            container = record
+            if parent:
+                if not isinstance(record.get(parent), dict):
+                    continue
+                container = record[parent] = dict(record[parent])
+            if isinstance(container.get(name), int):
+                container[name] = strings[container[name]]
+        records.append(record)
+    return records
+
+def dump_feed(records: List[dict], profile: str = FEED_PROFILE) -> bytes:
+    """Serialize records in the given profile as UTF-8 bytes."""
+    if profile == "indented":
+        text = json.dumps(records, indent=2, ensure_ascii=False)
+    elif profile == "minified":
+        text = json.dumps(records, separators=(',', ':'), ensure_ascii=False)
+    elif profile == "dictionary":
+        text = json.dumps(encode_dictionary(records), separators=(',', ':'), ensure_ascii=False)
+    else:
+        raise ValueError(f"Unknown feed profile '{profile}', expected one of {', '.join(FEED_PROFILES)}")
+    return text.encode('utf-8')
+
+def load_feed(raw: Union[bytes, str]) -> List[dict]:
+    """Parse a feed written by dump_feed in any profile."""
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8')
+    return decode_feed(json.loads(raw))
+
+def read_feed(path: str) -> List[dict]:
+    with open(path, 'rb') as f:
+        return load_feed(f.read())
+
+def write_feed(path: str, records: List[dict], profile: str = FEED_PROFILE) -> bytes:
+    """Write records to path atomically in the given profile. Returns the bytes written."""
+    payload = dump_feed(records, profile)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return payload
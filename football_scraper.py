@@ -1,23 +1,31 @@
-import requests
-import json
-import re
+import argparse
 import time
-import random
 import logging
 import os
 import uuid
 import glob
-import hashlib
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Tuple, Optional
+from typing import Iterable, Iterator, List, Dict, Tuple, Optional
 from collections import defaultdict
 
+from http_client import get_client
+from kickoff_index import KickoffIndex
+from link_prober import probe_match_links, rank_match_links
+from live_events_store import LiveEventsStore
+from log_retention import truncate_log_before
+from match_ids import letter_match_id, letter_match_ids
+from match_merge import merge_matches
+from sportsonline_parser import current_day, iter_day, load_parsed_week, schedule_dates, time_to_minutes
+from team_logos import get_logo_index
+
 # Configuration
 SPORTSONLINE_URL = "https://sportsonline.gl/"
+SPORTSONLINE_HOUR_OFFSET = 0  # Schedule times are already UTC
 DEFAULT_LOGO_URL = "https://cdn.jsdelivr.net/gh/drnewske/tyhdsjax-nfhbqsm/logos/myicon.png"
 REQUEST_TIMEOUT = 10
 LOG_FILE = "scraper.log"
 OUTPUT_FILE = "live_events.json"
+SOURCE_NAMES = ["D.S stable"]  # Rows this scraper owns in the live events store
 
 # Cleanup configuration
 MATCH_CLEANUP_HOURS = 25  # Remove matches older than 25 hours
@@ -40,128 +48,41 @@ def generate_match_id(match_data: dict) -> str:
     Uses hash of team names, date, time, and source name to ensure uniqueness.
     Returns only letters (A-Z), case insensitive.
     """
-    # Create a string with key match identifiers
-    team1 = match_data.get('team1', {}).get('name', '') if isinstance(match_data.get('team1'), dict) else str(match_data.get('team1', ''))
-    team2 = match_data.get('team2', {}).get('name', '') if isinstance(match_data.get('team2'), dict) else str(match_data.get('team2', ''))
-    date = match_data.get('date', '')
-    time = match_data.get('time', '')
-    source = match_data.get('source_name', 'D.S stable')
-    
-    # Create a consistent string for hashing (normalize case and order)
-    teams_sorted = sorted([team1.lower().strip(), team2.lower().strip()])
-    hash_input = f"{source}-{teams_sorted[0]}-{teams_sorted[1]}-{date}-{time}"
-    
-    # Generate SHA-256 hash
-    hash_object = hashlib.sha256(hash_input.encode())
-    hex_dig = hash_object.hexdigest()
-    
-    # Convert hex to letters only
-    letters_only = ''
-    for char in hex_dig:
-        if char.isdigit():
-            # Convert digits 0-9 to letters A-J
-            letters_only += chr(ord('A') + int(char))
-        else:
-            # Keep hex letters (a-f), convert to uppercase
-            letters_only += char.upper()
-    
-    # If we don't have enough letters, pad with additional hash iterations
-    iteration = 0
-    while len(letters_only) < 12:
-        iteration += 1
-        hash_input_extended = f"{hash_input}-{iteration}"
-        hash_object = hashlib.sha256(hash_input_extended.encode())
-        hex_dig = hash_object.hexdigest()
-        
-        for char in hex_dig:
-            if len(letters_only) >= 12:
-                break
-            if char.isdigit():
-                letters_only += chr(ord('A') + int(char))
-            else:
-                letters_only += char.upper()
-    
-    return letters_only[:12]
+    return letter_match_id(match_data, SOURCE_NAMES[0])
 
 def generate_fetch_code() -> str:
     """Generate a unique fetch code for this run"""
     return f"FETCH-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{str(uuid.uuid4())[:8].upper()}"
 
-def cleanup_old_matches(matches: List[dict], fetch_code: str) -> List[dict]:
+def cleanup_old_matches(index: KickoffIndex, fetch_code: str) -> List[dict]:
     """Remove matches older than MATCH_CLEANUP_HOURS"""
     logger.info(f"[{fetch_code}] Cleaning up old matches...")
     
-    cutoff_time = datetime.now() - timedelta(hours=MATCH_CLEANUP_HOURS)
-    valid_matches = []
-    removed_count = 0
+    cutoff_epoch = int(time.time()) - MATCH_CLEANUP_HOURS * 3600
+    expired = index.expire_before(cutoff_epoch)
     
-    for match in matches:
-        try:
-            match_date = match.get("date", "")
-            match_time = match.get("time", "")
-            
-            if not match_date or not match_time or match_date == "Not Found" or match_time == "Not Found":
-                valid_matches.append(match)
-                continue
-            
-            day, month, year = map(int, match_date.split('-'))
-            hour, minute = map(int, match_time.split(':'))
-            match_datetime = datetime(year, month, day, hour, minute)
-            
-            if match_datetime < cutoff_time:
-                removed_count += 1
-                team1_name = match.get("team1", {}).get("name", "Unknown")
-                team2_name = match.get("team2", {}).get("name", "Unknown")
-                logger.info(f"[{fetch_code}] Removed old match: {team1_name} vs {team2_name} ({match_date} {match_time})")
-            else:
-                valid_matches.append(match)
-                
-        except (ValueError, KeyError, AttributeError) as e:
-            logger.warning(f"[{fetch_code}] Could not parse match date/time, keeping match: {e}")
-            valid_matches.append(match)
+    for _, match in expired:
+        team1_name = match.get("team1", {}).get("name", "Unknown")
+        team2_name = match.get("team2", {}).get("name", "Unknown")
+        logger.info(f"[{fetch_code}] Removed old match: {team1_name} vs {team2_name} ({match.get('date')} {match.get('time')})")
     
-    if removed_count > 0:
-        logger.info(f"[{fetch_code}] Cleanup complete: Removed {removed_count} old matches, {len(valid_matches)} matches remaining")
+    valid_matches = index.records()
+    if expired:
+        logger.info(f"[{fetch_code}] Cleanup complete: Removed {len(expired)} old matches, {len(valid_matches)} matches remaining")
     else:
         logger.info(f"[{fetch_code}] No old matches to remove")
     
     return valid_matches
 
 def cleanup_old_logs(fetch_code: str):
-    """Clean up old log entries from the log file"""
+    """Drop log entries older than LOG_CLEANUP_HOURS from the head of the log file"""
     logger.info(f"[{fetch_code}] Cleaning up old log entries...")
     
-    if not os.path.exists(LOG_FILE):
-        return
-    
     try:
         cutoff_time = datetime.now() - timedelta(hours=LOG_CLEANUP_HOURS)
-        valid_lines = []
-        removed_count = 0
-        
-        with open(LOG_FILE, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        for line in lines:
-            try:
-                timestamp_match = re.match(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+', line)
-                if timestamp_match:
-                    timestamp_str = timestamp_match.group(1)
-                    log_datetime = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                    
-                    if log_datetime >= cutoff_time:
-                        valid_lines.append(line)
-                    else:
-                        removed_count += 1
-                else:
-                    valid_lines.append(line)
-            except (ValueError, AttributeError):
-                valid_lines.append(line)
-        
-        if removed_count > 0:
-            with open(LOG_FILE, 'w', encoding='utf-8') as f:
-                f.writelines(valid_lines)
-            logger.info(f"[{fetch_code}] Log cleanup complete: Removed {removed_count} old log entries")
+        removed_bytes = truncate_log_before(LOG_FILE, cutoff_time)
+        if removed_bytes > 0:
+            logger.info(f"[{fetch_code}] Log cleanup complete: Removed {removed_bytes} bytes of old log entries")
             
     except Exception as e:
         logger.error(f"[{fetch_code}] Error during log cleanup: {e}")
@@ -201,81 +122,21 @@ def fetch_sportsonline_data() -> str:
     """Fetch the raw text data from sportsonline.gl"""
     try:
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
         }
-        response = requests.get(SPORTSONLINE_URL, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        return response.text
+        return get_client().get_text(SPORTSONLINE_URL, encoding='utf-8', headers=headers, timeout=30)
     except Exception as e:
         logger.error(f"Error fetching data from sportsonline.gl: {str(e)}")
         return ""
 
-def get_current_day() -> str:
-    """Get current day of the week in uppercase"""
-    days = ['MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY']
-    return days[datetime.now().weekday()]
-
-def subtract_hour_from_time(time_str: str) -> str:
-    """Subtract 1 hour from time string (UTC+1 to UTC conversion)"""
-    try:
-        hour, minute = map(int, time_str.split(':'))
-        dt = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-        dt_adjusted = dt - timedelta(hours=0)
-        return dt_adjusted.strftime("%H:%M")
-    except (ValueError, AttributeError) as e:
-        logger.error(f"Error processing time {time_str}: {e}")
-        return time_str
-
-def time_to_minutes(time_str: str) -> int:
-    """Convert time string to minutes since midnight for sorting"""
-    try:
-        hour, minute = map(int, time_str.split(':'))
-        return hour * 60 + minute
-    except (ValueError, AttributeError):
-        return 0
-
-def parse_sportsonline_data(raw_data: str, fetch_code: str) -> List[Tuple[str, str, str]]:
-    """Parse the raw text data into structured format for current day only."""
-    matches = []
-    current_day = get_current_day()
-    try:
-        lines = raw_data.strip().split('\n')
-        in_current_day_section = False
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            if line.upper() in ['MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY']:
-                in_current_day_section = (line.upper() == current_day)
-                continue
-            if not in_current_day_section:
-                continue
-            if '|' in line:
-                parts = line.split('|', 1)
-                if len(parts) == 2:
-                    left_part, stream_url = parts[0].strip(), parts[1].strip()
-                    if not stream_url.startswith(('http://', 'https://')):
-                        continue
-                    time_match = re.match(r'^(\d{1,2}:\d{2})\s+(.+)$', left_part)
-                    if time_match:
-                        time, title = time_match.group(1), time_match.group(2).strip()
-                        if ':' in title or not (' vs ' in title or ' x ' in title):
-                            continue
-                        teams = title.split(' vs ') if ' vs ' in title else title.split(' x ')
-                        if len(teams) != 2 or not teams[0].strip() or not teams[1].strip():
-                            continue
-                        adjusted_time = subtract_hour_from_time(time)
-                        title = title.replace(' x ', ' vs ')
-                        matches.append((adjusted_time, title, stream_url))
-        return matches
-    except Exception as e:
-        logger.error(f"[{fetch_code}] Error parsing sportsonline data: {str(e)}")
-        return []
+def parse_sportsonline_data(raw_data: str, fetch_code: str) -> Iterator[Tuple[str, str, str]]:
+    """Lazily parse the raw text data into (time, title, url) for the current day only."""
+    return iter_day(raw_data, current_day(), hour_offset=SPORTSONLINE_HOUR_OFFSET)
 
-def group_sportsonline_matches(parsed_matches: List[Tuple[str, str, str]], fetch_code: str) -> List[dict]:
-    """Group matches by event and combine duplicate streams."""
+def group_sportsonline_matches(parsed_matches: Iterable[Tuple[str, str, str]], fetch_code: str,
+                               match_date: Optional[str] = None) -> List[dict]:
+    """Group matches by event and combine duplicate streams. match_date ("dd-mm-yyyy") defaults to today."""
+    match_date = match_date or datetime.now().strftime("%d-%m-%Y")
     grouped = defaultdict(list)
     for time, title, stream_url in parsed_matches:
         grouped[(time, title)].append(stream_url)
@@ -285,6 +146,7 @@ def group_sportsonline_matches(parsed_matches: List[Tuple[str, str, str]], fetch
         match_groups.append((*key, urls))
     
     sorted_groups = sorted(match_groups, key=lambda x: time_to_minutes(x[0]))
+    logos = get_logo_index()
     
     for time, title, stream_urls in sorted_groups:
         teams = title.split(' vs ', 1)
@@ -299,116 +161,69 @@ def group_sportsonline_matches(parsed_matches: List[Tuple[str, str, str]], fetch
             "source_name": "D.S stable",
             "source_icon_url": "https://d11p0alxbet5ud.cloudfront.net/Pictures/480xAny/8/2/5/1103825_grass_valley_LDK8300.jpg",
             "match_title_from_api": title,
-            "team1": {"name": team1_name, "logo_url": DEFAULT_LOGO_URL},
-            "team2": {"name": team2_name, "logo_url": DEFAULT_LOGO_URL},
+            "team1": {"name": team1_name, "logo_url": logos.logo_for(team1_name, DEFAULT_LOGO_URL)},
+            "team2": {"name": team2_name, "logo_url": logos.logo_for(team2_name, DEFAULT_LOGO_URL)},
             "time": time,
-            "date": datetime.now().strftime("%d-%m-%Y"),
+            "date": match_date,
             "links": unique_streams
         }
         
-        # Generate and add the unique 12-character alphabetic match_id
-        match_entry["match_id"] = generate_match_id(match_entry)
-        
         matches.append(match_entry)
+    
+    # Generate and add the unique 12-character alphabetic match_ids in one batch
+    for match_entry, match_id in zip(matches, letter_match_ids(matches, SOURCE_NAMES[0])):
+        match_entry["match_id"] = match_id
     return matches
 
-def fetch_sportsonline_matches(fetch_code: str) -> List[dict]:
-    """Fetch matches from sportsonline.gl"""
+def fetch_sportsonline_matches(fetch_code: str, all_days: bool = False) -> List[dict]:
+    """
+    Fetch matches from sportsonline.gl. By default only today's section is kept;
+    with all_days every upcoming weekday section of the page becomes dated
+    matches, and an unchanged page reuses the previous run's parse.
+    """
     logger.info(f"[{fetch_code}] Fetching matches from sportsonline.gl...")
     raw_data = fetch_sportsonline_data()
     if not raw_data:
         return []
-    parsed_matches = parse_sportsonline_data(raw_data, fetch_code)
-    matches = group_sportsonline_matches(parsed_matches, fetch_code)
-    logger.info(f"[{fetch_code}] Fetched {len(matches)} valid matches from sportsonline.gl")
-    return matches
+    if not all_days:
+        parsed_matches = parse_sportsonline_data(raw_data, fetch_code)
+        matches = group_sportsonline_matches(parsed_matches, fetch_code)
+        logger.info(f"[{fetch_code}] Fetched {len(matches)} valid matches from sportsonline.gl")
+        return matches
 
-def load_existing_data() -> List[dict]:
-    """Load existing data from the output file"""
-    if os.path.exists(OUTPUT_FILE):
-        try:
-            with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            logger.warning(f"Could not load existing data: {e}")
-    return []
+    week = load_parsed_week(raw_data, hour_offset=SPORTSONLINE_HOUR_OFFSET)
+    matches = []
+    dates = schedule_dates(week)
+    for day, match_date in dates.items():
+        day_matches = group_sportsonline_matches(week[day], fetch_code, match_date.strftime("%d-%m-%Y"))
+        logger.info(f"[{fetch_code}] {day.title()} {match_date.strftime('%d-%m-%Y')}: {len(day_matches)} matches")
+        matches.extend(day_matches)
+    logger.info(f"[{fetch_code}] Fetched {len(matches)} valid matches for {len(dates)} days from sportsonline.gl")
+    return matches
 
-def merge_with_existing_data(new_matches: List[dict], existing_matches: List[dict], fetch_code: str) -> List[dict]:
+def merge_with_existing_data(new_matches: List[dict], existing_index: KickoffIndex, fetch_code: str) -> List[dict]:
     """Merge new matches with existing data, updating where necessary (backwards-compatible)"""
     logger.info(f"[{fetch_code}] Merging with existing data...")
-    existing_matches = cleanup_old_matches(existing_matches, fetch_code)
-    
-    existing_lookup = {}
-    for match in existing_matches:
-        if "source_name" not in match:
-            team1 = match.get("team1", {}).get("name", "Unknown")
-            team2 = match.get("team2", {}).get("name", "Unknown")
-            logger.warning(f"[{fetch_code}] Skipping existing match in old format (missing 'source_name'): {team1} vs {team2}")
-            continue
-            
-        # Ensure existing matches have match_id
-        if "match_id" not in match:
-            match["match_id"] = generate_match_id(match)
-            logger.info(f"[{fetch_code}] Generated missing match_id for existing match: {match.get('match_title_from_api', 'Unknown')}")
-            
-        key = (match["source_name"], match["team1"]["name"], match["team2"]["name"], match["date"])
-        existing_lookup[key] = match
-    
-    merged_matches = []
-    updated_count = 0
-    new_count = 0
-    for new_match in new_matches:
-        key = (new_match["source_name"], new_match["team1"]["name"], new_match["team2"]["name"], new_match["date"])
-        if key in existing_lookup:
-            existing_match = existing_lookup[key]
-            needs_update = False
-            
-            # Preserve the existing match_id
-            match_id_backup = existing_match.get("match_id")
-            
-            if (existing_match["team1"]["logo_url"] == DEFAULT_LOGO_URL and new_match["team1"]["logo_url"] != DEFAULT_LOGO_URL):
-                existing_match["team1"]["logo_url"] = new_match["team1"]["logo_url"]
-                needs_update = True
-            if (existing_match["team2"]["logo_url"] == DEFAULT_LOGO_URL and new_match["team2"]["logo_url"] != DEFAULT_LOGO_URL):
-                existing_match["team2"]["logo_url"] = new_match["team2"]["logo_url"]
-                needs_update = True
-            
-            existing_links = set(existing_match["links"])
-            new_links = set(new_match["links"])
-            if not new_links.issubset(existing_links):
-                combined_links = list(existing_links.union(new_links))
-                random.shuffle(combined_links)
-                existing_match["links"] = combined_links
-                needs_update = True
-            
-            # Restore the match_id after any updates
-            if match_id_backup:
-                existing_match["match_id"] = match_id_backup
-            
-            if needs_update:
-                updated_count += 1
-                logger.info(f"[{fetch_code}] Updated: {new_match['team1']['name']} vs {new_match['team2']['name']}")
-            merged_matches.append(existing_match)
-            del existing_lookup[key]
-        else:
-            new_count += 1
-            merged_matches.append(new_match)
-            logger.info(f"[{fetch_code}] New match: {new_match['team1']['name']} vs {new_match['team2']['name']}")
-    
-    merged_matches.extend(existing_lookup.values())
-    logger.info(f"[{fetch_code}] Merge complete: {new_count} new, {updated_count} updated, {len(merged_matches)} total")
-    return merged_matches
+    existing_matches = cleanup_old_matches(existing_index, fetch_code)
+    result = merge_matches(new_matches, existing_matches, DEFAULT_LOGO_URL, id_generator=generate_match_id, log_prefix=f"[{fetch_code}] ")
+    logger.info(f"[{fetch_code}] Merge complete: {result.new_count} new, {result.updated_count} updated, "
+                f"{result.unchanged_count} unchanged, {len(result.matches)} total")
+    if not result.any_changed:
+        logger.info(f"[{fetch_code}] No new or updated matches in this run")
+    return result.matches
 
-def save_data(data: List[dict], fetch_code: str):
-    """Save data to output file"""
+def save_data(data: List[dict], fetch_code: str, store: LiveEventsStore):
+    """Save this scraper's rows to the store and re-export the output file if anything changed"""
     try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        logger.info(f"[{fetch_code}] Data saved to {OUTPUT_FILE}")
+        store.save_source_rows(SOURCE_NAMES, data)
+        if store.export():
+            logger.info(f"[{fetch_code}] Data saved to {OUTPUT_FILE}")
+        else:
+            logger.info(f"[{fetch_code}] No changes, {OUTPUT_FILE} left untouched")
     except Exception as e:
         logger.error(f"[{fetch_code}] Error saving data: {e}")
 
-def main():
+def main(all_days: bool = False, probe_links: bool = True, top_links: Optional[int] = None):
     """Main function to fetch from sportsonline only"""
     fetch_code = generate_fetch_code()
     logger.info(f"[{fetch_code}] Starting sportsonline football match scraper...")
@@ -419,12 +234,23 @@ def main():
         cleanup_old_logs(fetch_code)
         cleanup_old_log_files(fetch_code)
         
-        sportsonline_matches = fetch_sportsonline_matches(fetch_code)
-        
-        existing_data = load_existing_data()
-        final_matches = merge_with_existing_data(sportsonline_matches, existing_data, fetch_code)
+        sportsonline_matches = fetch_sportsonline_matches(fetch_code, all_days=all_days)
         
-        save_data(final_matches, fetch_code)
+        # Probe the new and stored links before taking the store lock for the merge,
+        # so other scrapers are not kept waiting on the probes
+        link_results = None
+        if probe_links:
+            with LiveEventsStore(OUTPUT_FILE) as store:
+                stored_matches = store.load(SOURCE_NAMES)
+            link_results = probe_match_links(sportsonline_matches + stored_matches, SOURCE_NAMES, log_prefix=f"[{fetch_code}] ")
+
+        with LiveEventsStore(OUTPUT_FILE) as store:
+            existing_data = store.load_index()
+            final_matches = merge_with_existing_data(sportsonline_matches, existing_data, fetch_code)
+            if link_results is not None:
+                final_matches = rank_match_links(final_matches, SOURCE_NAMES, top_k=top_links,
+                                                 log_prefix=f"[{fetch_code}] ", results=link_results)
+            save_data(final_matches, fetch_code, store)
         
         logger.info(f"[{fetch_code}] Summary:")
         logger.info(f"[{fetch_code}] - Sportsonline ('Toes In The Blender') matches: {len(sportsonline_matches)}")
@@ -437,4 +263,9 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Sportsonline football match scraper')
+    parser.add_argument('--all-days', action='store_true', help='Ingest every upcoming day of the weekly schedule, not just today')
+    parser.add_argument('--no-probe', action='store_true', help='Do not probe and rank match links')
+    parser.add_argument('--top-links', type=int, help='Keep only the best N links per match')
+    args = parser.parse_args()
+    main(all_days=args.all_days, probe_links=not args.no_probe, top_links=args.top_links)
@@ -0,0 +1,311 @@
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from response_cache import STORED_HEADERS, CachedEntry, ResponseCache, open_default_cache
+
+# --- Configuration ---
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+DEFAULT_TIMEOUT = 15
+POOL_MAXSIZE = 16               # Kept-alive connections per host
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 1        # As LUCILAND's original session, the only one that retried
+RETRY_STATUS_FORCELIST = (429, 500, 502, 503, 504)
+# Bodies kept in memory for conditional GETs outside the response cache;
+# least recently used urls are dropped above this many bytes
+VALIDATOR_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Requests per second allowed to each host (token bucket rate, burst).
+# Hosts not listed here are not rate limited.
+HOST_RATE_LIMITS: Dict[str, Tuple[float, int]] = {}
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class HttpClient:
+    """
+    Shared HTTP client for all scrapers and the encryptor.
+
+    - One keep-alive connection pool per host, reused across calls and threads
+    - urllib3 Retry with backoff on connection errors and 429/5xx responses
+    - Optional per-host token-bucket rate limits
+    - ETag / Last-Modified conditional GETs: a 304 returns a copy of the
+      previously fetched response, rebuilt from a bounded in-memory store
+    - Optional persistent ResponseCache with per-endpoint TTLs for urls
+      matching its TTL rules: stale-while-revalidate (a recently expired
+      entry is answered at once and refreshed on a background thread) and
+      stale-if-error (the last good value when the upstream fails)
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, retries: int = RETRY_TOTAL,
+                 backoff_factor: float = RETRY_BACKOFF_FACTOR, pool_maxsize: int = POOL_MAXSIZE,
+                 rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 cache: Optional[ResponseCache] = None, validator_max_bytes: int = VALIDATOR_CACHE_MAX_BYTES):
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry_strategy = Retry(
+            total=retries,
+            status_forcelist=RETRY_STATUS_FORCELIST,
+            backoff_factor=backoff_factor,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=retry_strategy)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT})
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._rate_limits = dict(HOST_RATE_LIMITS if rate_limits is None else rate_limits)
+        # url -> last good response (validators, headers and body bytes only) for
+        # conditional requests outside the response cache, least recently used first
+        self._validators: "OrderedDict[str, CachedEntry]" = OrderedDict()
+        self._validator_bytes = 0
+        self.validator_max_bytes = validator_max_bytes
+        self.cache = cache
+        self._revalidating: Dict[str, threading.Thread] = {}
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.cache_hit_count = 0
+
+    def set_rate_limit(self, host: str, rate: float, burst: int = 1):
+        """Limit requests to host to `rate` per second, allowing bursts of `burst`."""
+        with self._lock:
+            self._rate_limits[host] = (rate, burst)
+            self._buckets.pop(host, None)
+
+    def _throttle(self, url: str):
+        host = urlparse(url).hostname or ''
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None and host in self._rate_limits:
+                rate, burst = self._rate_limits[host]
+                bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+        if bucket is not None:
+            bucket.acquire()
+
+    def get(self, url: str, conditional: bool = True, timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """
+        GET url through the shared pool. With conditional=True the last ETag /
+        Last-Modified seen for url is sent, and a 304 returns a fresh copy of
+        the earlier response with `not_modified` set to True. Urls matching a
+        response-cache TTL rule are served from the on-disk cache while fresh.
+        Does not raise for HTTP error statuses.
+        """
+        headers = dict(kwargs.pop('headers', None) or {})
+        timeout = timeout or self.timeout
+        if self.cache is not None and conditional:
+            ttl = self.cache.ttl_for(url)
+            if ttl is not None:
+                return self._get_cached(url, ttl, headers, timeout, kwargs)
+
+        cached = self._recall(url) if conditional else None
+        if cached:
+            headers.update(cached.validators())
+
+        response = self._send(url, headers, timeout, kwargs)
+
+        if response.status_code == 304 and cached:
+            return self._not_modified(url, cached.to_response())
+
+        response.not_modified = False
+        if conditional and response.ok and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            self._remember(url, response)
+        return response
+
+    def _recall(self, url: str) -> Optional[CachedEntry]:
+        with self._lock:
+            entry = self._validators.get(url)
+            if entry is not None:
+                self._validators.move_to_end(url)
+            return entry
+
+    def _remember(self, url: str, response: requests.Response):
+        """Keep what a later 304 needs: validators, stored headers and the body bytes."""
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        entry = CachedEntry(url, response.status_code, headers, response.content, time.time())
+        with self._lock:
+            previous = self._validators.pop(url, None)
+            if previous is not None:
+                self._validator_bytes -= len(previous.body)
+            if len(entry.body) > self.validator_max_bytes:
+                return
+            self._validators[url] = entry
+            self._validator_bytes += len(entry.body)
+            while self._validator_bytes > self.validator_max_bytes:
+                _, evicted = self._validators.popitem(last=False)
+                self._validator_bytes -= len(evicted.body)
+
+    def _send(self, url: str, headers: Dict[str, str], timeout: float, kwargs: Dict[str, Any]) -> requests.Response:
+        self._throttle(url)
+        with self._lock:
+            self.request_count += 1
+        return self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+
+    def _not_modified(self, url: str, previous: requests.Response) -> requests.Response:
+        with self._lock:
+            self.not_modified_count += 1
+        logger.debug(f"Not modified: {url}")
+        previous.not_modified = True
+        return previous
+
+    def _get_cached(self, url: str, ttl: int, headers: Dict[str, str], timeout: float,
+                    kwargs: Dict[str, Any]) -> requests.Response:
+        """
+        Cache-aware GET: fresh entries are served without a request. Entries
+        expired less than the cache's swr window ago are served at once too,
+        and revalidated on a background thread, so a slow upstream never
+        delays the caller (stale-while-revalidate). Older entries are
+        revalidated with their stored validators while the caller waits, and
+        only if that fails is the last good value served, for up to the
+        cache's stale window (stale-if-error).
+        """
+        entry = self.cache.get(url)
+        if entry is not None and entry.age < ttl:
+            with self._lock:
+                self.cache_hit_count += 1
+            return self._not_modified(url, entry.to_response())
+        if entry is not None and self.cache.is_revalidatable(entry, ttl):
+            self._revalidate_in_background(url, entry, headers, timeout, kwargs)
+            with self._lock:
+                self.cache_hit_count += 1
+            return self._not_modified(url, entry.to_response())
+
+        if entry is not None:
+            headers.update(entry.validators())
+        try:
+            response = self._send(url, headers, timeout, kwargs)
+        except requests.exceptions.RequestException as e:
+            if entry is not None and self.cache.is_servable_stale(entry):
+                logger.warning(f"Serving stale response for {url} ({int(entry.age)}s old): {e}")
+                return self._not_modified(url, entry.to_response())
+            raise
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(url)
+            return self._not_modified(url, entry.to_response())
+
+        if response.ok:
+            self.cache.put(url, response)
+        elif entry is not None and response.status_code >= 429 and self.cache.is_servable_stale(entry):
+            logger.warning(f"Serving stale response for {url} after HTTP {response.status_code}")
+            return self._not_modified(url, entry.to_response())
+
+        response.not_modified = False
+        return response
+
+    def _revalidate_in_background(self, url: str, entry: CachedEntry, headers: Dict[str, str], timeout: float,
+                                  kwargs: Dict[str, Any]):
+        """Refresh entry on a daemon thread; at most one refresh per url is in flight."""
+        with self._lock:
+            if url in self._revalidating:
+                return
+            thread = threading.Thread(target=self._revalidate, args=(url, entry, headers, timeout, kwargs),
+                                      name=f"revalidate-{url}", daemon=True)
+            self._revalidating[url] = thread
+        thread.start()
+
+    def _revalidate(self, url: str, entry: CachedEntry, headers: Dict[str, str], timeout: float,
+                    kwargs: Dict[str, Any]):
+        headers = dict(headers, **entry.validators())
+        try:
+            response = self._send(url, headers, timeout, kwargs)
+            if response.status_code == 304:
+                self.cache.refresh(url)
+            elif response.ok:
+                self.cache.put(url, response)
+            else:
+                logger.debug(f"Background revalidation of {url} got HTTP {response.status_code}")
+        except Exception as e:
+            # The stale entry stays; the next call past the swr window revalidates in the foreground
+            logger.debug(f"Background revalidation of {url} failed: {e}")
+        finally:
+            with self._lock:
+                self._revalidating.pop(url, None)
+
+    def get_json(self, url: str, **kwargs) -> Any:
+        """GET url and return parsed JSON, always a new object the caller may modify. Raises on HTTP errors."""
+        response = self.get(url, **kwargs)
+        response.raise_for_status()
+        return self.parse_json(url, response)
+
+    def parse_json(self, url: str, response: requests.Response) -> Any:
+        """
+        Parse a response from get(url). 304 answers are parsed again from the
+        stored body: re-parsing costs less than a deep copy, and sharing one
+        parsed object would let a caller's changes leak into later answers.
+        """
+        return response.json()
+
+    def get_text(self, url: str, encoding: Optional[str] = None, **kwargs) -> str:
+        """GET url and return its body as text. Raises on HTTP errors."""
+        response = self.get(url, **kwargs)
+        response.raise_for_status()
+        if encoding:
+            response.encoding = encoding
+        return response.text
+
+    def close(self):
+        """
+        Wait (up to the timeout each) for background revalidations, then close
+        the pool and the response cache; safe to call more than once.
+        """
+        with self._lock:
+            pending = list(self._revalidating.values())
+        for thread in pending:
+            thread.join(self.timeout)
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+_default_client: Optional[HttpClient] = None
+_default_lock = threading.Lock()
+
+def get_client() -> HttpClient:
+    """The process-wide shared client, created on first use."""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient(cache=open_default_cache())
+            # The response cache only reaches its main file (the one workflows keep) once closed
+            atexit.register(close_client)
+        return _default_client
+
+def close_client():
+    """Close the process-wide client, if any; the next get_client() starts a new one."""
+    global _default_client
+    with _default_lock:
+        client, _default_client = _default_client, None
+    if client is not None:
+        client.close()
@@ -0,0 +1,58 @@
+import calendar
+import heapq
+from typing import Iterable, List, Optional, Tuple
+
+def kickoff_epoch(record: dict) -> int:
+    """
+    Kickoff of a record as UTC epoch seconds, or 0 if unknown. Uses the
+    record's `_timestamp` (epoch ms) when present, otherwise its
+    "dd-mm-yyyy" + "HH:MM" date and time.
+    """
+    timestamp = record.get("_timestamp")
+    if isinstance(timestamp, (int, float)) and timestamp > 0:
+        return int(timestamp // 1000)
+    try:
+        day, month, year = map(int, record.get("date", "").split('-'))
+        hour, minute = map(int, record.get("time", "").split(':'))
+        return calendar.timegm((year, month, day, hour, minute, 0))
+    except (ValueError, AttributeError, TypeError, OverflowError):
+        return 0
+
+class KickoffIndex:
+    """
+    Records ordered by kickoff epoch in a min-heap, so expiry only pops what
+    has aged out instead of re-parsing every record. Records with an unknown
+    kickoff (epoch 0) are never expired and sort first. Records with equal
+    kickoffs keep their insertion order.
+    """
+
+    def __init__(self, records: Iterable[dict] = ()):
+        self._heap: List[Tuple[int, int, dict]] = []
+        self._undated: List[dict] = []
+        self._seq = 0
+        for record in records:
+            self.add(record)
+
+    def add(self, record: dict, epoch: Optional[int] = None):
+        """Index record; pass epoch when it is already known (e.g. stored with the record)."""
+        epoch = kickoff_epoch(record) if epoch is None else epoch
+        if epoch <= 0:
+            self._undated.append(record)
+            return
+        heapq.heappush(self._heap, (epoch, self._seq, record))
+        self._seq += 1
+
+    def expire_before(self, cutoff_epoch: int) -> List[Tuple[int, dict]]:
+        """Remove and return (epoch, record) for every record with kickoff before cutoff_epoch, oldest first."""
+        expired = []
+        while self._heap and self._heap[0][0] < cutoff_epoch:
+            epoch, _, record = heapq.heappop(self._heap)
+            expired.append((epoch, record))
+        return expired
+
+    def records(self) -> List[dict]:
+        """Undated records, then the rest in kickoff order."""
+        return self._undated + [record for _, _, record in sorted(self._heap)]
+
+    def __len__(self) -> int:
+        return len(self._heap) + len(self._undated)
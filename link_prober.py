@@ -0,0 +1,300 @@
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_client import USER_AGENT
+
+# --- Configuration ---
+PROBE_CACHE_FILE = ".link_probe.sqlite"
+PROBE_TTL_SECONDS = 30 * 60          # A link is probed at most once per window
+PROBE_HISTORY_SECONDS = 7 * 24 * 3600  # Links not seen for this long are forgotten
+PROBE_CONNECT_TIMEOUT = 3
+PROBE_READ_TIMEOUT = 4
+PROBE_CONCURRENCY = 24               # Probes in flight across all hosts
+PROBE_PER_HOST = 4                   # Probes in flight to any single host
+# Hysteresis of the ranking: a link only moves ahead of the one before it when it
+# is live and that one is not, or its reliability is higher by this much, or (at
+# about equal reliability) it answers this many ms faster. Smaller drifts between
+# runs keep the current order, so the feed is not rewritten when nothing really changed.
+RANK_RELIABILITY_MARGIN = 0.2
+RANK_LATENCY_MARGIN_MS = 500
+# HEAD answers that only mean "HEAD not supported"; the link is then probed with GET
+HEAD_UNSUPPORTED = (403, 405, 501)
+
+logger = logging.getLogger(__name__)
+
+class ProbeResult:
+    """Outcome of the latest probe of one link, plus its success history."""
+
+    __slots__ = ('url', 'ok', 'status', 'latency_ms', 'probed_at', 'successes', 'failures')
+
+    def __init__(self, url: str, ok: bool, status: int, latency_ms: float, probed_at: float,
+                 successes: int = 0, failures: int = 0):
+        self.url = url
+        self.ok = ok
+        self.status = status
+        self.latency_ms = latency_ms
+        self.probed_at = probed_at
+        self.successes = successes
+        self.failures = failures
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.probed_at
+
+    @property
+    def reliability(self) -> float:
+        """Share of probes that succeeded, smoothed so one probe is not 0% or 100%."""
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def clearly_beats(self, other: "ProbeResult") -> bool:
+        """Whether this link should go ahead of other, by more than the ranking margins."""
+        if self.ok != other.ok:
+            return self.ok
+        if abs(self.reliability - other.reliability) >= RANK_RELIABILITY_MARGIN:
+            return self.reliability > other.reliability
+        return other.latency_ms - self.latency_ms >= RANK_LATENCY_MARGIN_MS
+
+class LinkProbeCache:
+    """
+    SQLite store of the latest probe of every link. Entries younger than the
+    TTL are reused instead of probing again; success counts are kept for
+    ranking. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = PROBE_CACHE_FILE, ttl: int = PROBE_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            " url TEXT PRIMARY KEY, ok INTEGER, status INTEGER, latency_ms REAL,"
+            " probed_at REAL, successes INTEGER, failures INTEGER)"
+        )
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, ProbeResult]:
+        """Stored results for urls, fresh or not."""
+        results = {}
+        with self._lock:
+            for url in urls:
+                row = self._db.execute(
+                    "SELECT ok, status, latency_ms, probed_at, successes, failures FROM probes WHERE url = ?", (url,)
+                ).fetchone()
+                if row is not None:
+                    ok, status, latency_ms, probed_at, successes, failures = row
+                    results[url] = ProbeResult(url, bool(ok), status, latency_ms, probed_at, successes, failures)
+        return results
+
+    def put_many(self, results: Iterable[ProbeResult]):
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO probes (url, ok, status, latency_ms, probed_at, successes, failures)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(r.url, int(r.ok), r.status, r.latency_ms, r.probed_at, r.successes, r.failures) for r in results],
+            )
+            self._db.execute("COMMIT")
+
+    def is_fresh(self, result: ProbeResult) -> bool:
+        return result.age < self.ttl
+
+    def expire(self, max_age: float):
+        """Forget links not probed for max_age seconds."""
+        with self._lock:
+            self._db.execute("DELETE FROM probes WHERE probed_at < ?", (time.time() - max_age,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class LinkProber:
+    """
+    Probes stream links concurrently (HEAD, falling back to a streamed GET)
+    with tight timeouts and no retries, bounded per host, and ranks each
+    match's links by the results.
+    """
+
+    def __init__(self, cache: Optional[LinkProbeCache] = None, concurrency: int = PROBE_CONCURRENCY,
+                 per_host: int = PROBE_PER_HOST, timeout=(PROBE_CONNECT_TIMEOUT, PROBE_READ_TIMEOUT)):
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        # A dead link should cost one timeout, not a retry schedule, so this
+        # session does not share the HttpClient's retrying adapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.per_host, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self.probe_count = 0  # Links probed over the prober's lifetime, across all calls
+
+    def _slot_for(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host)
+                self._host_slots[host] = slot
+            return slot
+
+    def _request(self, url: str):
+        """(status, latency ms) of one probe; status 0 if the link did not answer."""
+        started = time.perf_counter()
+        try:
+            response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+            if response.status_code in HEAD_UNSUPPORTED:
+                started = time.perf_counter()
+                with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                    pass
+            return response.status_code, (time.perf_counter() - started) * 1000
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"Probe failed for {url}: {e}")
+            return 0, (time.perf_counter() - started) * 1000
+
+    def _probe(self, url: str, previous: Optional[ProbeResult]) -> ProbeResult:
+        with self._slot_for(url):
+            status, latency_ms = self._request(url)
+        ok = 0 < status < 400
+        successes = (previous.successes if previous else 0) + int(ok)
+        failures = (previous.failures if previous else 0) + int(not ok)
+        return ProbeResult(url, ok, status, latency_ms, time.time(), successes, failures)
+
+    def probe_urls(self, urls: Iterable[str]) -> Dict[str, ProbeResult]:
+        """Results for every url: fresh cached ones as they are, the rest probed now."""
+        urls = [url for url in dict.fromkeys(urls) if url.startswith(('http://', 'https://'))]
+        stored = self.cache.get_many(urls) if self.cache is not None else {}
+        results = {url: stored[url] for url in urls if url in stored and self.cache.is_fresh(stored[url])}
+        pending = [url for url in urls if url not in results]
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(pending))) as executor:
+                probed = list(executor.map(lambda url: self._probe(url, stored.get(url)), pending))
+            self.probe_count += len(probed)
+            if self.cache is not None:
+                self.cache.put_many(probed)
+            results.update((result.url, result) for result in probed)
+        return results
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+def rank_links(links: List[str], results: Dict[str, ProbeResult], top_k: Optional[int] = None) -> List[str]:
+    """
+    links ordered live-first, then by success history, then by latency;
+    links without a result go after the live ones and before the dead ones.
+    Capped to top_k when given.
+
+    Starting from the current order, each link is moved forward only past
+    links it clearly beats (ProbeResult.clearly_beats), so the order from
+    the previous run is kept unless a link's standing changed by more than
+    the ranking margins.
+    """
+    def standing(link: str) -> int:
+        result = results.get(link)
+        return 1 if result is None else (0 if result.ok else 2)
+
+    def clearly_beats(link: str, other: str) -> bool:
+        if standing(link) != standing(other):
+            return standing(link) < standing(other)
+        return link in results and other in results and results[link].clearly_beats(results[other])
+
+    ranked: List[str] = []
+    for link in links:
+        position = len(ranked)
+        while position > 0 and clearly_beats(link, ranked[position - 1]):
+            position -= 1
+        ranked.insert(position, link)
+    return ranked[:top_k] if top_k else ranked
+
+def _selected(matches: List[dict], source_names: Optional[Iterable[str]]) -> List[dict]:
+    source_names = set(source_names) if source_names is not None else None
+    return [match for match in matches if isinstance(match, dict) and isinstance(match.get("links"), list)
+            and (source_names is None or match.get("source_name") in source_names)]
+
+def probe_match_links(matches: List[dict], source_names: Optional[Iterable[str]] = None,
+                      prober: Optional[LinkProber] = None, log_prefix: str = "") -> Optional[Dict[str, ProbeResult]]:
+    """
+    Probes the links of every match (of source_names only, when given) and
+    returns the results by url, to pass to rank_match_links. Probing takes
+    seconds, so callers holding the store lock probe before taking it.
+    Probing problems never fail the run: None is returned instead.
+    """
+    urls = [link for match in _selected(matches, source_names) for link in match["links"]]
+    if not urls:
+        return {}
+
+    own_prober = prober is None
+    try:
+        if own_prober:
+            prober = LinkProber(open_default_probe_cache())
+        started, started_at = time.monotonic(), time.time()
+        results = prober.probe_urls(urls)
+    except Exception as e:
+        logger.warning(f"{log_prefix}Link probing skipped: {e}")
+        return None
+    finally:
+        if own_prober and prober is not None:
+            prober.close()
+
+    alive = sum(1 for result in results.values() if result.ok)
+    # Counted per call: a shared prober's probe_count covers all its calls
+    probed_now = sum(1 for result in results.values() if result.probed_at >= started_at)
+    logger.info(f"{log_prefix}Probed links in {time.monotonic() - started:.1f}s: {len(results)} links, "
+                f"{alive} live, {probed_now} probed now, {len(results) - probed_now} from cache")
+    return results
+
+def rank_match_links(matches: List[dict], source_names: Optional[Iterable[str]] = None,
+                     top_k: Optional[int] = None, prober: Optional[LinkProber] = None,
+                     log_prefix: str = "", results: Optional[Dict[str, ProbeResult]] = None) -> List[dict]:
+    """
+    Returns the matches (of source_names only, when given) with their links
+    ranked by rank_links, using results from probe_match_links, or probing
+    now when results is None. Matches whose order does not change are
+    returned as the same objects. If probing fails, the matches are returned
+    unchanged.
+    """
+    selected = _selected(matches, source_names)
+    if not selected:
+        return matches
+    if results is None:
+        results = probe_match_links(selected, prober=prober, log_prefix=log_prefix)
+        if results is None:
+            return matches
+
+    ranked_ids = {id(match) for match in selected}
+    reordered = 0
+    output = []
+    for match in matches:
+        if id(match) in ranked_ids:
+            links = rank_links(match["links"], results, top_k)
+            if links != match["links"]:
+                match = dict(match, links=links)
+                reordered += 1
+        output.append(match)
+    if reordered:
+        logger.info(f"{log_prefix}Reordered links of {reordered} matches" + (f" (top {top_k} kept)" if top_k else ""))
+    return output
+
+def open_default_probe_cache() -> Optional[LinkProbeCache]:
+    """The on-disk cache at PROBE_CACHE_FILE, or None if it cannot be opened."""
+    try:
+        cache = LinkProbeCache()
+        cache.expire(PROBE_HISTORY_SECONDS)
+        return cache
+    except sqlite3.Error as e:
+        logger.warning(f"Link probe cache unavailable ({PROBE_CACHE_FILE}): {e}")
+        return None
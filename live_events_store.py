@@ -0,0 +1,255 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from entity_resolution import FEED_DEDUP, dedupe_records, expand_records
+from feed_artifacts import publish_artifacts
+from feed_format import FEED_PROFILE, dump_feed, load_feed
+from kickoff_index import KickoffIndex, kickoff_epoch
+from match_merge import merge_key
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Configuration ---
+OUTPUT_FILE = "live_events.json"
+STORE_FILE = "live_events.sqlite"
+STORE_SCHEMA_VERSION = "2"  # Bump when record_key changes; the store is then rebuilt from the export
+
+logger = logging.getLogger(__name__)
+
+def record_key(record: dict) -> str:
+    """Identity of a record within its source: its normalized merge key (teams and date)."""
+    return "|".join(merge_key(record)[1:])
+
+class LiveEventsStore:
+    """
+    Single-writer store behind live_events.json.
+
+    Rows live in SQLite keyed by (source_name, record_key), which doubles as the
+    persistent merge index of match_merge. Each row also carries its kickoff
+    as a UTC epoch, computed once when the row is written, so ordering and
+    expiry never re-parse date strings. Use as a context manager: entering
+    takes an exclusive file lock, so runs of different scrapers on the same
+    machine serialize instead of clobbering each other. The lock does not
+    reach across machines: the workflows that push the feed serialize
+    through their shared `feed-publish` concurrency group instead.
+    live_events.json is a materialized export in a feed_format profile,
+    rewritten atomically and only when its content would change. If the
+    export was changed by something else (e.g. a commit from another
+    workflow), the store re-imports it on open.
+
+    With dedup, the export has one canonical record per fixture reported by
+    several sources (entity_resolution), while the rows stay per source. The
+    entity id given to each grouped row is kept in the entities table, and
+    is also recoverable from the export, so groups and their ids carry over
+    between runs.
+    """
+
+    def __init__(self, export_path: str = OUTPUT_FILE, db_path: str = STORE_FILE, profile: str = FEED_PROFILE,
+                 dedup: bool = FEED_DEDUP):
+        self.export_path = export_path
+        self.db_path = db_path
+        self.profile = profile
+        self.dedup = dedup
+        self.lock_path = f"{export_path}.lock"
+        self._lock_file = None
+        self._db: Optional[sqlite3.Connection] = None
+        self.dirty = False
+
+    # --- Locking and lifecycle ---
+
+    def __enter__(self) -> "LiveEventsStore":
+        self._lock_file = open(self.lock_path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._lock_file.seek(0)
+            msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+
+        self._db = sqlite3.connect(self.db_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS matches ("
+            " source_name TEXT NOT NULL, record_key TEXT NOT NULL, kickoff INTEGER NOT NULL,"
+            " record TEXT NOT NULL, PRIMARY KEY (source_name, record_key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS matches_kickoff ON matches (kickoff)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entities ("
+            " source_name TEXT NOT NULL, match_id TEXT NOT NULL, entity_id TEXT NOT NULL,"
+            " PRIMARY KEY (source_name, match_id))"
+        )
+        if self._meta("schema_version") != STORE_SCHEMA_VERSION:
+            self._db.execute("DELETE FROM matches")
+            self._db.execute("DELETE FROM meta")
+            self._set_meta("schema_version", STORE_SCHEMA_VERSION)
+            self._db.commit()
+        self._sync_from_export()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._db is not None:
+                if exc_type is None:
+                    self._db.commit()
+                else:
+                    self._db.rollback()
+                self._db.close()
+                self._db = None
+        finally:
+            if self._lock_file is not None:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._lock_file.seek(0)
+                    msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _meta(self, name: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value: str):
+        self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def _sync_from_export(self):
+        """Re-import the export if it is not the one this store last wrote."""
+        if not os.path.exists(self.export_path):
+            return
+        with open(self.export_path, 'rb') as f:
+            raw = f.read()
+        export_hash = hashlib.sha256(raw).hexdigest()
+        if export_hash == self._meta("export_hash"):
+            return
+        try:
+            records = load_feed(raw) if raw.strip() else []
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Could not import {self.export_path} into the store: {e}")
+            return
+        if not isinstance(records, list):
+            logger.warning(f"{self.export_path} does not contain a list; not importing it.")
+            return
+        records, assignments = expand_records(records)
+        self._db.execute("DELETE FROM matches")
+        self._insert(records)
+        self._save_entities(assignments)
+        self._set_meta("export_hash", export_hash)
+        self._db.commit()
+        logger.info(f"Imported {len(records)} matches from {self.export_path} into {self.db_path}.")
+
+    def _load_entities(self) -> Dict[Tuple[str, str], str]:
+        return {(source, match_id): entity_id for source, match_id, entity_id in
+                self._db.execute("SELECT source_name, match_id, entity_id FROM entities")}
+
+    def _save_entities(self, assignments: Dict[Tuple[str, str], str]):
+        """Replace the stored entity ids; rows no longer grouped are forgotten."""
+        self._db.execute("DELETE FROM entities")
+        self._db.executemany("INSERT INTO entities (source_name, match_id, entity_id) VALUES (?, ?, ?)",
+                             [(source, match_id, entity_id) for (source, match_id), entity_id in assignments.items()])
+
+    def _insert(self, records: Iterable[dict]):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO matches (source_name, record_key, kickoff, record) VALUES (?, ?, ?, ?)",
+            [(r.get("source_name", ""), record_key(r), kickoff_epoch(r), json.dumps(r, ensure_ascii=False))
+             for r in records if isinstance(r, dict)],
+        )
+
+    # --- Reads and writes ---
+
+    def _select(self, source_names: Optional[Iterable[str]]):
+        query = "SELECT kickoff, record FROM matches"
+        params: list = []
+        if source_names is not None:
+            source_names = list(source_names)
+            query += f" WHERE source_name IN ({','.join('?' * len(source_names))})"
+            params = source_names
+        query += " ORDER BY kickoff, source_name, record_key"
+        return self._db.execute(query, params)
+
+    def load(self, source_names: Optional[Iterable[str]] = None) -> List[dict]:
+        """All records, or only those of the given sources, in export order."""
+        return [json.loads(record) for _, record in self._select(source_names)]
+
+    def load_index(self, source_names: Optional[Iterable[str]] = None) -> KickoffIndex:
+        """Like load(), but as a KickoffIndex built from the stored kickoff column (no date parsing)."""
+        index = KickoffIndex()
+        for kickoff, record in self._select(source_names):
+            index.add(json.loads(record), kickoff)
+        return index
+
+    def save_source_rows(self, source_names: Iterable[str], merged_records: List[dict],
+                         expire_others: bool = True) -> bool:
+        """
+        Stores the result of one scraper's merge. Rows of source_names are
+        replaced by the matching records in merged_records. Rows of any other
+        source are never rewritten; with expire_others they are deleted if the
+        merge dropped them (expiry by cleanup_old_matches), otherwise they are
+        left alone. Returns True if anything changed.
+        """
+        source_names = set(source_names)
+        current = {(source, key): record for source, key, record in
+                   self._db.execute("SELECT source_name, record_key, record FROM matches")}
+
+        wanted = {}
+        for record in merged_records:
+            if not isinstance(record, dict):
+                continue
+            identity = (record.get("source_name", ""), record_key(record))
+            if identity[0] in source_names:
+                wanted[identity] = record
+            elif identity in current:
+                wanted[identity] = None  # Kept as-is
+
+        removed = [identity for identity in current if identity not in wanted
+                   and (expire_others or identity[0] in source_names)]
+        changed_records = [record for identity, record in wanted.items()
+                           if record is not None
+                           and current.get(identity) != json.dumps(record, ensure_ascii=False)]
+
+        if removed:
+            self._db.executemany("DELETE FROM matches WHERE source_name = ? AND record_key = ?", removed)
+        if changed_records:
+            self._insert(changed_records)
+        if removed or changed_records:
+            self.dirty = True
+            logger.info(f"Store: {len(changed_records)} rows written, {len(removed)} removed "
+                        f"for {', '.join(sorted(source_names))}.")
+        return bool(removed or changed_records)
+
+    def export(self, force: bool = False) -> bool:
+        """
+        Rewrites live_events.json atomically if its content changed, along with
+        its compressed variants and manifest, deduplicated across sources
+        when dedup is on. Returns True if written.
+        """
+        if not self.dirty and not force and os.path.exists(self.export_path):
+            return False
+        records = self.load()
+        if self.dedup:
+            records, assignments = dedupe_records(records, self._load_entities())
+            self._save_entities(assignments)
+        payload = dump_feed(records, self.profile)
+        export_hash = hashlib.sha256(payload).hexdigest()
+        if export_hash == self._meta("export_hash") and os.path.exists(self.export_path):
+            self.dirty = False
+            return False
+        tmp_path = f"{self.export_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.export_path)
+        self._set_meta("export_hash", export_hash)
+        self._db.commit()
+        self.dirty = False
+        try:
+            publish_artifacts(self.export_path, payload)
+        except OSError as e:
+            logger.warning(f"Could not publish compressed variants of {self.export_path}: {e}")
+        return True
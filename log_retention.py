@@ -0,0 +1,106 @@
+import logging
+import os
+import re
+from datetime import datetime
+from typing import BinaryIO, List, Optional, Tuple
+
+# Leading "YYYY-MM-DD HH:MM:SS" of a log line. These compare chronologically as
+# plain strings, so no line needs strptime.
+LOG_TIMESTAMP_PATTERN = re.compile(rb'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+# Old entries are only cut once at least this much can be dropped, so most
+# runs return after reading the first line.
+LOG_TRUNCATE_MIN_BYTES = 64 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+
+def _first_stamped_line(f: BinaryIO, offset: int) -> Tuple[int, Optional[bytes]]:
+    """(start, timestamp) of the first timestamped line starting at or after offset; (EOF, None) if none."""
+    if offset > 0:
+        f.seek(offset - 1)
+        f.readline()  # Skip to the start of the next line
+    else:
+        f.seek(0)
+    while True:
+        start = f.tell()
+        line = f.readline()
+        if not line:
+            return start, None
+        match = LOG_TIMESTAMP_PATTERN.match(line)
+        if match:
+            return start, match.group(1)
+
+def find_cutoff_offset(f: BinaryIO, size: int, cutoff: bytes) -> int:
+    """
+    Byte offset of the first entry stamped at or after cutoff, found by binary
+    search over the file. Assumes timestamps are non-decreasing, as they are for
+    a log appended to by one writer at a time. Untimestamped lines (tracebacks)
+    belong to the entry before them.
+    """
+    lo, hi = 0, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start, stamp = _first_stamped_line(f, mid)
+        if stamp is None or stamp >= cutoff:
+            hi = mid
+        else:
+            lo = start + 1
+    return _first_stamped_line(f, lo)[0]
+
+def _handlers_for(path: str) -> List[logging.FileHandler]:
+    path = os.path.abspath(path)
+    handlers = []
+    for logger in [logging.getLogger()] + [l for l in logging.Logger.manager.loggerDict.values()
+                                           if isinstance(l, logging.Logger)]:
+        for handler in logger.handlers:
+            if (isinstance(handler, logging.FileHandler) and handler.baseFilename == path
+                    and handler not in handlers):
+                handlers.append(handler)
+    return handlers
+
+def truncate_log_before(path: str, cutoff: datetime, min_bytes: int = LOG_TRUNCATE_MIN_BYTES) -> int:
+    """
+    Drops the entries of log file `path` stamped before cutoff. Returns the
+    number of bytes removed (0 if fewer than min_bytes were old).
+
+    The cutoff offset is found by binary search, so the cost of a run that
+    finds nothing to drop does not grow with the log. When entries are dropped,
+    the retained tail is copied to a new file that atomically replaces the log.
+    Any FileHandler of this process writing to path is held locked during the
+    swap and then reopens the new file on its next record, so nothing it logs
+    is lost.
+    """
+    if not os.path.exists(path):
+        return 0
+    cutoff_stamp = cutoff.strftime('%Y-%m-%d %H:%M:%S').encode('ascii')
+
+    with open(path, 'rb') as f:
+        first = LOG_TIMESTAMP_PATTERN.match(f.readline())
+        if not first or first.group(1) >= cutoff_stamp:
+            return 0
+        offset = find_cutoff_offset(f, os.fstat(f.fileno()).st_size, cutoff_stamp)
+    if offset < min_bytes:
+        return 0
+
+    handlers = _handlers_for(path)
+    for handler in handlers:
+        handler.acquire()
+    try:
+        for handler in handlers:
+            if handler.stream is not None:
+                handler.stream.flush()
+        tmp_path = f"{path}.tmp"
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            src.seek(offset)
+            while True:
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                dst.write(chunk)
+        os.replace(tmp_path, path)
+        for handler in handlers:
+            if handler.stream is not None:
+                handler.stream.close()
+                handler.stream = None  # FileHandler.emit reopens path lazily
+    finally:
+        for handler in reversed(handlers):
+            handler.release()
+    return offset
@@ -0,0 +1,60 @@
+import hashlib
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+# (source, first team, second team, date, time); teams lowercased, stripped and sorted
+IdKey = Tuple[str, str, str, str, str]
+
+ID_LENGTH = 12
+ID_CACHE_SIZE = 4096
+
+# Hex digit -> letter: digits 0-9 become A-J, hex letters a-f become A-F
+_HEX_TO_LETTERS = str.maketrans("0123456789abcdef", "ABCDEFGHIJABCDEF")
+# Hex digest with its a-f removed, leaving only the digits
+_HEX_DIGITS_ONLY = str.maketrans("", "", "abcdef")
+
+def _team_name(match_data: dict, team: str) -> str:
+    value = match_data.get(team, {})
+    return value.get('name', '') if isinstance(value, dict) else str(value)
+
+def id_key(match_data: dict, default_source: str) -> IdKey:
+    """The normalized identity a match_id is derived from."""
+    teams_sorted = sorted([_team_name(match_data, 'team1').lower().strip(),
+                           _team_name(match_data, 'team2').lower().strip()])
+    return (match_data.get('source_name', default_source), teams_sorted[0], teams_sorted[1],
+            match_data.get('date', ''), match_data.get('time', ''))
+
+def _hash_input(key: IdKey) -> str:
+    source, team_a, team_b, date, time = key
+    return f"{source}-{team_a}-{team_b}-{date}-{time}"
+
+@lru_cache(maxsize=ID_CACHE_SIZE)
+def _letter_id(key: IdKey) -> str:
+    # The first 12 hex digits of one SHA-256 always suffice: every hex digit maps to a letter
+    return hashlib.sha256(_hash_input(key).encode()).hexdigest()[:ID_LENGTH].translate(_HEX_TO_LETTERS)
+
+@lru_cache(maxsize=ID_CACHE_SIZE)
+def _digit_id(key: IdKey) -> str:
+    hash_input = _hash_input(key)
+    digits_only = hashlib.sha256(hash_input.encode()).hexdigest().translate(_HEX_DIGITS_ONLY)
+    # Rarely a digest has fewer than 12 digits; reseed with the count so far, as LUCILAND always has
+    while len(digits_only) < ID_LENGTH:
+        hash_input += str(len(digits_only))
+        digits_only += hashlib.sha256(hash_input.encode()).hexdigest().translate(_HEX_DIGITS_ONLY)
+    return digits_only[:ID_LENGTH]
+
+def letter_match_id(match_data: dict, default_source: str) -> str:
+    """12-letter (A-Z) match_id of football_scraper, memoized on the normalized key."""
+    return _letter_id(id_key(match_data, default_source))
+
+def digit_match_id(match_data: dict, default_source: str) -> str:
+    """12-digit match_id of LUCILAND, memoized on the normalized key."""
+    return _digit_id(id_key(match_data, default_source))
+
+def letter_match_ids(matches: Iterable[dict], default_source: str) -> List[str]:
+    """letter_match_id for every match, in order."""
+    return [_letter_id(id_key(match, default_source)) for match in matches]
+
+def digit_match_ids(matches: Iterable[dict], default_source: str) -> List[str]:
+    """digit_match_id for every match, in order."""
+    return [_digit_id(id_key(match, default_source)) for match in matches]
@@ -0,0 +1,123 @@
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MergeKey = Tuple[str, str, str, str]
+
+def _normalize(value) -> str:
+    return "".join(str(value or "").lower().split())
+
+def merge_key(record: dict) -> MergeKey:
+    """
+    Normalized identity used to match a freshly scraped record to a stored one:
+    source, both team names (case and whitespace folded, order independent) and date.
+    """
+    team1 = _normalize((record.get("team1") or {}).get("name"))
+    team2 = _normalize((record.get("team2") or {}).get("name"))
+    if team1 > team2:
+        team1, team2 = team2, team1
+    return (_normalize(record.get("source_name")), team1, team2, str(record.get("date") or ""))
+
+def merge_links(existing_links: List[str], new_links: List[str]) -> List[str]:
+    """Existing links in their stored order, then unseen new links in scrape order."""
+    return list(dict.fromkeys(list(existing_links or []) + list(new_links or [])))
+
+class MergeResult:
+    """Merged records plus a changed/unchanged flag for every record."""
+
+    def __init__(self):
+        self.matches: List[dict] = []
+        self.changed: Dict[MergeKey, bool] = {}
+        self.new_count = 0
+        self.updated_count = 0
+        self.unchanged_count = 0
+        self.dropped_count = 0
+
+    @property
+    def any_changed(self) -> bool:
+        return self.new_count > 0 or self.updated_count > 0 or self.dropped_count > 0
+
+def build_index(existing_matches: List[dict], log_prefix: str = "") -> Tuple[Dict[MergeKey, dict], int]:
+    """Index stored records by merge_key, skipping records in the old format (no source_name)."""
+    index: Dict[MergeKey, dict] = {}
+    dropped = 0
+    for match in existing_matches:
+        if "source_name" not in match:
+            team1 = match.get("team1", {}).get("name", "Unknown")
+            team2 = match.get("team2", {}).get("name", "Unknown")
+            logger.warning(f"{log_prefix}Skipping existing match in old format (missing 'source_name'): {team1} vs {team2}")
+            dropped += 1
+            continue
+        index[merge_key(match)] = match
+    return index, dropped
+
+def merge_matches(new_matches: List[dict], existing_matches: List[dict], default_logo_url: str,
+                  id_generator: Optional[Callable[[dict], str]] = None, replace: bool = False,
+                  log_prefix: str = "", log_each: bool = True) -> MergeResult:
+    """
+    Merges freshly scraped records into stored ones by merge_key.
+
+    By default a stored record only gains what is new: a real logo in place of
+    default_logo_url, and links it did not have (appended, never reshuffled).
+    With replace=True every field the new record has overwrites the stored one,
+    while fields only the stored record has are kept (a dict update, as
+    LUCILAND does). The stored match_id always survives; records without
+    one get id_generator(record) when a generator is given.
+
+    Output order is new records in scrape order, then untouched stored records in
+    stored order, so identical inputs always merge to identical output.
+    """
+    result = MergeResult()
+    index, result.dropped_count = build_index(existing_matches, log_prefix)
+
+    for new_match in new_matches:
+        key = merge_key(new_match)
+        existing_match = index.pop(key, None)
+
+        if existing_match is None:
+            if id_generator and not new_match.get("match_id"):
+                new_match["match_id"] = id_generator(new_match)
+            result.new_count += 1
+            result.changed[key] = True
+            result.matches.append(new_match)
+            if log_each:
+                logger.info(f"{log_prefix}New match: {new_match['team1']['name']} vs {new_match['team2']['name']}")
+            continue
+
+        match_id = existing_match.get("match_id") or (id_generator(existing_match) if id_generator else None)
+        if replace:
+            merged = dict(existing_match)
+            merged.update(new_match)
+        else:
+            merged = dict(existing_match)
+            for team in ("team1", "team2"):
+                if (existing_match[team]["logo_url"] == default_logo_url
+                        and new_match[team]["logo_url"] != default_logo_url):
+                    merged[team] = dict(existing_match[team], logo_url=new_match[team]["logo_url"])
+            merged["links"] = merge_links(existing_match.get("links"), new_match.get("links"))
+        if match_id:
+            merged["match_id"] = match_id
+
+        changed = merged != existing_match
+        result.changed[key] = changed
+        if changed:
+            result.updated_count += 1
+            if log_each:
+                logger.info(f"{log_prefix}Updated: {new_match['team1']['name']} vs {new_match['team2']['name']}")
+        else:
+            result.unchanged_count += 1
+        result.matches.append(merged)
+
+    for key, match in index.items():
+        if id_generator and not match.get("match_id"):
+            match = dict(match, match_id=id_generator(match))
+            if log_each:
+                logger.info(f"{log_prefix}Generated missing match_id for existing match: {match.get('match_title_from_api', 'Unknown')}")
+            result.changed[key] = True
+            result.updated_count += 1
+        else:
+            result.changed[key] = False
+        result.matches.append(match)
+
+    return result
@@ -0,0 +1,104 @@
+import bisect
+import logging
+import os
+import time
+from typing import Iterable, List, Optional
+
+from feed_format import read_feed
+from kickoff_index import kickoff_epoch
+
+# --- Configuration ---
+POLL_LEAD_SECONDS = 30 * 60          # Streams get listed shortly before kickoff: poll fast from this long before...
+POLL_GRACE_SECONDS = 10 * 60         # ...until this long after it
+MATCH_LIVE_SECONDS = 150 * 60        # A match is being played this long after kickoff (stoppages, extra time)
+POLL_LIVE_SECONDS = 15 * 60          # Interval around a kickoff
+POLL_IDLE_SECONDS = 6 * 3600         # Longest interval when nothing is playing or near kickoff; new fixtures still turn up
+# Polls sooner than the regular interval are paid for with polls saved while
+# idle: one is earned per interval, at most this many are saved up. A job
+# therefore never polls more than its fixed schedule would, plus this burst.
+POLL_BURST = 4
+# The daemon only resolves streams for matches kicking off within this many
+# seconds; the sources rarely list working streams earlier, and the daemon
+# polls again before the rest come near. The cron CLIs resolve every match.
+STREAM_LOOKAHEAD_SECONDS = 6 * 3600
+
+logger = logging.getLogger(__name__)
+
+def within_lookahead(kickoff: int, now: Optional[float] = None,
+                     lookahead: Optional[float] = STREAM_LOOKAHEAD_SECONDS) -> bool:
+    """
+    Whether the streams of a match kicking off at `kickoff` (epoch seconds,
+    0 if unknown) are worth resolving now. Unknown kickoffs always are, and
+    so is everything when lookahead is None.
+    """
+    if lookahead is None or kickoff <= 0:
+        return True
+    now = time.time() if now is None else now
+    return kickoff - now <= lookahead
+
+def load_kickoffs(paths: Iterable[str]) -> List[int]:
+    """Sorted known kickoffs (epoch seconds) of every record in the feed files that exist and can be read."""
+    kickoffs = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        try:
+            records = read_feed(path)
+        except Exception as e:
+            logger.warning(f"Could not read kickoffs from {path}: {e}")
+            continue
+        kickoffs.extend(epoch for epoch in (kickoff_epoch(record) for record in records
+                                            if isinstance(record, dict)) if epoch > 0)
+    kickoffs.sort()
+    return kickoffs
+
+def next_poll_delay(kickoffs: List[int], interval: float, now: Optional[float] = None) -> float:
+    """
+    Seconds until the next poll a source with the regular `interval` would
+    like, given its sorted stored kickoffs:
+
+    - a kickoff less than POLL_LEAD_SECONDS away or POLL_GRACE_SECONDS ago:
+      POLL_LIVE_SECONDS (or the interval, if that is shorter);
+    - otherwise until the next such window opens, at least POLL_LIVE_SECONDS
+      and at most the interval while a match is being played, or
+      POLL_IDLE_SECONDS when none is;
+    - no known kickoffs at all: the interval, since an empty feed may just
+      mean the last runs failed.
+    """
+    if not kickoffs:
+        return interval
+    now = time.time() if now is None else now
+    live_interval = min(interval, POLL_LIVE_SECONDS)
+    upcoming = bisect.bisect_left(kickoffs, now - POLL_GRACE_SECONDS)
+    if upcoming < len(kickoffs) and kickoffs[upcoming] - POLL_LEAD_SECONDS <= now:
+        return live_interval
+    playing = bisect.bisect_left(kickoffs, now - MATCH_LIVE_SECONDS) < upcoming
+    longest = interval if playing else max(interval, POLL_IDLE_SECONDS)
+    if upcoming == len(kickoffs):
+        return longest
+    return min(max(kickoffs[upcoming] - POLL_LEAD_SECONDS - now, live_interval), longest)
+
+class PollPacer:
+    """
+    Paces one job by its stored kickoffs (next_poll_delay) within the poll
+    budget of its fixed schedule: polls skipped while idle are saved (up to
+    `burst`) and spent on polling faster around kickoffs.
+    """
+
+    def __init__(self, interval: float, burst: float = POLL_BURST):
+        self.interval = interval
+        self.burst = burst
+        self.credits = 1.0
+        self._credited_at: Optional[float] = None
+
+    def next_delay(self, kickoffs: List[int], now: Optional[float] = None) -> float:
+        """Seconds until the next poll; call once after each run."""
+        now = time.time() if now is None else now
+        if self._credited_at is not None:
+            self.credits = min(self.burst, self.credits + max(0.0, now - self._credited_at) / self.interval)
+        wanted = next_poll_delay(kickoffs, self.interval, now)
+        # Wait at least until the credit for the next poll has been earned
+        delay = max(wanted, (1 - self.credits) * self.interval)
+        self.credits = min(self.burst, self.credits + delay / self.interval) - 1
+        self._credited_at = now + delay
+        return delay
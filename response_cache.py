@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# --- Configuration ---
+HTTP_CACHE_FILE = ".http_cache.sqlite"
+HTTP_CACHE_MAX_BYTES = 32 * 1024 * 1024   # Least recently used entries are evicted above this size
+# Stale-while-revalidate: for this long past its TTL an entry is still served at once, while a background request refreshes it
+HTTP_CACHE_SWR_SECONDS = 10 * 60
+HTTP_CACHE_STALE_SECONDS = 6 * 3600      # Stale-if-error: how long a failed upstream may be answered with the last good value
+
+# Per-endpoint freshness: (url regex, ttl seconds). Only matching urls are cached.
+HTTP_CACHE_TTL_RULES: List[Tuple[str, int]] = [
+    (r"/api/stream/[^/]+/[^/]+$", 10 * 60),                # streamed stream lookups (conradiculosback, winterfell_scribe)
+    (r"^https://gist\.githubusercontent\.com/", 60 * 60),  # Encryptor config
+    (r"^https://sportsonline\.gl/$", 15 * 60),             # Weekly schedule page; revalidated on later runs
+]
+
+# Response headers kept with each entry
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+logger = logging.getLogger(__name__)
+
+class CachedEntry:
+    """One stored response."""
+
+    __slots__ = ('url', 'status', 'headers', 'body', 'stored_at')
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes, stored_at: float):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def validators(self) -> Dict[str, str]:
+        validators = {}
+        if self.headers.get('ETag'):
+            validators['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = self.headers['Last-Modified']
+        return validators
+
+    def to_response(self) -> requests.Response:
+        """Rebuild a requests.Response carrying the stored status, headers and body."""
+        response = requests.Response()
+        response.status_code = self.status
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response.url = self.url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+
+class ResponseCache:
+    """
+    SQLite-backed HTTP response cache with per-endpoint TTLs and size-bounded
+    LRU eviction. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = HTTP_CACHE_FILE, max_bytes: int = HTTP_CACHE_MAX_BYTES,
+                 ttl_rules: Optional[List[Tuple[str, int]]] = None,
+                 stale_seconds: int = HTTP_CACHE_STALE_SECONDS, swr_seconds: int = HTTP_CACHE_SWR_SECONDS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.swr_seconds = swr_seconds
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in
+                          (HTTP_CACHE_TTL_RULES if ttl_rules is None else ttl_rules)]
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY, status INTEGER, headers TEXT, body BLOB,"
+            " size INTEGER, stored_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def ttl_for(self, url: str) -> Optional[int]:
+        """TTL of the first rule matching url, or None if url is not cacheable."""
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        return None
+
+    def get(self, url: str) -> Optional[CachedEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, body, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        status, headers, body, stored_at = row
+        return CachedEntry(url, status, json.loads(headers), bytes(body), stored_at)
+
+    def put(self, url: str, response: requests.Response):
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, body, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, json.dumps(headers), body, len(body), now, now),
+            )
+            self._evict()
+
+    def refresh(self, url: str):
+        """Mark an entry fresh again after the upstream answered 304."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+
+    def is_revalidatable(self, entry: CachedEntry, ttl: int) -> bool:
+        """Whether an expired entry may be served at once while refreshed in the background (stale-while-revalidate)."""
+        return entry.age < ttl + self.swr_seconds
+
+    def is_servable_stale(self, entry: CachedEntry) -> bool:
+        """Whether entry may stand in for a failed upstream (stale-if-error)."""
+        return entry.age < self.stale_seconds
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for url, size in self._db.execute("SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} responses from {self.path}")
+
+    def close(self):
+        """
+        Fold the WAL back into the main file, then close. Workflows only keep
+        the main file between runs, so responses left in the WAL would be lost.
+        Safe to call more than once.
+        """
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                logger.warning(f"Could not checkpoint {self.path}: {e}")
+            self._db.close()
+            self._db = None
+
+def open_default_cache() -> Optional[ResponseCache]:
+    """The on-disk cache at HTTP_CACHE_FILE, or None if it cannot be opened."""
+    if os.environ.get("HTTP_CACHE_DISABLED"):
+        return None
+    try:
+        return ResponseCache()
+    except sqlite3.Error as e:
+        logger.warning(f"HTTP response cache unavailable ({HTTP_CACHE_FILE}): {e}")
+        return None
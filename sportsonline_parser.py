@@ -0,0 +1,157 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+WEEKDAYS = ('MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY')
+_WEEKDAY_SET = frozenset(WEEKDAYS)
+
+# "HH:MM Title" on the left of "|" in a schedule line
+_EVENT_PATTERN = re.compile(r'^(\d{1,2}:\d{2})\s+(.+)$')
+_URL_PREFIXES = ('http://', 'https://')
+
+ScheduleLine = Tuple[str, str, str]           # (time, title, url)
+DayScheduleLine = Tuple[str, str, str, str]   # (day, time, title, url)
+
+# Parsed weeks of the schedule page, keyed by page hash and hour offset
+WEEK_CACHE_FILE = ".sportsonline_week.json"
+
+logger = logging.getLogger(__name__)
+
+def current_day() -> str:
+    """Current day of the week in uppercase, as used for sportsonline section headers."""
+    return WEEKDAYS[datetime.now().weekday()]
+
+@lru_cache(maxsize=2048)
+def shift_time(time_str: str, hours: int = 0) -> str:
+    """
+    "H:MM" moved back by `hours` (wrapping past midnight), as zero-padded "HH:MM".
+    Returns time_str unchanged if it is not a valid time of day.
+    """
+    try:
+        hour, minute = map(int, time_str.split(':'))
+    except (ValueError, AttributeError):
+        return time_str
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return time_str
+    minutes = (hour * 60 + minute - hours * 60) % (24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def time_to_minutes(time_str: str) -> int:
+    """Convert time string to minutes since midnight for sorting"""
+    try:
+        hour, minute = map(int, time_str.split(':'))
+        return hour * 60 + minute
+    except (ValueError, AttributeError):
+        return 0
+
+def _lines(raw: Union[str, Iterable[str]]) -> Iterable[str]:
+    return io.StringIO(raw) if isinstance(raw, str) else raw
+
+def iter_schedule(raw: Union[str, Iterable[str]], days: Optional[Iterable[str]] = None,
+                  hour_offset: int = 0) -> Iterator[DayScheduleLine]:
+    """
+    Lazily yields (day, time, title, url) for every match line of the
+    sportsonline schedule, in one pass over raw (the page text, or any
+    iterable of its lines). Only sections whose weekday header is in `days`
+    are parsed (all days when None). Titles with "x" between the teams are
+    normalized to "vs", and times are moved back by hour_offset hours.
+    """
+    wanted = _WEEKDAY_SET if days is None else frozenset(day.upper() for day in days)
+    day = None
+    for line in _lines(raw):
+        line = line.strip()
+        if not line:
+            continue
+        upper = line.upper()
+        if upper in _WEEKDAY_SET:
+            day = upper if upper in wanted else None
+            continue
+        if day is None or '|' not in line:
+            continue
+        left_part, stream_url = line.split('|', 1)
+        stream_url = stream_url.strip()
+        if not stream_url.startswith(_URL_PREFIXES):
+            continue
+        event = _EVENT_PATTERN.match(left_part.strip())
+        if not event:
+            continue
+        title = event.group(2).strip()
+        if ':' in title:
+            continue
+        if ' vs ' in title:
+            teams = title.split(' vs ')
+        elif ' x ' in title:
+            teams = title.split(' x ')
+        else:
+            continue
+        if len(teams) != 2 or not teams[0].strip() or not teams[1].strip():
+            continue
+        yield day, shift_time(event.group(1), hour_offset), title.replace(' x ', ' vs '), stream_url
+
+def iter_day(raw: Union[str, Iterable[str]], day: str, hour_offset: int = 0) -> Iterator[ScheduleLine]:
+    """Lazily yields (time, title, url) for one day's section."""
+    for _, time, title, url in iter_schedule(raw, [day], hour_offset):
+        yield time, title, url
+
+def parse_week(raw: Union[str, Iterable[str]], hour_offset: int = 0) -> Dict[str, List[ScheduleLine]]:
+    """Every day's (time, title, url) lines from one fetch of the page, keyed by weekday."""
+    week: Dict[str, List[ScheduleLine]] = {}
+    for day, time, title, url in iter_schedule(raw, None, hour_offset):
+        week.setdefault(day, []).append((time, title, url))
+    return week
+
+def page_hash(raw: str) -> str:
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def load_parsed_week(raw: str, hour_offset: int = 0, cache_path: str = WEEK_CACHE_FILE) -> Dict[str, List[ScheduleLine]]:
+    """
+    parse_week(raw), reusing the parse stored in cache_path when the page is
+    byte-identical to the one parsed last time with the same hour_offset.
+    """
+    digest = page_hash(raw)
+    slot = str(hour_offset)
+    cache = {}
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable schedule cache {cache_path}: {e}")
+            cache = {}
+
+    entry = cache.get(slot) or {}
+    if entry.get("page_hash") == digest:
+        logger.info(f"Schedule page unchanged ({digest[:12]}), reusing the parsed week")
+        return {day: [tuple(line) for line in lines] for day, lines in entry["week"].items()}
+
+    week = parse_week(raw, hour_offset)
+    cache[slot] = {"page_hash": digest, "week": week}
+    try:
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write schedule cache {cache_path}: {e}")
+    return week
+
+def schedule_dates(days_in_page_order: Iterable[str], today: Optional[date] = None) -> Dict[str, date]:
+    """
+    Calendar date of each weekday section. Sections from today's onwards (in
+    page order) fall within the next six days; sections listed before
+    today's are past days of the page's week and are left out. If today is
+    not on the page, every section is taken as upcoming.
+    """
+    today = today or datetime.now().date()
+    today_index = today.weekday()
+    days = list(days_in_page_order)
+    today_name = WEEKDAYS[today_index]
+    if today_name in days:
+        days = days[days.index(today_name):]
+    return {day: today + timedelta(days=(WEEKDAYS.index(day) - today_index) % 7) for day in days}
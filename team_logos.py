@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from entity_resolution import normalize_team
+from http_client import get_client
+
+# --- Configuration ---
+LOGO_INDEX_FILE = "team_logos.json"   # Committed, so every workflow starts from what the streamed runs learned
+LOGO_INDEX_VERSION = 1
+LOGO_MAX_AGE_DAYS = 180               # Badges not seen by any streamed run for this long are forgotten
+LOGO_REFRESH_DAYS = 7                 # A badge's last-seen day is only moved forward this often
+LOGO_REPLACE_DAYS = 14                # A different badge only replaces one not seen for this long
+LOGO_CACHE_DIR = ".team_logos"        # Local copies of badge images, when prefetching
+LOGO_PREFETCH_WORKERS = 8
+
+logger = logging.getLogger(__name__)
+
+def team_key(name: str) -> str:
+    """Index key of a team name: the normalized tokens (entity_resolution), sorted, plus any qualifiers."""
+    tokens, qualifiers = normalize_team(name)
+    key = " ".join(sorted(tokens))
+    return f"{key}|{' '.join(sorted(qualifiers))}" if qualifiers else key
+
+class TeamLogoIndex:
+    """
+    Persistent team name -> badge url index, learned from the streamed
+    sources (the only ones with real badges) and looked up by every source
+    while building records, with no network calls. Safe to share between
+    threads.
+    """
+
+    def __init__(self, path: str = LOGO_INDEX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._teams: Dict[str, dict] = {}
+        self.dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            if document.get("version") == LOGO_INDEX_VERSION:
+                self._teams = document.get("teams", {})
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable team logo index {self.path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._teams)
+
+    def lookup(self, name: str) -> Optional[str]:
+        entry = self._teams.get(team_key(name))
+        return entry["logo_url"] if entry else None
+
+    def logo_for(self, name: str, default_logo_url: str) -> str:
+        """The learned badge of the team, or default_logo_url."""
+        return self.lookup(name) or default_logo_url
+
+    def learn(self, name: str, logo_url: str):
+        """
+        Remember logo_url as the team's badge. Call only with real football
+        badges, never a default logo. The same badge served from another host
+        counts as already known, and a team's first badge is kept until it
+        has not been seen for LOGO_REPLACE_DAYS, so sources that disagree do
+        not flip it on every run.
+        """
+        key = team_key(name)
+        if not key or not logo_url:
+            return
+        # Day resolution, refreshed weekly, keeps the committed file from churning
+        today = int(time.time()) // 86400 * 86400
+        with self._lock:
+            entry = self._teams.get(key)
+            if entry:
+                age = today - entry.get("seen", 0)
+                if badge_id(entry["logo_url"]) == badge_id(logo_url):
+                    if age < LOGO_REFRESH_DAYS * 86400:
+                        return
+                    entry["seen"] = today
+                    self.dirty = True
+                    return
+                if age < LOGO_REPLACE_DAYS * 86400:
+                    return
+            self._teams[key] = {"name": name, "logo_url": logo_url, "seen": today}
+            self.dirty = True
+
+    def save(self) -> bool:
+        """Write the index atomically if anything was learned, dropping badges not seen for LOGO_MAX_AGE_DAYS."""
+        with self._lock:
+            cutoff = time.time() - LOGO_MAX_AGE_DAYS * 86400
+            stale = [key for key, entry in self._teams.items() if entry.get("seen", 0) < cutoff]
+            for key in stale:
+                del self._teams[key]
+            if not self.dirty and not stale:
+                return False
+            document = {"version": LOGO_INDEX_VERSION, "teams": dict(sorted(self._teams.items()))}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(document, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+        logger.info(f"Saved {len(self._teams)} team badges to {self.path}")
+        return True
+
+    def prefetch(self, directory: str = LOGO_CACHE_DIR, workers: int = LOGO_PREFETCH_WORKERS) -> int:
+        """
+        Download every badge not yet in directory (named by badge_file).
+        Returns the number of badges downloaded.
+        """
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            wanted = sorted({entry["logo_url"] for entry in self._teams.values()
+                             if not os.path.exists(os.path.join(directory, badge_file(entry["logo_url"])))})
+        if not wanted:
+            return 0
+
+        def download(logo_url: str) -> bool:
+            try:
+                response = get_client().get(logo_url, timeout=10)
+                response.raise_for_status()
+            except Exception as e:
+                logger.debug(f"Could not prefetch badge {logo_url}: {e}")
+                return False
+            path = os.path.join(directory, badge_file(logo_url))
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(response.content)
+            os.replace(f"{path}.tmp", path)
+            return True
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            downloaded = sum(executor.map(download, wanted))
+        logger.info(f"Prefetched {downloaded} of {len(wanted)} team badges into {directory}")
+        return downloaded
+
+def badge_id(logo_url: str) -> str:
+    """A badge's url without its host: streamed mirrors serve the same badge path."""
+    return urlparse(logo_url).path
+
+def badge_file(logo_url: str) -> str:
+    """File name of a badge's local copy: a hash of its url, keeping the extension."""
+    extension = os.path.splitext(urlparse(logo_url).path)[1]
+    return hashlib.sha256(logo_url.encode('utf-8')).hexdigest()[:20] + extension
+
+_default_index: Optional[TeamLogoIndex] = None
+_default_lock = threading.Lock()
+
+def get_logo_index() -> TeamLogoIndex:
+    """The process-wide index at LOGO_INDEX_FILE, loaded on first use."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = TeamLogoIndex()
+        return _default_index
@@ -1,10 +1,18 @@
-import requests
-import json
 import time
 import logging
 from datetime import datetime, timezone, timedelta
 import os
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from feed_artifacts import publish_artifacts
+from feed_format import read_feed, write_feed
+from http_client import get_client
+from kickoff_index import KickoffIndex, kickoff_epoch
+from link_prober import rank_match_links
+from poll_schedule import within_lookahead
+from team_logos import get_logo_index
 
 # The Realm's Configuration
 SCROLL_ORIGIN = "https://streamed.pk/api"
@@ -18,6 +26,10 @@ CITADEL_SOURCE_NAME = "The Citadel"
 # 12 Hours (in seconds)
 ANCIENT_SCROLL_LIMIT = 12 * 3600
 
+# The Raven Flock: how many visions may be consulted at once
+RAVEN_FLOCK_SIZE = 16    # Ravens in the air across all hosts
+RAVENS_PER_ROOST = 6     # Ravens in flight to any single host
+
 # Set up the Maester's logging
 logging.basicConfig(
     level=logging.INFO,
@@ -33,16 +45,69 @@ def consult_the_scrolls(url):
     """Fetch data from the ether."""
     try:
         logger.info(f"Sending raven to: {url}")
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        return response.json()
+        return get_client().get_json(url)
     except Exception as e:
         logger.error(f"The raven was lost on the way to {url}: {e}")
         return None
 
+class RavenRoost:
+    """Bounds the number of ravens in flight to each host."""
+
+    def __init__(self, per_host=RAVENS_PER_ROOST):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._perches = {}
+
+    def perch_for(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            perch = self._perches.get(host)
+            if perch is None:
+                perch = threading.BoundedSemaphore(self.per_host)
+                self._perches[host] = perch
+            return perch
+
+    def consult(self, url):
+        with self.perch_for(url):
+            return consult_the_scrolls(url)
+
+def vision_urls_for(entry):
+    """All /stream/{source}/{id} urls for one entry, in source order."""
+    urls = []
+    for source_entry in entry.get("sources", []):
+        s_name = source_entry.get("source")
+        s_id = source_entry.get("id")
+        urls.append(f"{SCROLL_ORIGIN}{VISION_PATH.format(source=s_name, id=s_id)}")
+    return urls
+
+def resolve_visions(entries, flock_size=RAVEN_FLOCK_SIZE, per_host=RAVENS_PER_ROOST):
+    """
+    Consult the visions of many entries at once.
+    Returns one list of embed urls per entry, in the same order as entries.
+    """
+    roost = RavenRoost(per_host)
+    url_lists = [vision_urls_for(entry) for entry in entries]
+    all_urls = [url for urls in url_lists for url in urls]
+    if not all_urls:
+        return [[] for _ in entries]
+
+    with ThreadPoolExecutor(max_workers=max(1, flock_size)) as flock:
+        answers = list(flock.map(roost.consult, all_urls))
+
+    visions_per_entry = []
+    position = 0
+    for urls in url_lists:
+        visions = []
+        for vision_data in answers[position:position + len(urls)]:
+            if vision_data:
+                for vision in vision_data:
+                    embed_url = vision.get("embedUrl")
+                    if embed_url:
+                        visions.append(embed_url)
+        position += len(urls)
+        visions_per_entry.append(visions)
+    return visions_per_entry
+
 def is_ancient_history(event_timestamp_ms):
     """Check if the event is older than the allowed limit (12 hours)."""
     if not event_timestamp_ms:
@@ -60,8 +125,74 @@ def is_ancient_history(event_timestamp_ms):
         
     return is_old
 
-def scribe_events(limit=None):
-    """Gather events and write them to the archives."""
+def inscribe_record(entry, visions):
+    """Shape one entry and its visions into an archive record."""
+    timestamp = entry.get("date") # Unix timestamp in ms
+    match_id = entry.get("id")
+    title = entry.get("title")
+
+    # Convert timestamp to human readable date/time (UTC, as kickoff_epoch reads them back)
+    if timestamp:
+        dt_object = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
+        date_str = dt_object.strftime("%d-%m-%Y")
+        time_str = dt_object.strftime("%H:%M")
+    else:
+        date_str = ""
+        time_str = ""
+
+    teams = entry.get("teams", {})
+    home_team = teams.get("home", {})
+    away_team = teams.get("away", {})
+    
+    home_badge = home_team.get("badge")
+    away_badge = away_team.get("badge")
+    
+    home_name = home_team.get("name", "Unknown House")
+    away_name = away_team.get("name", "Unknown House")
+
+    # Football badges the ravens bring are remembered for every source (which are all football);
+    # houses without one borrow a remembered badge
+    logos = get_logo_index()
+    remember = entry.get("category") == "football"
+    if home_badge:
+        home_logo = f"{SCROLL_ORIGIN}/images/badge/{home_badge}.webp"
+        if remember and home_team.get("name"):
+            logos.learn(home_name, home_logo)
+    else:
+        home_logo = logos.logo_for(home_name, DEFAULT_SIGIL)
+    if away_badge:
+        away_logo = f"{SCROLL_ORIGIN}/images/badge/{away_badge}.webp"
+        if remember and away_team.get("name"):
+            logos.learn(away_name, away_logo)
+    else:
+        away_logo = logos.logo_for(away_name, DEFAULT_SIGIL)
+
+    return {
+        "source_name": CITADEL_SOURCE_NAME,
+        "source_icon_url": DEFAULT_SIGIL, 
+        "match_title_from_api": title,
+        "team1": {
+            "name": home_name,
+            "logo_url": home_logo
+        },
+        "team2": {
+            "name": away_name,
+            "logo_url": away_logo
+        },
+        "time": time_str,
+        "date": date_str,
+        "links": list(set(visions)), # De-duplicate
+        "match_id": match_id,
+        "_timestamp": timestamp # Keep for validaton/cleanup comparison
+    }
+
+def scribe_events(limit=None, flock_size=RAVEN_FLOCK_SIZE, per_host=RAVENS_PER_ROOST, lookahead=None):
+    """
+    Gather events and write them to the archives. With `lookahead`, only
+    events beginning within that many seconds are consulted and the later
+    ones wait for a later run; the daemon, which runs often enough to catch
+    them, sets it. None (the default) consults every event.
+    """
     scroll_data = consult_the_scrolls(f"{SCROLL_ORIGIN}{EVENTS_SCROLL}")
     
     if not scroll_data:
@@ -72,109 +203,77 @@ def scribe_events(limit=None):
     
     logger.info(f"Found {len(scroll_data)} potential entries in the scrolls.")
 
-    count = 0
+    # Filter out ancient, distant and source-less events before sending any ravens
+    candidates = []
+    distant = 0
+    now = time.time()
     for entry in scroll_data:
-        if limit and count >= limit:
-            logger.info(f"The Maester is tired. Stopping after {limit} entries.")
-            break
-
         timestamp = entry.get("date") # Unix timestamp in ms
-        
-        # Filter out ancient events immediately from api data if they are already too old
         if timestamp and is_ancient_history(timestamp):
             continue
+        if not entry.get("sources", []):
+            continue
+        if isinstance(timestamp, (int, float)) and not within_lookahead(int(timestamp // 1000), now, lookahead):
+            distant += 1
+            continue
+        candidates.append(entry)
+    if distant:
+        logger.info(f"{distant} events lie more than {lookahead / 3600:g}h ahead; their visions can wait.")
 
-        match_id = entry.get("id")
-        title = entry.get("title")
-        
-        # Convert timestamp to human readable date/time (Local/System time)
-        if timestamp:
-            dt_object = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
-            dt_local = dt_object.astimezone() 
-            date_str = dt_local.strftime("%d-%m-%Y")
-            time_str = dt_local.strftime("%H:%M")
-        else:
-            date_str = ""
-            time_str = ""
+    # Without a limit every vision is consulted in one flight. With a limit,
+    # only as many entries as are still needed are consulted per flight, so
+    # the Maester never sends ravens for entries he would not inscribe.
+    count = 0
+    position = 0
+    while position < len(candidates):
+        if limit and count >= limit:
+            logger.info(f"The Maester is tired. Stopping after {limit} entries.")
+            break
 
-        sources = entry.get("sources", [])
-        
-        if not sources:
-            continue
+        batch_size = (limit - count) if limit else len(candidates)
+        batch = candidates[position:position + batch_size]
+        position += len(batch)
 
-        # Fetch visions (streams)
-        visions = []
-        logger.info(f"Consulting visions for: {title}")
-
-        for source_entry in sources:
-            s_name = source_entry.get("source")
-            s_id = source_entry.get("id")
-            
-            vision_url = f"{SCROLL_ORIGIN}{VISION_PATH.format(source=s_name, id=s_id)}"
-            vision_data = consult_the_scrolls(vision_url)
-            
-            if vision_data:
-                for vision in vision_data:
-                    embed_url = vision.get("embedUrl")
-                    if embed_url:
-                        visions.append(embed_url)
-            
-            # Rest the raven briefly
-            time.sleep(0.1)
-
-        if visions:
-            count += 1
-            
-            teams = entry.get("teams", {})
-            home_team = teams.get("home", {})
-            away_team = teams.get("away", {})
-            
-            home_badge = home_team.get("badge")
-            away_badge = away_team.get("badge")
-            
-            home_logo = f"{SCROLL_ORIGIN}/images/badge/{home_badge}.webp" if home_badge else DEFAULT_SIGIL
-            away_logo = f"{SCROLL_ORIGIN}/images/badge/{away_badge}.webp" if away_badge else DEFAULT_SIGIL
-
-            event_record = {
-                "source_name": CITADEL_SOURCE_NAME,
-                "source_icon_url": DEFAULT_SIGIL, 
-                "match_title_from_api": title,
-                "team1": {
-                    "name": home_team.get("name", "Unknown House"),
-                    "logo_url": home_logo
-                },
-                "team2": {
-                    "name": away_team.get("name", "Unknown House"),
-                    "logo_url": away_logo
-                },
-                "time": time_str,
-                "date": date_str,
-                "links": list(set(visions)), # De-duplicate
-                "match_id": match_id,
-                "_timestamp": timestamp # Keep for validaton/cleanup comparison
-            }
-            new_knowledge[match_id] = event_record
+        logger.info(f"Consulting visions for {len(batch)} entries ({flock_size} ravens, {per_host} per roost)...")
+        for entry, visions in zip(batch, resolve_visions(batch, flock_size, per_host)):
+            if visions:
+                count += 1
+                new_knowledge[entry.get("id")] = inscribe_record(entry, visions)
 
     return new_knowledge
 
+def backfill_timestamp(record):
+    """
+    Give a legacy record (written before `_timestamp` existed) its kickoff as
+    epoch ms, parsed once from its UTC "dd-mm-yyyy" + "HH:MM" strings the same
+    way kickoff_epoch does. The value is saved with the archives, so the next
+    run does not parse it again.
+    """
+    if record.get("_timestamp") or not (record.get("date") and record.get("time")):
+        return
+    epoch = kickoff_epoch(record)
+    if epoch > 0:
+        record["_timestamp"] = epoch * 1000
+    # Otherwise: can't determine, keep it safe
+
 def load_archives():
     """Load the existing archives."""
     if os.path.exists(ARCHIVES_LOCATION):
         try:
-            with open(ARCHIVES_LOCATION, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # Convert list to dict keyed by match_id for easy lookup
-                archives = {}
-                for item in data:
-                    mid = item.get("match_id")
-                    if mid:
-                        archives[mid] = item
-                return archives
+            data = read_feed(ARCHIVES_LOCATION)
+            # Convert list to dict keyed by match_id for easy lookup
+            archives = {}
+            for item in data:
+                mid = item.get("match_id")
+                if mid:
+                    backfill_timestamp(item)
+                    archives[mid] = item
+            return archives
         except Exception as e:
             logger.warning(f"Could not read the ancient texts: {e}")
     return {}
 
-def update_archives(new_data):
+def update_archives(new_data, probe_links=True, top_links=None):
     """Merge new knowledge with the ancient archives."""
     archives = load_archives()
     
@@ -187,79 +286,58 @@ def update_archives(new_data):
             logger.info(f"Inscribing new event: {record['match_title_from_api']}")
         archives[m_id] = record
         
-    # Cleanup Phase: Remove records that are too old (from ALL archives, not just new)
-    clean_archives = []
-    removed_count = 0
-    
-    for m_id, record in archives.items():
-        # Check _timestamp first, if missing try to parse date/time or keep safely
-        ts = record.get("_timestamp")
-        
-        # If we don't have _timestamp (legacy data), try to infer or check if we should keep it.
-        # For this refactor, we trust the new scraper adds _timestamp. 
-        # If it's missing, we might keep it or discard. Let's assume we keep unless validly proven old.
-        # ACTUALLY, the user said "remove these old events too".
-        # If we just fetched it and it wasn't returned, maybe it's over? 
-        # But for now, we stick to the time-based rule logic requested: "older than 12 hours from their kick off time".
-        
-        is_old = False
-        if ts:
-             is_old = is_ancient_history(ts)
-        else:
-            # Try to parse string date/time if needed, or pass
-            # live_events format: "date": "18-01-2026", "time": "11:15"
-            try:
-                d_str = record.get("date")
-                t_str = record.get("time")
-                if d_str and t_str:
-                    # Parse dd-mm-yyyy HH:MM
-                    dt_str = f"{d_str} {t_str}"
-                    dt = datetime.strptime(dt_str, "%d-%m-%Y %H:%M")
-                    # Assume local time.. complicating comparison.
-                    # Best to rely on _timestamp if available.
-                    # If legacy data doesn't have it, we might just leave it until it's overwritten or we're sure.
-                    # However, "filter out ... older than 12 hours".
-                    # Let's perform a rough check.
-                    now = datetime.now()
-                    if (now - dt).total_seconds() > ANCIENT_SCROLL_LIMIT:
-                        is_old = True
-            except:
-                pass # Can't determine, keep it safe
-        
-        if is_old:
-            removed_count += 1
-            logger.info(f"Removing ancient scroll: {record.get('match_title_from_api')}")
-        else:
-            # Remove internal usage key before saving if desired, OR keep for next run
-            # User said "keep the m out of the json", probably meant "them" (old events) or internal keys?
-            # "keep the m out of the json" -> likely typo for "keep them out".
-            # I will keep _timestamp for internal tracking but maybe remove if strict format needed.
-            # But "keep track of each game ... update to effet the changes" implies persistence.
-            # I'll keep _timestamp in file for robust tracking on next run. It's metadata. 
-            # Wait, "keep the m out of the json" -> "keep them out" (the old events).
-            clean_archives.append(record)
-
-    logger.info(f"The Archives have been updated. Total: {len(clean_archives)}. Removed: {removed_count} ancient scrolls.")
-    
-    # Sort by time/date if possible? Or just list. List is fine.
-    # Optional: Sort by timestamp
-    clean_archives.sort(key=lambda x: x.get("_timestamp", 0) or 0)
-    
-    # Save
-    with open(ARCHIVES_LOCATION, 'w', encoding='utf-8') as f:
-        json.dump(clean_archives, f, indent=2, ensure_ascii=False)
+    # Cleanup Phase: Remove records that are too old (from ALL archives, not just new).
+    # Records without a known kickoff are kept safe.
+    index = KickoffIndex(archives.values())
+    ancient = index.expire_before(int(time.time()) - ANCIENT_SCROLL_LIMIT)
+    for _, record in ancient:
+        logger.info(f"Removing ancient scroll: {record.get('match_title_from_api')}")
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description='Winterfell Scribe')
-    parser.add_argument('--limit', type=int, help='Limit number of visions to consult')
-    args = parser.parse_args()
+    # Sorted by kickoff, undated scrolls first
+    clean_archives = index.records()
+    logger.info(f"The Archives have been updated. Total: {len(clean_archives)}. Removed: {len(ancient)} ancient scrolls.")
+
+    # Test every vision and list the ones that answer, fastest first
+    if probe_links:
+        clean_archives = rank_match_links(clean_archives, top_k=top_links)
+    
+    # Save in the configured feed profile (FEED_PROFILE=minified for a smaller file)
+    payload = write_feed(ARCHIVES_LOCATION, clean_archives)
+    try:
+        publish_artifacts(ARCHIVES_LOCATION, payload)
+    except OSError as e:
+        logger.warning(f"Could not publish compressed archives: {e}")
 
+def main(limit=None, flock_size=RAVEN_FLOCK_SIZE, per_host=RAVENS_PER_ROOST, probe_links=True, top_links=None,
+         prefetch_logos=False, lookahead=None):
+    """One full run of the Scribe: gather, merge and clean, remember the badges."""
     logger.info("The Winter is Coming. The Scribe begins his work.")
     
     # 1. Fetch new data
-    fresh_scrolls = scribe_events(limit=args.limit)
+    fresh_scrolls = scribe_events(limit=limit, flock_size=flock_size, per_host=per_host, lookahead=lookahead)
     
     # 2. Merge and Clean
-    update_archives(fresh_scrolls)
+    update_archives(fresh_scrolls, probe_links=probe_links, top_links=top_links)
+
+    # 3. Remember the badges for the other sources
+    logos = get_logo_index()
+    if prefetch_logos:
+        logos.prefetch()
+    logos.save()
     
     logger.info("The Scribe rests.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Winterfell Scribe')
+    parser.add_argument('--limit', type=int, help='Limit number of visions to consult')
+    parser.add_argument('--ravens', type=int, default=RAVEN_FLOCK_SIZE, help='Visions consulted at once')
+    parser.add_argument('--ravens-per-host', type=int, default=RAVENS_PER_ROOST, help='Visions in flight to any single host')
+    parser.add_argument('--no-probe', action='store_true', help='Do not test and rank the visions of each entry')
+    parser.add_argument('--top-links', type=int, help='Keep only the best N visions per entry')
+    parser.add_argument('--prefetch-logos', action='store_true', help='Keep local copies of every remembered badge')
+    parser.add_argument('--stream-lookahead', type=float, metavar='HOURS',
+                        help='Only consult the visions of events beginning within this many hours (default: all)')
+    args = parser.parse_args()
+    main(limit=args.limit, flock_size=args.ravens, per_host=args.ravens_per_host, probe_links=not args.no_probe,
+         top_links=args.top_links, prefetch_logos=args.prefetch_logos,
+         lookahead=args.stream_lookahead * 3600 if args.stream_lookahead is not None else None)